@@ -38,6 +38,10 @@ class SettingManager:
             if not dir_path.exists():
                 dir_path.mkdir(parents=True, exist_ok=True)
 
+        with self.DATA_DIR as dir_path:
+            if not dir_path.exists():
+                dir_path.mkdir(parents=True, exist_ok=True)
+
     def __load_mode(self) -> None:
         """
         加载模式
@@ -68,6 +72,13 @@ class SettingManager:
         """
         return self.BASE_DIR / "logs"
 
+    @property
+    def DATA_DIR(self) -> Path:
+        """
+        数据文件路径（目录缓存、同步记录等）
+        """
+        return self.CONFIG_DIR / "data"
+
     @property
     def CONFIG(self) -> Path:
         """
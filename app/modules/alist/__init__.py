@@ -3,4 +3,13 @@ Alist API V3
 https://alist.nn.ci/zh/guide/api/
 """
 
-from app.modules.alist.v3 import AlistClient, AlistPath, AlistStorage
+from app.modules.alist.v3 import (
+    AlistClient,
+    AlistPath,
+    AlistEntry,
+    AlistStorage,
+    AlistStorageLimits,
+    AlistListingCache,
+    AlistFrontier,
+    AlistLocalSource,
+)
@@ -1,3 +1,8 @@
 from app.modules.alist.v3.client import AlistClient
 from app.modules.alist.v3.path import AlistPath
+from app.modules.alist.v3.entry import AlistEntry
 from app.modules.alist.v3.storage import AlistStorage
+from app.modules.alist.v3.limits import AlistStorageLimits
+from app.modules.alist.v3.cache import AlistListingCache
+from app.modules.alist.v3.frontier import AlistFrontier
+from app.modules.alist.v3.local import AlistLocalSource
@@ -0,0 +1,157 @@
+from asyncio import to_thread
+from json import dumps, loads
+from time import time
+from typing import TYPE_CHECKING
+
+from app.core import settings, logger
+from app.utils import SQLiteDB
+from app.modules.alist.v3.entry import AlistEntry
+
+if TYPE_CHECKING:
+    from app.modules.alist.v3.client import AlistClient
+
+
+class AlistListingCache:
+    """
+    Alist 目录列表持久化缓存
+    以服务器、目录路径及目录修改时间为键，目录修改时间未变化时直接复用缓存的子项，无需请求 /api/fs/list
+    目录修改时间需来自父目录的实时列表：缓存列表中子目录的修改时间是缓存时的值，不能用于校验该子目录的缓存
+    """
+
+    DB_FILE: str = "listing_cache.db"
+    # 部分驱动不返回目录修改时间，此类目录无法判断是否变化，不使用缓存
+    UNKNOWN_MODIFIED_PREFIX: str = "0001-01-01"
+    # 列表缓存中保存的字段
+    FIELDS: tuple[str, ...] = (
+        "id",
+        "path",
+        "name",
+        "size",
+        "is_dir",
+        "modified",
+        "created",
+        "sign",
+        "thumb",
+        "type",
+        "hashinfo",
+        "hash_info",
+    )
+
+    def __init__(
+        self,
+        client: "AlistClient",
+        ttl: int = 86400,
+        force_refresh: bool = False,
+    ) -> None:
+        """
+        实例化 AlistListingCache 对象
+
+        :param client: AlistClient 对象
+        :param ttl: 缓存有效期（单位秒），超过有效期的缓存会重新请求校验
+        :param force_refresh: 是否强制刷新（忽略已有缓存，仍会写入新缓存）
+        """
+
+        self.client = client
+        self.server = client.url + client.base_path.rstrip("/")
+        self.ttl = ttl
+        self.force_refresh = force_refresh
+
+        self.__db = SQLiteDB(str(settings.DATA_DIR / self.DB_FILE))
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS listing (
+                server TEXT NOT NULL,
+                path TEXT NOT NULL,
+                modified TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                children TEXT NOT NULL,
+                PRIMARY KEY (server, path)
+            );
+            """)
+
+    def is_cacheable(self, modified: str | None) -> bool:
+        """
+        判断目录修改时间是否可用于缓存校验
+
+        :param modified: 目录修改时间
+        """
+
+        return bool(modified) and not modified.startswith(self.UNKNOWN_MODIFIED_PREFIX)
+
+    async def get(self, dir_path: str, modified: str | None) -> list[AlistEntry] | None:
+        """
+        获取目录的缓存子项
+
+        :param dir_path: 目录路径
+        :param modified: 父目录列表中该目录的修改时间
+        :return: AlistEntry 对象列表，缓存未命中时返回 None
+        """
+
+        if self.force_refresh or not self.is_cacheable(modified):
+            return None
+
+        rows = await to_thread(
+            self.__db.execute,
+            "SELECT modified, fetched_at, children FROM listing "
+            "WHERE server = ? AND path = ?",
+            (self.server, dir_path),
+        )
+        if not rows:
+            return None
+
+        cached_modified, fetched_at, children = rows[0]
+        if cached_modified != modified:
+            logger.debug(f"目录 {dir_path} 已变化，重新获取文件列表")
+            return None
+        if time() - fetched_at > self.ttl:
+            logger.debug(f"目录 {dir_path} 缓存已过期，重新获取文件列表")
+            return None
+
+        logger.debug(f"目录 {dir_path} 未变化，使用缓存的文件列表")
+        return [
+            AlistEntry.from_dict(
+                self.client.url, self.client.base_path, dir_path, child
+            )
+            for child in loads(children)
+        ]
+
+    async def set(
+        self,
+        dir_path: str,
+        modified: str | None,
+        children: list[AlistEntry],
+    ) -> None:
+        """
+        保存目录的子项
+
+        :param dir_path: 目录路径
+        :param modified: 父目录列表中该目录的修改时间
+        :param children: 目录下的 AlistEntry 对象列表
+        """
+
+        if not self.is_cacheable(modified):
+            return
+
+        data = dumps(
+            [
+                {field: getattr(child, field) for field in self.FIELDS}
+                for child in children
+            ],
+            ensure_ascii=False,
+        )
+        await to_thread(
+            self.__db.execute,
+            "INSERT OR REPLACE INTO listing (server, path, modified, fetched_at, children) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.server, dir_path, modified, time(), data),
+        )
+
+    async def purge(self) -> None:
+        """
+        清理已过期的缓存
+        """
+
+        await to_thread(
+            self.__db.execute,
+            "DELETE FROM listing WHERE server = ? AND fetched_at < ?",
+            (self.server, time() - self.ttl),
+        )
@@ -1,13 +1,32 @@
-from asyncio import sleep
-from typing import Callable, AsyncGenerator
-from time import time
+from asyncio import CancelledError, Task, create_task
+from base64 import b64encode
+from contextlib import asynccontextmanager
+from typing import Any, Callable, AsyncGenerator, AsyncIterator, Awaitable, Iterable
+from time import time, perf_counter
+from urllib.parse import urlsplit
 
 from httpx import Response
 
 from app.core import logger
-from app.utils import RequestUtils, Multiton
+from app.utils import (
+    RequestUtils,
+    HTTPClient,
+    AlistUtils,
+    URLUtils,
+    Multiton,
+    AdaptiveLimiter,
+    JSONUtils,
+    JSONArrayStream,
+)
 from app.modules.alist.v3.path import AlistPath
+from app.modules.alist.v3.entry import AlistEntry
 from app.modules.alist.v3.storage import AlistStorage
+from app.modules.alist.v3.cache import AlistListingCache
+from app.modules.alist.v3.frontier import AlistFrontier
+from app.modules.alist.v3.limits import AlistStorageLimits
+from app.modules.alist.v3.local import AlistLocalSource
+from app.modules.alist.v3.walker import AlistWalker
+from app.modules.alist.v3.webdav import AlistDAVStream
 
 
 class AlistClient(metaclass=Multiton):
@@ -45,6 +64,8 @@ class AlistClient(metaclass=Multiton):
         if not url.startswith("http"):
             url = "https://" + url
         self.url = url.rstrip("/")
+        self.limiter = AdaptiveLimiter.for_url(self.url)
+        self.storage_limits: AlistStorageLimits | None = None
 
         if token != "":
             self.__token["token"] = token
@@ -62,6 +83,7 @@ class AlistClient(metaclass=Multiton):
         method: str,
         url: str,
         auth: bool = True,
+        limiter: AdaptiveLimiter | None = None,
         **kwargs,
     ) -> Response:
         """
@@ -70,13 +92,75 @@ class AlistClient(metaclass=Multiton):
         :param method 请求方法
         :param url 请求 url
         :param auth header 中是否带有 alist 认证令牌
+        :param limiter 限流器，默认使用服务器共享的限流器
         """
 
         if auth:
             headers = kwargs.get("headers", {})
             headers["Authorization"] = self.__get_token
             kwargs["headers"] = headers
-        return await self.__client.request(method, url, **kwargs, sync=False)
+
+        limiter = limiter or self.limiter
+        await limiter.acquire()
+        resp: Response | None = None
+        start = perf_counter()
+        cancelled = False
+        try:
+            resp = await self.__client.request(method, url, **kwargs, sync=False)
+            return resp
+        except CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if cancelled:
+                limiter.cancel()
+            else:
+                limiter.release(
+                    perf_counter() - start,
+                    resp.status_code if resp is not None else None,
+                )
+
+    @asynccontextmanager
+    async def __stream(
+        self,
+        method: str,
+        url: str,
+        auth: bool = True,
+        limiter: AdaptiveLimiter | None = None,
+        **kwargs,
+    ) -> AsyncIterator[Response]:
+        """
+        发送流式 HTTP 请求
+        收到响应头后即释放限流许可，读取响应体不占用并发数
+
+        :param method 请求方法
+        :param url 请求 url
+        :param auth header 中是否带有 alist 认证令牌
+        :param limiter 限流器，默认使用服务器共享的限流器
+        """
+
+        headers = dict(kwargs.get("headers", self.__client.HEADERS))
+        if auth:
+            headers["Authorization"] = self.__get_token
+        kwargs["headers"] = headers
+
+        limiter = limiter or self.limiter
+        await limiter.acquire()
+        released = False
+        start = perf_counter()
+        try:
+            async with self.__client.stream(method, url, **kwargs) as resp:
+                limiter.release(perf_counter() - start, resp.status_code)
+                released = True
+                yield resp
+        except CancelledError:
+            if not released:
+                limiter.cancel()
+                released = True
+            raise
+        finally:
+            if not released:
+                limiter.release(perf_counter() - start, None)
 
     async def __get(self, url: str, auth: bool = True, **kwargs) -> Response:
         """
@@ -135,6 +219,66 @@ class AlistClient(metaclass=Multiton):
 
             return self.__token["token"]
 
+    @property
+    def __dav_auth(self) -> str:
+        """
+        返回 WebDAV 认证请求头，使用永久令牌时为 Bearer 令牌，否则为 Basic 认证
+        """
+
+        if self.__token["expires"] == -1:
+            return "Bearer " + self.__token["token"]
+        credentials = f"{self.username}:{self.__password}".encode()
+        return "Basic " + b64encode(credentials).decode()
+
+    def sign(self, path: str) -> str:
+        """
+        计算文件签名，Alist 的签名密钥即永久令牌，未使用永久令牌时无法计算
+
+        :param path: 文件在 Alist 服务器上的绝对路径
+        :return: 签名（不包含 ?sign= 前缀），无法计算时返回空字符串
+        """
+
+        if self.__token["expires"] != -1:
+            return ""
+        return AlistUtils.sign(self.__token["token"], path).removeprefix("?sign=")
+
+    def limiter_for(self, path: str) -> AdaptiveLimiter:
+        """
+        获取路径所属存储器的限流器，未加载存储器限流时返回服务器共享的限流器
+
+        :param path: 文件/目录路径
+        :return: AdaptiveLimiter 对象
+        """
+
+        if self.storage_limits is None:
+            return self.limiter
+        return self.storage_limits.get(path)
+
+    async def load_storage_limits(
+        self, overrides: dict[str, dict] | None = None
+    ) -> bool:
+        """
+        获取存储器列表并按存储器划分限流器，需要管理员用户权限
+        获取失败（如非管理员用户）时所有请求继续使用服务器共享的限流器
+
+        :param overrides: 覆盖驱动器默认限制，格式见 AlistStorageLimits
+        :return: 是否加载成功
+        """
+
+        try:
+            storages = await self.async_api_admin_storage_list()
+        except RuntimeError as e:
+            logger.warning(
+                f"无法按存储器划分限流器，所有目录使用服务器共享的限流器：{e}"
+            )
+            return False
+
+        self.storage_limits = AlistStorageLimits(
+            self.limiter, self.base_path, storages, overrides
+        )
+        logger.info(f"已按 {len(self.storage_limits)} 个存储器划分限流器")
+        return True
+
     def api_auth_login(self) -> str:
         """
         登录 Alist 服务器认证账户信息
@@ -178,31 +322,42 @@ class AlistClient(metaclass=Multiton):
         except Exception:
             raise RuntimeError("获取用户信息失败")
 
-    async def async_api_fs_list(self, dir_path: str) -> list[AlistPath]:
+    async def async_api_fs_list(
+        self,
+        dir_path: str,
+        page: int = 1,
+        per_page: int = 0,
+        refresh: bool = False,
+    ) -> list[AlistEntry]:
         """
         获取文件列表
 
         :param dir_path: 目录路径
-        :return: AlistPath 对象列表
+        :param page: 页码（从 1 开始）
+        :param per_page: 每页数量，为 0 时一次性获取全部
+        :param refresh: 是否要求 Alist 刷新目录缓存，从网盘重新获取列表
+        :return: AlistEntry 对象列表
         """
 
-        logger.debug(f"获取目录 {dir_path} 下的文件列表")
+        logger.debug(f"获取目录 {dir_path} 下的文件列表，页码：{page}")
 
         json = {
             "path": dir_path,
             "password": "",
-            "page": 1,
-            "per_page": 0,
-            "refresh": False,
+            "page": page,
+            "per_page": per_page,
+            "refresh": refresh,
         }
 
-        resp = await self.__post(self.url + "/api/fs/list", json=json)
+        resp = await self.__post(
+            self.url + "/api/fs/list", json=json, limiter=self.limiter_for(dir_path)
+        )
         if resp.status_code != 200:
             raise RuntimeError(
                 f"获取目录 {dir_path} 的文件列表请求发送失败，状态码：{resp.status_code}"
             )
 
-        result = resp.json()
+        result = JSONUtils.loads(resp.content)
 
         if result["code"] != 200:
             raise RuntimeError(
@@ -211,19 +366,285 @@ class AlistClient(metaclass=Multiton):
 
         logger.debug(f"获取目录 {dir_path} 的文件列表成功")
 
-        if result["data"]["total"] == 0:
+        if result["data"]["total"] == 0 or not result["data"]["content"]:
             return []
 
         return [
-            AlistPath(
-                server_url=self.url,
-                base_path=self.base_path,
-                full_path=dir_path + "/" + alist_path["name"],
-                **alist_path,
-            )
+            AlistEntry.from_dict(self.url, self.base_path, dir_path, alist_path)
             for alist_path in result["data"]["content"]
         ]
 
+    async def async_api_fs_iter(
+        self,
+        dir_path: str,
+        page: int = 1,
+        per_page: int = 0,
+        refresh: bool = False,
+    ) -> AsyncGenerator[AlistEntry, None]:
+        """
+        流式获取文件列表
+        在响应体到达时增量解析文件列表，内存中不会同时存在完整的响应体及文件列表
+
+        :param dir_path: 目录路径
+        :param page: 页码（从 1 开始）
+        :param per_page: 每页数量，为 0 时一次性获取全部
+        :param refresh: 是否要求 Alist 刷新目录缓存，从网盘重新获取列表
+        :return: AlistEntry 对象生成器
+        """
+
+        logger.debug(f"流式获取目录 {dir_path} 下的文件列表，页码：{page}")
+
+        json = {
+            "path": dir_path,
+            "password": "",
+            "page": page,
+            "per_page": per_page,
+            "refresh": refresh,
+        }
+
+        decoder = JSONArrayStream("content")
+        async with self.__stream(
+            "post",
+            self.url + "/api/fs/list",
+            json=json,
+            limiter=self.limiter_for(dir_path),
+        ) as resp:
+            if resp.status_code != 200:
+                raise RuntimeError(
+                    f"获取目录 {dir_path} 的文件列表请求发送失败，状态码：{resp.status_code}"
+                )
+
+            async for chunk in resp.aiter_bytes():
+                for item in decoder.feed(chunk):
+                    yield AlistEntry.from_dict(self.url, self.base_path, dir_path, item)
+
+        for item in decoder.close():
+            yield AlistEntry.from_dict(self.url, self.base_path, dir_path, item)
+
+        result = decoder.result
+        if result["code"] != 200:
+            raise RuntimeError(
+                f"获取目录 {dir_path} 的文件列表失败，错误信息：{result['message']}"
+            )
+
+        logger.debug(f"获取目录 {dir_path} 的文件列表成功，共 {decoder.count} 项")
+
+    async def iter_fs_list(
+        self,
+        dir_path: str,
+        per_page: int = 0,
+        prefetch: bool = True,
+        stream: bool = False,
+        refresh: bool = False,
+    ) -> AsyncGenerator[AlistEntry, None]:
+        """
+        分页获取文件列表的异步生成器
+        内存占用取决于每页数量而非目录大小
+
+        :param dir_path: 目录路径
+        :param per_page: 每页数量，为 0 时一次性获取全部
+        :param prefetch: 是否在处理当前页时预取下一页
+        :param stream: 是否流式解析响应（不预取），适用于超大目录
+        :param refresh: 是否要求 Alist 刷新目录缓存，仅在请求第一页时刷新，后续页使用刷新后的缓存
+        :return: AlistEntry 对象生成器
+        """
+
+        if stream:
+            page = 1
+            while True:
+                count = 0
+                async for path in self.async_api_fs_iter(
+                    dir_path, page, per_page, refresh=refresh and page == 1
+                ):
+                    count += 1
+                    yield path
+                if per_page <= 0 or count < per_page:
+                    return
+                page += 1
+
+        if per_page <= 0:
+            for path in await self.async_api_fs_list(dir_path, refresh=refresh):
+                yield path
+            return
+
+        page = 1
+        pending: Task[list[AlistEntry]] | None = create_task(
+            self.async_api_fs_list(dir_path, page, per_page, refresh=refresh)
+        )
+        try:
+            while pending is not None:
+                paths = await pending
+                pending = None
+                has_more = len(paths) >= per_page
+                page += 1
+
+                if has_more and prefetch:
+                    pending = create_task(
+                        self.async_api_fs_list(dir_path, page, per_page)
+                    )
+
+                for path in paths:
+                    yield path
+                del paths
+
+                if has_more and not prefetch:
+                    pending = create_task(
+                        self.async_api_fs_list(dir_path, page, per_page)
+                    )
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def async_api_dav_iter(
+        self, dir_path: str
+    ) -> AsyncGenerator[AlistEntry, None]:
+        """
+        通过 WebDAV（PROPFIND，Depth: 1）流式获取文件列表
+        在响应体到达时增量解析多状态响应，结果不包含哈希信息，文件签名由永久令牌计算
+
+        :param dir_path: 目录路径
+        :return: AlistEntry 对象生成器
+        """
+
+        logger.debug(f"通过 WebDAV 获取目录 {dir_path} 下的文件列表")
+
+        headers = {
+            **HTTPClient.HEADERS,
+            "Accept": "application/xml",
+            "Content-Type": "application/xml; charset=utf-8",
+            "Depth": "1",
+            "Authorization": self.__dav_auth,
+        }
+        url = URLUtils.encode(self.url + "/dav" + dir_path.rstrip("/") + "/")
+        parser = AlistDAVStream(
+            self.url,
+            self.base_path,
+            urlsplit(self.url).path + "/dav",
+            dir_path,
+        )
+        async with self.__stream(
+            "PROPFIND",
+            url,
+            auth=False,
+            limiter=self.limiter_for(dir_path),
+            headers=headers,
+            content=AlistDAVStream.PROPFIND_BODY,
+        ) as resp:
+            if resp.status_code != 207:
+                raise RuntimeError(
+                    f"通过 WebDAV 获取目录 {dir_path} 的文件列表失败，状态码：{resp.status_code}"
+                )
+
+            async for chunk in resp.aiter_bytes():
+                for path in parser.feed(chunk):
+                    yield self.__dav_signed(path)
+
+        for path in parser.close():
+            yield self.__dav_signed(path)
+
+        logger.debug(
+            f"通过 WebDAV 获取目录 {dir_path} 的文件列表成功，共 {parser.count} 项"
+        )
+
+    def __dav_signed(self, path: AlistEntry) -> AlistEntry:
+        """
+        为 WebDAV 返回的文件补充签名
+        """
+
+        if not path.is_dir:
+            path.sign = self.sign(path.abs_path.replace("//", "/"))
+        return path
+
+    async def async_api_fs_search(
+        self,
+        parent: str,
+        keywords: str,
+        scope: int = 0,
+        page: int = 1,
+        per_page: int = 100,
+    ) -> tuple[list[AlistEntry], int]:
+        """
+        通过 Alist 搜索索引搜索文件/目录（需要在 Alist 中启用搜索索引）
+        搜索结果仅包含名称、大小、类型及所在目录，不包含修改时间和签名
+
+        :param parent: 搜索的目录路径，搜索结果包括所有子目录中的文件/目录
+        :param keywords: 搜索关键词
+        :param scope: 搜索范围，0 为全部，1 为仅目录，2 为仅文件
+        :param page: 页码（从 1 开始）
+        :param per_page: 每页数量
+        :return: (AlistEntry 对象列表, 搜索结果总数)
+        """
+
+        logger.debug(f"在目录 {parent} 中搜索 {keywords}，页码：{page}")
+
+        json = {
+            "parent": parent,
+            "keywords": keywords,
+            "scope": scope,
+            "page": page,
+            "per_page": per_page,
+            "password": "",
+        }
+
+        resp = await self.__post(self.url + "/api/fs/search", json=json)
+        if resp.status_code != 200:
+            raise RuntimeError(
+                f"在目录 {parent} 中搜索 {keywords} 请求发送失败，状态码：{resp.status_code}"
+            )
+
+        result = JSONUtils.loads(resp.content)
+
+        if result["code"] != 200:
+            raise RuntimeError(
+                f"在目录 {parent} 中搜索 {keywords} 失败，错误信息：{result['message']}"
+            )
+
+        # 搜索结果中的所在目录为服务器上的绝对路径，需要去除用户基础路径
+        base_path = self.base_path.rstrip("/")
+        paths: list[AlistEntry] = []
+        for item in result["data"]["content"] or []:
+            dir_path = item["parent"]
+            if base_path and (
+                dir_path == base_path or dir_path.startswith(base_path + "/")
+            ):
+                dir_path = dir_path[len(base_path) :]
+            paths.append(
+                AlistEntry.from_dict(
+                    self.url, self.base_path, dir_path.rstrip("/"), item
+                )
+            )
+        return paths, result["data"]["total"]
+
+    async def iter_fs_search(
+        self,
+        parent: str,
+        keywords: str,
+        scope: int = 0,
+        per_page: int = 100,
+    ) -> AsyncGenerator[AlistEntry, None]:
+        """
+        分页获取搜索结果的异步生成器
+        Alist 按权限过滤每页的搜索结果，返回数量可能少于每页数量，因此根据搜索结果总数判断是否还有下一页
+
+        :param parent: 搜索的目录路径
+        :param keywords: 搜索关键词
+        :param scope: 搜索范围，0 为全部，1 为仅目录，2 为仅文件
+        :param per_page: 每页数量
+        :return: AlistEntry 对象生成器
+        """
+
+        per_page = max(1, per_page)
+        page = 1
+        while True:
+            paths, total = await self.async_api_fs_search(
+                parent, keywords, scope, page, per_page
+            )
+            for path in paths:
+                yield path
+            if page * per_page >= total:
+                return
+            page += 1
+
     async def async_api_fs_get(self, path: str) -> AlistPath:
         """
         获取文件/目录详细信息
@@ -240,7 +661,9 @@ class AlistClient(metaclass=Multiton):
             "refresh": False,
         }
 
-        resp = await self.__post(self.url + "/api/fs/get", json=json)
+        resp = await self.__post(
+            self.url + "/api/fs/get", json=json, limiter=self.limiter_for(path)
+        )
         if resp.status_code != 200:
             raise RuntimeError(
                 f"获取路径 {path} 详细信息请求发送失败，状态码：{resp.status_code}"
@@ -360,35 +783,79 @@ class AlistClient(metaclass=Multiton):
         dir_path: str,
         wait_time: float | int,
         is_detail: bool = True,
-        filter: Callable[[AlistPath], bool] = lambda x: True,
-    ) -> AsyncGenerator[AlistPath, None]:
+        filter: Callable[[AlistEntry], bool] = lambda x: True,
+        max_workers: int = 1,
+        dir_filter: Callable[[AlistEntry], bool] = lambda x: True,
+        dir_done: Callable[[str], Awaitable[Iterable[AlistEntry]]] | None = None,
+        per_page: int = 0,
+        cache: AlistListingCache | None = None,
+        detail_workers: int = 1,
+        queue_size: int = 0,
+        stream: bool = False,
+        webdav: bool = False,
+        source: AlistLocalSource | None = None,
+        frontier: AlistFrontier | None = None,
+        refresh: Callable[[str], bool] | None = None,
+        priority: Callable[[str, str | None], Any] | None = None,
+        retries: int = 0,
+        retry_delay: float = 1,
+        on_error: Callable[[str, bool, Exception], None] | None = None,
+    ) -> AsyncGenerator[AlistEntry, None]:
         """
         异步路径列表生成器
-        返回目录及其子目录的所有文件和目录的 AlistPath 对象
+        返回目录及其子目录的所有文件和目录的 AlistEntry 对象
+        使用工作队列进行广度优先遍历，最多同时列出 max_workers 个目录
 
         :param dir_path: 目录路径
-        :param wait_time: 每轮遍历等待时间（单位秒）,
+        :param wait_time: 请求最小间隔（单位秒），遍历期间登记到服务器共享的限流器
         :param is_detail：是否获取详细信息（raw_url）
         :param filter: 匿名函数过滤器（默认不启用）
-        :return: AlistPath 对象生成器
-        """
-
-        for path in await self.async_api_fs_list(dir_path):
-            await sleep(wait_time)
-            if path.is_dir:
-                async for child_path in self.iter_path(
-                    dir_path=path.full_path,
-                    wait_time=wait_time,
-                    is_detail=is_detail,
-                    filter=filter,
-                ):
-                    yield child_path
-
-            if filter(path):
-                if is_detail:
-                    yield await self.async_api_fs_get(path.full_path)
-                else:
-                    yield path
+        :param max_workers: 同时列出目录的最大数量（默认为 1）
+        :param dir_filter: 目录过滤器，返回 False 的目录及其子树不会被列出（默认不启用）
+        :param dir_done: 目录遍历完成异步回调，返回需要额外输出的路径（默认不启用）
+        :param per_page: 列出目录时每页数量，为 0 时一次性获取全部（默认为 0）
+        :param cache: 目录列表缓存（默认不启用）
+        :param detail_workers: 同时获取详细信息的最大数量（默认为 1）
+        :param queue_size: 输出队列长度，消费者处理较慢时暂停遍历，为 0 时不限制（默认为 0）
+        :param stream: 是否流式解析目录列表响应（默认为 False）
+        :param webdav: 是否通过 WebDAV（PROPFIND）列出目录（默认为 False）
+        :param source: 本地挂载的 Alist 目录，设置后列出本地目录而不请求 Alist（默认不启用）
+        :param frontier: 遍历边界，用于保存进度及从中断处继续遍历（默认不启用）
+        :param refresh: 判断目录是否需要要求 Alist 刷新缓存，参数为目录路径（默认不启用）
+        :param priority: 目录优先级函数，参数为目录路径和修改时间，返回值越小越先列出（默认不启用）
+        :param retries: 失败的目录/文件的最大重试次数，设置 on_error 时有效（默认为 0）
+        :param retry_delay: 第一次重试前的等待时间，单位为秒，之后每次重试翻倍（默认为 1）
+        :param on_error: 错误回调，参数为路径、是否为目录和异常，设置后失败项不会中断遍历（默认不启用）
+        :return: AlistEntry 对象生成器
+        """
+
+        walker = AlistWalker(
+            client=self,
+            max_workers=max_workers,
+            is_detail=is_detail,
+            filter=filter,
+            dir_filter=dir_filter,
+            dir_done=dir_done,
+            per_page=per_page,
+            cache=cache,
+            detail_workers=detail_workers,
+            queue_size=queue_size,
+            stream=stream,
+            webdav=webdav,
+            source=source,
+            frontier=frontier,
+            refresh=refresh,
+            priority=priority,
+            retries=retries,
+            retry_delay=retry_delay,
+            on_error=on_error,
+        )
+        self.limiter.register(walker, min_interval=wait_time)
+        try:
+            async for path in walker.walk(dir_path):
+                yield path
+        finally:
+            self.limiter.unregister(walker)
 
     async def get_storage_by_mount_path(
         self, mount_path: str, create: bool = False, **kwargs
@@ -0,0 +1,215 @@
+from re import sub
+from typing import Any
+from datetime import datetime
+
+from app.utils import URLUtils
+from app.modules.alist.v3.path import AlistPath
+
+
+class AlistEntry:
+    """
+    Alist 文件/目录轻量对象
+    用于目录列表等批量场景，直接由接口返回的字典构造，不进行逐字段校验
+    属性与 AlistPath 一致，派生值（后缀、绝对路径、下载地址、时间戳）在首次访问时计算并缓存
+    """
+
+    __slots__ = (
+        "server_url",
+        "base_path",
+        "full_path",
+        "id",
+        "path",
+        "name",
+        "size",
+        "is_dir",
+        "modified",
+        "created",
+        "sign",
+        "thumb",
+        "type",
+        "hashinfo",
+        "hash_info",
+        "raw_url",
+        "readme",
+        "header",
+        "provider",
+        "related",
+        "_suffix",
+        "_abs_path",
+        "_download_url",
+        "_modified_timestamp",
+    )
+
+    def __init__(
+        self,
+        server_url: str,
+        base_path: str,
+        full_path: str,
+        name: str,
+        size: int = 0,
+        is_dir: bool = False,
+        modified: str = "",
+        created: str = "",
+        sign: str = "",
+        thumb: str = "",
+        type: int = 0,
+        hashinfo: str = "null",
+        hash_info: dict | None = None,
+        id: str | None = None,
+        path: str | None = None,
+        raw_url: str | None = None,
+        readme: str | None = None,
+        header: str | None = None,
+        provider: str | None = None,
+        related: Any = None,
+    ) -> None:
+        """
+        实例化 AlistEntry 对象
+
+        :param server_url: 服务器地址
+        :param base_path: 用户基础路径
+        :param full_path: 相对用户根文件/目录路径
+        其余参数与 AlistPath 字段一致
+        """
+
+        self.server_url = server_url
+        self.base_path = base_path
+        self.full_path = full_path
+        self.id = id
+        self.path = path
+        self.name = name
+        self.size = size
+        self.is_dir = is_dir
+        self.modified = modified
+        self.created = created
+        self.sign = sign
+        self.thumb = thumb
+        self.type = type
+        self.hashinfo = hashinfo
+        self.hash_info = hash_info
+        self.raw_url = raw_url
+        self.readme = readme
+        self.header = header
+        self.provider = provider
+        self.related = related
+
+        self._suffix: str | None = None
+        self._abs_path: str | None = None
+        self._download_url: str | None = None
+        self._modified_timestamp: float | None = None
+
+    @classmethod
+    def from_dict(
+        cls, server_url: str, base_path: str, dir_path: str, data: dict
+    ) -> "AlistEntry":
+        """
+        由 /api/fs/list 返回的子项字典构造 AlistEntry 对象
+
+        :param server_url: 服务器地址
+        :param base_path: 用户基础路径
+        :param dir_path: 父目录路径，可以以 "/" 结尾（如根目录 "/"）
+        :param data: 子项字典
+        :return: AlistEntry 对象
+        """
+
+        name = data["name"]
+        return cls(
+            server_url,
+            base_path,
+            dir_path.rstrip("/") + "/" + name,
+            name,
+            size=data.get("size") or 0,
+            is_dir=data.get("is_dir", False),
+            modified=data.get("modified") or "",
+            created=data.get("created") or "",
+            sign=data.get("sign") or "",
+            thumb=data.get("thumb") or "",
+            type=data.get("type") or 0,
+            hashinfo=data.get("hashinfo") or "null",
+            hash_info=data.get("hash_info"),
+            id=data.get("id"),
+            path=data.get("path"),
+        )
+
+    def update_detail(self, detail: AlistPath) -> "AlistEntry":
+        """
+        合并 /api/fs/get 返回的详细信息
+
+        :param detail: 包含详细信息的 AlistPath 对象
+        :return: AlistEntry 对象本身
+        """
+
+        self.raw_url = detail.raw_url
+        self.readme = detail.readme
+        self.header = detail.header
+        self.provider = detail.provider
+        self.related = detail.related
+        if detail.sign != self.sign:
+            self.sign = detail.sign
+            self._download_url = None
+        return self
+
+    def to_path(self) -> AlistPath:
+        """
+        转换为 AlistPath 对象
+        """
+
+        return AlistPath(
+            **{field: getattr(self, field) for field in AlistPath.model_fields}
+        )
+
+    @property
+    def abs_path(self) -> str:
+        """
+        文件/目录在 Alist 服务器上的绝对路径
+        """
+        if self._abs_path is None:
+            self._abs_path = self.base_path.rstrip("/") + self.full_path
+        return self._abs_path
+
+    @property
+    def download_url(self) -> str:
+        """
+        文件下载地址
+        """
+        if self._download_url is None:
+            url = self.server_url + "/d" + self.abs_path
+            if self.sign:
+                url += "?sign=" + self.sign
+            self._download_url = URLUtils.encode(url)
+        return self._download_url
+
+    @property
+    def proxy_download_url(self) -> str:
+        """
+        Alist代理下载地址
+        """
+        return sub("/d/", "/p/", self.download_url, 1)
+
+    @property
+    def suffix(self) -> str:
+        """
+        文件后缀
+        """
+        if self._suffix is None:
+            self._suffix = "" if self.is_dir else "." + self.name.split(".")[-1]
+        return self._suffix
+
+    @property
+    def modified_timestamp(self) -> float:
+        """
+        获得修改时间的时间戳
+        """
+        if self._modified_timestamp is None:
+            self._modified_timestamp = datetime.fromisoformat(self.modified).timestamp()
+        return self._modified_timestamp
+
+    @property
+    def created_timestamp(self) -> float:
+        """
+        获得创建时间的时间戳
+        """
+        return datetime.fromisoformat(self.created).timestamp()
+
+    def __repr__(self) -> str:
+        return f"AlistEntry(full_path={self.full_path!r}, is_dir={self.is_dir})"
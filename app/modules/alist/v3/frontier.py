@@ -0,0 +1,108 @@
+from typing import Iterable
+
+from app.modules.alist.v3.entry import AlistEntry
+
+
+class AlistFrontier:
+    """
+    遍历边界
+    记录尚未完成的目录：目录在放入目录队列时加入，列出完成且其输出的所有路径均被消费者确认处理后移除
+    保存边界后可从中断处继续遍历：未列出的目录重新完整遍历，已列出但仍有路径未处理的目录只重新输出其文件
+    """
+
+    def __init__(self, entries: Iterable[tuple[str, str | None, bool]] = ()) -> None:
+        """
+        实例化 AlistFrontier 对象
+
+        :param entries: 上次保存的边界 [(目录路径, 修改时间, 是否已列出)]，为空时从根目录开始遍历
+        """
+
+        # 目录路径 -> [修改时间, 子目录是否已放入队列, 本次运行是否已列出, 已输出但未确认处理的路径数]
+        self.__dirs: dict[str, list] = {
+            dir_path: [modified, listed, False, 0]
+            for dir_path, modified, listed in entries
+        }
+        self.resumed = bool(self.__dirs)  # 是否从上次保存的边界继续遍历
+
+    def __len__(self) -> int:
+        return len(self.__dirs)
+
+    def start(self, dir_path: str) -> list[tuple[str, str | None, bool]]:
+        """
+        获取遍历的起始目录
+
+        :param dir_path: 根目录路径，边界为空时使用
+        :return: [(目录路径, 修改时间, 是否需要列出子目录)]
+        """
+
+        if not self.__dirs:
+            self.add(dir_path, None)
+        return [
+            (path, modified, not listed)
+            for path, (modified, listed, _, _) in self.__dirs.items()
+        ]
+
+    def add(self, dir_path: str, modified: str | None) -> bool:
+        """
+        目录放入目录队列
+
+        :param dir_path: 目录路径
+        :param modified: 目录修改时间
+        :return: 是否为新加入的目录，已在边界中的目录不需要重复列出
+        """
+
+        if dir_path in self.__dirs:
+            return False
+        self.__dirs[dir_path] = [modified, False, False, 0]
+        return True
+
+    def emit(self, path: AlistEntry) -> None:
+        """
+        输出路径，所在目录的待处理路径数加一
+
+        :param path: AlistEntry 对象
+        """
+
+        state = self.__dirs.get(path.full_path[: -len(path.name) - 1] or "/")
+        if state is not None:
+            state[3] += 1
+
+    def done(self, path: AlistEntry) -> None:
+        """
+        消费者确认路径处理完成
+
+        :param path: AlistEntry 对象
+        """
+
+        dir_path = path.full_path[: -len(path.name) - 1] or "/"
+        state = self.__dirs.get(dir_path)
+        if state is None:
+            return
+        state[3] -= 1
+        if state[2] and state[3] <= 0:
+            del self.__dirs[dir_path]
+
+    def listed(self, dir_path: str) -> None:
+        """
+        目录列出完成（包括遍历完成回调）
+
+        :param dir_path: 目录路径
+        """
+
+        state = self.__dirs.get(dir_path)
+        if state is None:
+            return
+        state[1] = state[2] = True
+        if state[3] <= 0:
+            del self.__dirs[dir_path]
+
+    def snapshot(self) -> list[tuple[str, str | None, bool]]:
+        """
+        获取当前边界
+
+        :return: [(目录路径, 修改时间, 是否已列出)]
+        """
+        return [
+            (dir_path, modified, listed)
+            for dir_path, (modified, listed, _, _) in self.__dirs.items()
+        ]
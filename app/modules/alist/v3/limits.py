@@ -0,0 +1,116 @@
+from typing import Iterable
+
+from app.core import logger
+from app.utils import AdaptiveLimiter
+from app.modules.alist.v3.storage import AlistStorage
+
+
+class AlistStorageLimits:
+    """
+    按存储器划分的限流器
+    目录按最长挂载路径匹配所属存储器，每个存储器使用独立的自适应限流器，一个任务跨越多个存储器时各自以安全的最大速度列出
+    存储器限流器嵌套在服务器限流器中，所有存储器的总并发数仍不超过服务器的最大并发数
+    并发数及请求间隔按驱动器设置默认值，可按挂载路径或驱动器覆盖；同一服务器同一存储器的所有任务共享限流器
+    """
+
+    # 驱动器默认限制：驱动器 -> (最大并发数, 请求最小间隔（单位秒）)，未列出的驱动器只受服务器限流器限制
+    DRIVER_LIMITS: dict[str, tuple[int | None, float]] = {
+        "Local": (64, 0),
+        "UrlTree": (64, 0),
+        "Virtual": (64, 0),
+        "SMB": (16, 0),
+        "FTP": (8, 0),
+        "SFTP": (8, 0),
+        "WebDav": (16, 0),
+        "S3": (16, 0),
+        "GoogleDrive": (8, 0),
+        "Onedrive": (8, 0),
+        "OnedriveAPP": (8, 0),
+        "PikPak": (4, 0.2),
+        "PikPakShare": (4, 0.2),
+        "Thunder": (4, 0.2),
+        "ThunderX": (4, 0.2),
+        "Quark": (3, 0.5),
+        "UC": (3, 0.5),
+        "123Pan": (3, 0.5),
+        "123PanShare": (3, 0.5),
+        "Aliyundrive": (2, 0.5),
+        "AliyundriveOpen": (2, 0.5),
+        "AliyundriveShare": (2, 0.5),
+        "BaiduNetdisk": (2, 0.5),
+        "BaiduShare": (2, 0.5),
+        "BaiduPhoto": (2, 0.5),
+        "115 Cloud": (2, 1),
+        "115 Share": (2, 1),
+        "115 Open": (2, 1),
+    }
+
+    def __init__(
+        self,
+        server: AdaptiveLimiter,
+        base_path: str,
+        storages: Iterable[AlistStorage],
+        overrides: dict[str, dict] | None = None,
+    ) -> None:
+        """
+        实例化 AlistStorageLimits 对象
+
+        :param server: 服务器共享的限流器，不属于任何存储器的路径使用该限流器
+        :param base_path: 用户基础路径，存储器挂载路径为服务器上的绝对路径
+        :param storages: 存储器列表
+        :param overrides: 覆盖默认限制，键为挂载路径（以 / 开头）或驱动器，
+            值为 {"max_concurrency": 最大并发数, "wait_time": 请求最小间隔}，挂载路径优先
+        """
+
+        self.server = server
+        self.base_path = base_path.rstrip("/")
+        overrides = {
+            (key.rstrip("/") or "/") if key.startswith("/") else key: value
+            for key, value in (overrides or {}).items()
+        }
+
+        # (挂载路径, 限流器)，按挂载路径长度降序排列，第一个匹配的即为最长前缀
+        self.__mounts: list[tuple[str, AdaptiveLimiter]] = []
+        for storage in sorted(
+            storages, key=lambda storage: len(storage.mount_path), reverse=True
+        ):
+            if storage.disabled:
+                continue
+
+            mount_path = storage.mount_path.rstrip("/")
+            max_concurrency, min_interval = self.DRIVER_LIMITS.get(
+                storage.driver, (None, 0)
+            )
+            override = overrides.get(mount_path or "/", overrides.get(storage.driver))
+            if isinstance(override, dict):
+                max_concurrency = override.get("max_concurrency") or max_concurrency
+                min_interval = override.get("wait_time") or min_interval
+            elif override is not None:
+                logger.warning(f"存储器 {mount_path or '/'} 的限流设置格式错误，已忽略")
+
+            limiter = AdaptiveLimiter.get(
+                f"{server.name}{mount_path or '/'}", max_concurrency, server
+            )
+            # 服务器限流器的请求间隔及任务登记的限制由上级限流器保证
+            limiter.configure(
+                max_concurrency=max_concurrency, min_interval=min_interval
+            )
+            logger.debug(f"存储器 {storage.driver} 使用限流器 {limiter}")
+            self.__mounts.append((mount_path, limiter))
+
+    def __len__(self) -> int:
+        return len(self.__mounts)
+
+    def get(self, path: str) -> AdaptiveLimiter:
+        """
+        获取路径所属存储器的限流器
+
+        :param path: 相对用户根的路径
+        :return: AdaptiveLimiter 对象，路径不属于任何存储器时返回服务器共享的限流器
+        """
+
+        abs_path = self.base_path + "/" + path.strip("/")
+        for mount_path, limiter in self.__mounts:
+            if abs_path.startswith(mount_path + "/") or abs_path == mount_path:
+                return limiter
+        return self.server
@@ -0,0 +1,71 @@
+from asyncio import to_thread
+from datetime import datetime, timezone
+from os import sep
+from typing import TYPE_CHECKING, AsyncGenerator
+
+from app.utils import FileUtils
+from app.modules.alist.v3.entry import AlistEntry
+
+if TYPE_CHECKING:
+    from app.modules.alist.v3.client import AlistClient
+
+
+class AlistLocalSource:
+    """
+    本地挂载的 Alist 目录（rclone、CloudDrive 等挂载的同一网盘）
+    通过 os.scandir 列出本地目录，结果转换为对应 Alist 路径的 AlistEntry，列出目录不发送任何请求
+    文件签名由 Alist 永久令牌计算，下载地址等派生值与 Alist 返回的结果一致
+    """
+
+    def __init__(self, client: "AlistClient", root: str, local_root: str) -> None:
+        """
+        实例化 AlistLocalSource 对象
+
+        :param client: AlistClient 对象，提供服务器地址、用户基础路径及签名
+        :param root: Alist 目录路径
+        :param local_root: Alist 目录在本地的挂载路径
+        """
+
+        self.client = client
+        self.root = root.rstrip("/")
+        self.local_root = local_root.rstrip(sep) or sep
+
+    def local_path(self, full_path: str) -> str:
+        """
+        获取 Alist 路径对应的本地路径
+
+        :param full_path: 相对用户根的 Alist 路径，必须位于 root 之下
+        :return: 本地路径
+        """
+
+        relative_path = full_path[len(self.root) :].lstrip("/")
+        if not relative_path:
+            return self.local_root
+        return self.local_root.rstrip(sep) + sep + relative_path.replace("/", sep)
+
+    async def iter_dir(self, dir_path: str) -> AsyncGenerator[AlistEntry, None]:
+        """
+        在线程中列出本地目录，多个目录可同时列出
+
+        :param dir_path: Alist 目录路径
+        :return: AlistEntry 对象生成器
+        """
+
+        items = await to_thread(FileUtils.scan_dir, self.local_path(dir_path))
+        for name, is_dir, size, mtime in items:
+            full_path = dir_path.rstrip("/") + "/" + name
+            modified = datetime.fromtimestamp(mtime, timezone.utc).isoformat()
+            path = AlistEntry(
+                self.client.url,
+                self.client.base_path,
+                full_path,
+                name,
+                size=size,
+                is_dir=is_dir,
+                modified=modified,
+                created=modified,
+                type=1 if is_dir else 0,
+            )
+            if not is_dir:
+                path.sign = self.client.sign(path.abs_path.replace("//", "/"))
+            yield path
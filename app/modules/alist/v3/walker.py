@@ -0,0 +1,398 @@
+from asyncio import PriorityQueue, Queue, Task, create_task, gather, sleep
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Awaitable, Callable, Iterable
+
+from app.core import logger
+from app.modules.alist.v3.entry import AlistEntry
+
+if TYPE_CHECKING:
+    from app.modules.alist.v3.cache import AlistListingCache
+    from app.modules.alist.v3.client import AlistClient
+    from app.modules.alist.v3.frontier import AlistFrontier
+    from app.modules.alist.v3.local import AlistLocalSource
+
+
+class LatencyStats:
+    """
+    请求耗时统计
+    """
+
+    # 用于计算分位数的最大样本数量
+    MAX_SAMPLES: int = 10000
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.__samples: list[float] = []
+
+    def add(self, latency: float) -> None:
+        """
+        记录一次请求耗时
+
+        :param latency: 请求耗时（单位秒）
+        """
+
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        if len(self.__samples) < self.MAX_SAMPLES:
+            self.__samples.append(latency)
+        else:  # 样本已满时按顺序覆盖，保留最近的样本
+            self.__samples[self.count % self.MAX_SAMPLES] = latency
+
+    def percentile(self, p: float) -> float:
+        """
+        计算耗时分位数
+
+        :param p: 分位数（0 ~ 100）
+        :return: 耗时（单位秒）
+        """
+
+        if not self.__samples:
+            return 0.0
+        samples = sorted(self.__samples)
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def __str__(self) -> str:
+        if self.count == 0:
+            return "无请求"
+        return (
+            f"共 {self.count} 次，平均 {self.total / self.count * 1000:.0f} ms，"
+            f"P50 {self.percentile(50) * 1000:.0f} ms，"
+            f"P95 {self.percentile(95) * 1000:.0f} ms，"
+            f"最大 {self.max * 1000:.0f} ms"
+        )
+
+
+class AlistWalker:
+    """
+    Alist 目录并发遍历器
+    使用工作队列进行广度优先遍历，多个目录同时请求列表，每个目录列出后立即输出结果
+    设置优先级函数时目录队列为优先队列，优先级高的目录先列出
+    设置错误回调时单个目录/文件的失败不会中断遍历，失败项在其余路径遍历完成后按指数退避重试
+    需要详细信息时，获取详细信息（fs/get）作为独立阶段与目录遍历并行执行，完成后立即输出
+    """
+
+    def __init__(
+        self,
+        client: "AlistClient",
+        max_workers: int = 1,
+        is_detail: bool = True,
+        filter: Callable[[AlistEntry], bool] = lambda x: True,
+        dir_filter: Callable[[AlistEntry], bool] = lambda x: True,
+        dir_done: Callable[[str], Awaitable[Iterable[AlistEntry]]] | None = None,
+        per_page: int = 0,
+        cache: "AlistListingCache | None" = None,
+        detail_workers: int = 1,
+        queue_size: int = 0,
+        stream: bool = False,
+        webdav: bool = False,
+        source: "AlistLocalSource | None" = None,
+        frontier: "AlistFrontier | None" = None,
+        refresh: Callable[[str], bool] | None = None,
+        priority: Callable[[str, str | None], Any] | None = None,
+        retries: int = 0,
+        retry_delay: float = 1,
+        on_error: Callable[[str, bool, Exception], None] | None = None,
+    ) -> None:
+        """
+        实例化 AlistWalker 对象
+
+        :param client: AlistClient 对象
+        :param max_workers: 同时列出目录的最大数量
+        :param is_detail: 是否获取详细信息（raw_url）
+        :param filter: 匿名函数过滤器（默认不启用）
+        :param dir_filter: 目录过滤器，返回 False 的目录及其子树不会被列出（默认不启用）
+        :param dir_done: 目录遍历完成异步回调，参数为目录路径，返回的路径与通过过滤器的路径一样输出（默认不启用）
+        :param per_page: 列出目录时每页数量，为 0 时一次性获取全部
+        :param cache: 目录列表缓存，目录修改时间未变化时复用缓存的子项，修改时间来自缓存列表的子目录总是重新列出（默认不启用）
+        :param detail_workers: 同时获取详细信息的最大数量
+        :param queue_size: 输出队列长度，消费者处理较慢时暂停遍历，为 0 时不限制
+        :param stream: 是否流式解析目录列表响应
+        :param webdav: 是否通过 WebDAV（PROPFIND）列出目录，不支持分页和刷新缓存
+        :param source: 本地挂载的 Alist 目录，设置后列出本地目录而不请求 Alist，不使用目录列表缓存（默认不启用）
+        :param frontier: 遍历边界，记录尚未完成的目录，不为空时从边界继续遍历（默认不启用）
+        :param refresh: 判断目录是否需要要求 Alist 刷新缓存，参数为目录路径，刷新的目录不使用目录列表缓存（默认不启用）
+        :param priority: 目录优先级函数，参数为目录路径和修改时间，返回值越小越先列出（默认按发现顺序列出）
+        :param retries: 失败的目录/文件的最大重试次数（设置 on_error 时有效）
+        :param retry_delay: 第一次重试前的等待时间，单位为秒，之后每次重试翻倍
+        :param on_error: 错误回调，参数为路径、是否为目录和最后一次的异常，设置后失败项不会中断遍历（默认不启用，失败时抛出异常）
+        """
+
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.is_detail = is_detail
+        self.filter = filter
+        self.dir_filter = dir_filter
+        self.dir_done = dir_done
+        self.per_page = per_page
+        self.cache = cache
+        self.detail_workers = max(1, detail_workers)
+        self.detail_stats = LatencyStats()  # fs/get 耗时统计
+        self.queue_size = max(0, queue_size)
+        self.stream = stream
+        self.webdav = webdav
+        self.source = source
+        self.frontier = frontier
+        self.refresh = refresh
+        self.priority = priority
+        self.retries = max(0, retries)
+        self.retry_delay = retry_delay
+        self.on_error = on_error
+
+    async def walk(self, dir_path: str) -> AsyncGenerator[AlistEntry, None]:
+        """
+        遍历目录及其子目录，返回所有通过过滤器的文件和目录的 AlistEntry 对象
+
+        :param dir_path: 目录路径
+        :return: AlistEntry 对象生成器
+        """
+
+        # 目录队列中保存 (目录路径, 父目录列表中该目录的修改时间, 是否需要列出子目录)
+        # 使用优先队列时在前面加上 (优先级, 序号)，序号保证同优先级的目录按发现顺序列出
+        self.__dir_queue: Queue[tuple] = (
+            Queue() if self.priority is None else PriorityQueue()
+        )
+        self.__dir_seq = 0
+        # 失败的目录 -> (目录队列项, 最后一次的异常)，失败的文件 -> (AlistEntry, 最后一次的异常)
+        self.__failed_dirs: dict[str, tuple[tuple, Exception]] = {}
+        self.__failed_paths: dict[str, tuple[AlistEntry, Exception]] = {}
+        # 正在列出的目录 -> 已处理（放入目录队列、过滤及输出）的子项，重试时跳过
+        self.__seen_children: dict[str, set[str]] = {}
+        # 使用缓存列表的目录，及修改时间来自缓存列表（可能已过时）、不能用于校验缓存的目录
+        self.__cached_dirs: set[str] = set()
+        self.__untrusted_dirs: set[str] = set()
+        self.__detail_queue: Queue[AlistEntry] = Queue(maxsize=self.detail_workers * 2)
+        self.__out_queue: Queue[AlistEntry | Exception | None] = Queue(
+            maxsize=self.queue_size
+        )
+        if self.frontier is not None:
+            for item in self.frontier.start(dir_path):
+                # 断点中的修改时间可能来自上次运行的缓存列表
+                if self.frontier.resumed:
+                    self.__untrusted_dirs.add(item[0])
+                self.__put_dir(*item)
+        else:
+            self.__put_dir(dir_path, None, True)
+
+        async def list_worker() -> None:
+            while True:
+                current_dir, modified, subdirs = (await self.__dir_queue.get())[-3:]
+                try:
+                    await self.__list_dir(current_dir, modified, subdirs)
+                except Exception as e:
+                    if self.on_error is None:
+                        await self.__out_queue.put(e)
+                    else:
+                        logger.warning(f"列出目录 {current_dir} 失败：{e}")
+                        self.__failed_dirs[current_dir] = (
+                            (current_dir, modified, subdirs),
+                            e,
+                        )
+                finally:
+                    self.__dir_queue.task_done()
+
+        async def detail_worker() -> None:
+            while True:
+                path = await self.__detail_queue.get()
+                try:
+                    await self.__out_queue.put(await self.__get_detail(path))
+                except Exception as e:
+                    if self.on_error is None:
+                        await self.__out_queue.put(e)
+                    else:
+                        logger.warning(f"获取 {path.full_path} 详细信息失败：{e}")
+                        self.__failed_paths[path.full_path] = (path, e)
+                finally:
+                    self.__detail_queue.task_done()
+
+        async def monitor() -> None:
+            attempt = 0
+            while True:
+                await self.__dir_queue.join()
+                await self.__detail_queue.join()
+                if attempt >= self.retries or not (
+                    self.__failed_dirs or self.__failed_paths
+                ):
+                    break
+
+                delay = self.retry_delay * 2**attempt
+                attempt += 1
+                logger.info(
+                    f"{len(self.__failed_dirs)} 个目录、{len(self.__failed_paths)} 个文件获取失败，"
+                    f"{delay} 秒后进行第 {attempt} 次重试"
+                )
+                await sleep(delay)
+                failed_dirs, self.__failed_dirs = self.__failed_dirs, {}
+                failed_paths, self.__failed_paths = self.__failed_paths, {}
+                for item, _ in failed_dirs.values():
+                    self.__put_dir(*item)
+                for path, _ in failed_paths.values():
+                    await self.__detail_queue.put(path)
+
+            if self.on_error is not None:
+                for (dir_path, _, _), e in self.__failed_dirs.values():
+                    self.on_error(dir_path, True, e)
+                for path, e in self.__failed_paths.values():
+                    self.on_error(path.full_path, False, e)
+            await self.__out_queue.put(None)
+
+        tasks: list[Task] = [
+            create_task(list_worker()) for _ in range(self.max_workers)
+        ]
+        if self.is_detail:
+            tasks.extend(
+                create_task(detail_worker()) for _ in range(self.detail_workers)
+            )
+        tasks.append(create_task(monitor()))
+
+        try:
+            while True:
+                item = await self.__out_queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
+            if self.is_detail:
+                logger.info(f"获取详细信息耗时统计：{self.detail_stats}")
+
+    async def __iter_dir(
+        self, dir_path: str, modified: str | None
+    ) -> AsyncGenerator[AlistEntry, None]:
+        """
+        获取单个目录的子项，优先使用目录列表缓存
+
+        :param dir_path: 目录路径
+        :param modified: 父目录列表中该目录的修改时间（根目录为 None）
+        :return: AlistEntry 对象生成器
+        """
+
+        if self.source is not None:
+            async for path in self.source.iter_dir(dir_path):
+                yield path
+            return
+
+        refresh = self.refresh is not None and self.refresh(dir_path)
+        if (
+            self.cache is not None
+            and not refresh
+            and dir_path not in self.__untrusted_dirs
+        ):
+            cached = await self.cache.get(dir_path, modified)
+            if cached is not None:
+                self.__cached_dirs.add(dir_path)
+                for path in cached:
+                    yield path
+                return
+
+        children: list[AlistEntry] | None = [] if self.cache is not None else None
+
+        if self.webdav:
+            paths = self.client.async_api_dav_iter(dir_path)
+        else:
+            paths = self.client.iter_fs_list(
+                dir_path, per_page=self.per_page, stream=self.stream, refresh=refresh
+            )
+        async for path in paths:
+            if children is not None:
+                children.append(path)
+            yield path
+
+        if self.cache is not None and children is not None:
+            await self.cache.set(dir_path, modified, children)
+
+    async def __list_dir(
+        self, dir_path: str, modified: str | None, subdirs: bool = True
+    ) -> None:
+        """
+        列出单个目录，将子目录放入目录队列
+        通过过滤器的路径需要详细信息时放入详细信息队列，否则放入输出队列
+
+        :param dir_path: 目录路径
+        :param modified: 父目录列表中该目录的修改时间（根目录为 None）
+        :param subdirs: 是否将子目录放入目录队列，从边界继续遍历已列出的目录时为 False
+        """
+
+        # 重试时跳过上次失败前已处理的子项，不重复放入目录队列及输出
+        seen = self.__seen_children.setdefault(dir_path, set())
+        async for path in self.__iter_dir(dir_path, modified):
+            if path.full_path in seen:
+                continue
+            if path.is_dir and self.dir_filter(path) and subdirs:
+                if self.frontier is None or self.frontier.add(
+                    path.full_path, path.modified
+                ):
+                    # 缓存列表中子目录的修改时间是缓存时的值，子目录的内容变化后不一定更新父目录的修改时间
+                    if dir_path in self.__cached_dirs:
+                        self.__untrusted_dirs.add(path.full_path)
+                    self.__put_dir(path.full_path, path.modified, True)
+
+            if self.filter(path):
+                await self.__emit(path)
+            seen.add(path.full_path)
+        logger.debug(f"目录 {dir_path} 遍历完成")
+
+        if self.dir_done is not None:
+            for path in await self.dir_done(dir_path):
+                await self.__emit(path)
+        if self.frontier is not None:
+            self.frontier.listed(dir_path)
+        del self.__seen_children[dir_path]
+        self.__cached_dirs.discard(dir_path)
+        self.__untrusted_dirs.discard(dir_path)
+
+    def __put_dir(self, dir_path: str, modified: str | None, subdirs: bool) -> None:
+        """
+        将目录放入目录队列
+
+        :param dir_path: 目录路径
+        :param modified: 目录修改时间
+        :param subdirs: 是否需要列出子目录
+        """
+
+        if self.priority is None:
+            self.__dir_queue.put_nowait((dir_path, modified, subdirs))
+            return
+        self.__dir_seq += 1
+        self.__dir_queue.put_nowait(
+            (
+                self.priority(dir_path, modified),
+                self.__dir_seq,
+                dir_path,
+                modified,
+                subdirs,
+            )
+        )
+
+    async def __emit(self, path: AlistEntry) -> None:
+        """
+        输出路径，需要详细信息时放入详细信息队列，否则放入输出队列
+
+        :param path: AlistEntry 对象
+        """
+
+        if self.frontier is not None:
+            self.frontier.emit(path)
+        if self.is_detail:
+            await self.__detail_queue.put(path)
+        else:
+            await self.__out_queue.put(path)
+
+    async def __get_detail(self, path: AlistEntry) -> AlistEntry:
+        """
+        获取文件/目录详细信息并记录耗时
+
+        :param path: AlistEntry 对象
+        :return: 包含详细信息的 AlistEntry 对象
+        """
+
+        start = perf_counter()
+        detail = await self.client.async_api_fs_get(path.full_path)
+        self.detail_stats.add(perf_counter() - start)
+        return path.update_detail(detail)
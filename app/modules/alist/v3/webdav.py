@@ -0,0 +1,136 @@
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote, urlsplit
+from xml.etree.ElementTree import Element, XMLPullParser
+
+from app.modules.alist.v3.entry import AlistEntry
+
+
+class AlistDAVStream:
+    """
+    WebDAV PROPFIND 多状态响应（multistatus）增量解析器
+    逐块输入响应体，每解析完一个 response 元素立即转换为 AlistEntry 并从文档树中丢弃
+    内存占用取决于单个元素大小而非目录大小，目录本身对应的 response 会被跳过
+    """
+
+    # PROPFIND 请求体，只请求生成 AlistEntry 所需的属性
+    PROPFIND_BODY: bytes = (
+        b'<?xml version="1.0" encoding="utf-8"?>'
+        b'<D:propfind xmlns:D="DAV:"><D:prop>'
+        b"<D:resourcetype/><D:getcontentlength/><D:getlastmodified/>"
+        b"</D:prop></D:propfind>"
+    )
+
+    __RESPONSE = "{DAV:}response"
+
+    def __init__(
+        self, server_url: str, base_path: str, dav_path: str, dir_path: str
+    ) -> None:
+        """
+        实例化 AlistDAVStream 对象
+
+        :param server_url: 服务器地址
+        :param base_path: 用户基础路径
+        :param dav_path: WebDAV 根路径（如 /dav），href 去除该前缀后为相对用户根的路径
+        :param dir_path: 被列出的目录路径
+        """
+
+        self.server_url = server_url
+        self.base_path = base_path
+        self.dav_path = dav_path.rstrip("/")
+        self.dir_path = dir_path
+        self.__parser = XMLPullParser(events=("start", "end"))
+        self.__root: Element | None = None
+        self.count = 0  # 已解析的子项数量
+
+    def feed(self, chunk: bytes) -> list[AlistEntry]:
+        """
+        输入响应体的一块数据
+
+        :param chunk: 字节数据
+        :return: 本次解析完成的子项列表
+        """
+
+        self.__parser.feed(chunk)
+        return self.__read()
+
+    def close(self) -> list[AlistEntry]:
+        """
+        结束输入，解析剩余数据
+
+        :return: 剩余的子项列表
+        """
+
+        self.__parser.close()
+        return self.__read()
+
+    def __read(self) -> list[AlistEntry]:
+        """
+        读取解析完成的 response 元素
+        """
+
+        paths: list[AlistEntry] = []
+        for event, element in self.__parser.read_events():
+            if event == "start":
+                if self.__root is None:
+                    self.__root = element
+                continue
+            if element.tag != self.__RESPONSE:
+                continue
+            path = self.__to_entry(element)
+            if path is not None:
+                paths.append(path)
+
+        # 已读取的 response 元素不再需要，正在解析的元素仍由解析器持有
+        if self.__root is not None:
+            self.__root.clear()
+        self.count += len(paths)
+        return paths
+
+    def __to_entry(self, response: Element) -> AlistEntry | None:
+        """
+        将 response 元素转换为 AlistEntry 对象
+
+        :param response: response 元素
+        :return: AlistEntry 对象，目录本身或没有可用属性时返回 None
+        """
+
+        href = response.findtext("{DAV:}href")
+        if not href:
+            return None
+        path = unquote(urlsplit(href).path).rstrip("/")
+        if not path.startswith(self.dav_path):
+            return None
+        path = path[len(self.dav_path) :]
+        if path == self.dir_path.rstrip("/"):
+            return None
+
+        for propstat in response.iterfind("{DAV:}propstat"):
+            status = propstat.findtext("{DAV:}status") or ""
+            prop = propstat.find("{DAV:}prop")
+            if " 200 " not in status or prop is None:
+                continue
+
+            resourcetype = prop.find("{DAV:}resourcetype")
+            is_dir = (
+                resourcetype is not None
+                and resourcetype.find("{DAV:}collection") is not None
+            )
+            modified = prop.findtext("{DAV:}getlastmodified")
+            try:
+                modified = parsedate_to_datetime(modified).isoformat()
+            except (TypeError, ValueError):
+                modified = ""
+            return AlistEntry.from_dict(
+                self.server_url,
+                self.base_path,
+                self.dir_path,
+                {
+                    "name": path[path.rfind("/") + 1 :],
+                    "size": int(prop.findtext("{DAV:}getcontentlength") or 0),
+                    "is_dir": is_dir,
+                    "modified": modified,
+                    "created": modified,
+                    "type": 1 if is_dir else 0,
+                },
+            )
+        return None
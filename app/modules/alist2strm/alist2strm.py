@@ -1,18 +1,36 @@
-from asyncio import to_thread, Semaphore, TaskGroup
-from os import PathLike
+from asyncio import sleep, timeout, to_thread, Queue, TaskGroup
+from datetime import datetime
+from hashlib import md5
+from os import PathLike, sep
+from os.path import basename
 from pathlib import Path
 from re import compile as re_compile
-import traceback
+from shutil import copy2
+from typing import Callable, Iterable
 
-from aiofile import async_open
-
-from app.core import logger
-from app.utils import RequestUtils
+from app.core import settings, logger
+from app.utils import RequestUtils, PathHashSet, FileUtils
 from app.extensions import VIDEO_EXTS, SUBTITLE_EXTS, IMAGE_EXTS, NFO_EXTS
-from app.modules.alist import AlistClient, AlistPath
-from app.modules.alist2strm.mode import Alist2StrmMode
+from app.modules.alist import (
+    AlistClient,
+    AlistEntry,
+    AlistFrontier,
+    AlistListingCache,
+    AlistLocalSource,
+)
+from app.modules.alist2strm.mode import Alist2StrmMode, Alist2StrmListingMode
+from app.modules.alist2strm.checkpoint import Alist2StrmCheckpoint
+from app.modules.alist2strm.hashindex import LocalHashIndex
+from app.modules.alist2strm.manifest import Alist2StrmManifest, ManifestChange
+from app.modules.alist2strm.index import LocalIndex
+from app.modules.alist2strm.rules import Alist2StrmRules
+from app.modules.alist2strm.tiers import Alist2StrmTiers
+from app.modules.alist2strm.writer import StrmWriter
 
 class Alist2Strm:
+    # BDMV 中存放视频流的目录
+    BDMV_STREAM_DIR: str = "/BDMV/STREAM"
+
     def __init__(
         self,
         url: str = "http://localhost:5244",
@@ -30,9 +48,41 @@ class Alist2Strm:
         other_ext: str = "",
         max_workers: int = 50,
         max_downloaders: int = 5,
+        max_detail_workers: int = 10,
+        max_writers: int = 20,
+        queue_size: int = 1000,
+        local_workers: int = 8,
         wait_time: float | int = 0,
+        max_concurrency: int = 32,
+        storage_limits: bool = False,
+        storage_limit_overrides: dict[str, dict] | None = None,
+        per_page: int = 1000,
+        stream_listing: bool = False,
+        listing_mode: str = "List",
+        local_source_dir: str = "",
         sync_server: bool = False,
         sync_ignore: str | None = None,
+        incremental_sync: bool = False,
+        listing_cache: bool = False,
+        listing_cache_ttl: int = 86400,
+        force_refresh: bool = False,
+        manifest: bool = False,
+        hash_check: bool = False,
+        checkpoint: bool = False,
+        checkpoint_interval: int = 60,
+        time_budget: int = 0,
+        max_retries: int = 3,
+        retry_delay: float = 5,
+        dir_tiering: bool = False,
+        hot_days: float = 7,
+        cold_interval: int = 86400,
+        recent_first: bool = False,
+        priority_dirs: list[str] | str | None = None,
+        exclude_dirs: list[str] | str | None = None,
+        include_files: list[str] | str | None = None,
+        exclude_files: list[str] | str | None = None,
+        min_size: float = 0,
+        max_size: float = 0,
         **_,
     ) -> None:
         """
@@ -51,10 +101,42 @@ class Alist2Strm:
         :param overwrite: 本地路径存在同名文件时是否重新生成/下载该文件，默认为 False
         :param sync_server: 是否同步服务器，启用后若服务器中删除了文件，也会将本地文件删除，默认为 True
         :param other_ext: 自定义下载后缀，使用西文半角逗号进行分割，默认为空
-        :param max_workers: 最大并发数
+        :param max_workers: 最大并发数（同时列出的目录数）
         :param max_downloaders: 最大同时下载
-        :param wait_time: 遍历请求间隔时间，单位为秒，默认为 0
+        :param max_detail_workers: RawURL 模式下同时获取文件详细信息（fs/get）的最大数量
+        :param max_writers: 同时写入 .strm 文件的线程数，每个线程按批写入
+        :param queue_size: 各处理阶段之间的队列长度，队列满时暂停遍历，内存占用取决于该值而非媒体库大小
+        :param local_workers: 本地文件操作（扫描输出目录、删除文件）的线程数，默认为 8
+        :param wait_time: 遍历请求间隔时间，单位为秒，运行期间登记到服务器共享的限流器，同时运行的任务取最大值，默认为 0
+        :param max_concurrency: 对 Alist 服务器的最大并发请求数，同一服务器的所有任务共享自适应限流器，同时运行的任务取最小值，默认为 32
+        :param storage_limits: 是否按存储器划分限流器，目录按挂载路径匹配所属存储器，每个存储器按驱动器使用独立的并发数及请求间隔，总并发数仍不超过 max_concurrency（需要管理员权限，否则使用服务器共享的限流器），默认为 False
+        :param storage_limit_overrides: 覆盖驱动器默认限制，键为挂载路径（以 / 开头）或驱动器名称，值为 {"max_concurrency": 最大并发数, "wait_time": 请求间隔}，默认为空
+        :param per_page: 分页列出目录时每页数量，为 0 时一次性获取全部，默认为 1000
+        :param stream_listing: 是否流式解析目录列表响应，边接收边解析，降低超大目录的内存峰值，默认为 False
+        :param listing_mode: 枚举远程文件的方式(List/Search/WebDAV)，Search 模式通过 Alist 搜索索引按后缀获取文件，仅列出本地缺少文件的目录，需要在 Alist 中启用搜索索引；WebDAV 模式通过 /dav 的 PROPFIND 请求列出目录，默认为 List
+        :param local_source_dir: source_dir 在本地的挂载路径（rclone、CloudDrive 等），设置后通过 os.scandir 列出本地目录并从本地复制下载文件，不再请求 Alist（不支持 RawURL 模式），默认为空
         :param sync_ignore: 同步时忽略的文件正则表达式
+        :param incremental_sync: 是否逐目录同步删除，每个目录遍历完成后立即删除本地多余的文件和子目录，无需在遍历结束后统一清理，平铺模式下不生效，默认为 False
+        :param listing_cache: 是否启用目录列表缓存，目录修改时间未变化时跳过请求，默认为 False
+        :param listing_cache_ttl: 目录列表缓存有效期，单位为秒，超时后重新请求校验，默认为 86400
+        :param force_refresh: 是否忽略目录列表缓存强制重新获取，默认为 False
+        :param manifest: 是否启用同步清单，根据上次同步记录计算变更，仅处理新增、变化和删除的文件，默认为 False
+        :param hash_check: 是否比较文件哈希，字幕、图片、.nfo 等下载文件的本地哈希值与 Alist 返回的哈希信息一致时跳过下载，默认为 False
+        :param checkpoint: 是否定期保存遍历断点，运行中断后下次运行从断点继续遍历，默认为 False
+        :param checkpoint_interval: 保存遍历断点的间隔时间，单位为秒，默认为 60
+        :param time_budget: 单次运行的时间预算，单位为秒，超出后停止遍历并保存断点，下次运行时继续，为 0 时不限制（设置后自动启用断点），默认为 0
+        :param max_retries: 列出目录、获取详细信息或下载文件失败时的最大重试次数，失败项在其余文件处理完成后重试，最终失败的目录/文件记录到遍历断点，下次运行时仅重试这些目录，默认为 3
+        :param retry_delay: 第一次重试前的等待时间，单位为秒，之后每次重试翻倍，默认为 5
+        :param dir_tiering: 是否启用目录冷热分层，热目录每次列出并刷新 Alist 缓存，冷目录按间隔列出且不刷新，默认为 False
+        :param hot_days: 内容在该天数内有变化的目录为热目录，默认为 7
+        :param cold_interval: 冷目录的最小遍历间隔，单位为秒，默认为 86400
+        :param recent_first: 是否优先遍历最近修改的目录，新增的媒体在运行开始后尽快生成，默认为 False
+        :param priority_dirs: 优先遍历的目录规则（格式同 exclude_dirs），越靠前的规则优先级越高，同一优先级内按 recent_first 排序
+        :param exclude_dirs: 排除的目录规则（glob 通配符或以 re: 开头的正则表达式），匹配的目录不会被列出
+        :param include_files: 包含的文件规则，设置后仅处理匹配的文件
+        :param exclude_files: 排除的文件规则
+        :param min_size: 视频文件最小大小，单位为 MB，为 0 时不限制
+        :param max_size: 视频文件最大大小，单位为 MB，为 0 时不限制
         """
 
         self.client = AlistClient(url, username, password, token)
@@ -62,6 +144,10 @@ class Alist2Strm:
 
         self.source_dir = source_dir
         self.target_dir = Path(target_dir)
+        self.local_workers = max(1, local_workers)
+        self.local_index = LocalIndex(
+            self.target_dir, recursive=not flatten_mode, workers=self.local_workers
+        )
 
         self.flatten_mode = flatten_mode
         if flatten_mode:
@@ -79,41 +165,171 @@ class Alist2Strm:
 
         self.download_exts = download_exts
         self.process_file_exts = VIDEO_EXTS | download_exts
+        self.rules = Alist2StrmRules(
+            exts=self.process_file_exts,
+            exclude_dirs=exclude_dirs,
+            include_files=include_files,
+            exclude_files=exclude_files,
+            min_size=min_size,
+            max_size=max_size,
+            priority_dirs=priority_dirs,
+        )
+        self.recent_first = recent_first
 
         self.overwrite = overwrite
-        self.__max_workers = Semaphore(max_workers)
-        self.__max_downloaders = Semaphore(max_downloaders)
+        self.max_workers = max_workers
+        self.max_detail_workers = max_detail_workers
+        self.max_downloaders = max(1, max_downloaders)
+        self.max_writers = max(1, max_writers)
+        self.writer = StrmWriter(self.max_writers)
+        self.queue_size = max(1, queue_size)
         self.wait_time = wait_time
+        self.max_concurrency = max_concurrency
+        self.per_page = per_page
+        self.stream_listing = stream_listing
         self.sync_server = sync_server
+        if incremental_sync and flatten_mode:
+            logger.warning("平铺模式下不支持逐目录同步删除，将在遍历结束后统一清理")
+        self.incremental_sync = sync_server and incremental_sync and not flatten_mode
 
         if sync_ignore:
             self.sync_ignore_pattern = re_compile(sync_ignore)
         else:
             self.sync_ignore_pattern = None
 
+        if listing_cache:
+            self.listing_cache: AlistListingCache | None = AlistListingCache(
+                self.client, ttl=listing_cache_ttl, force_refresh=force_refresh
+            )
+        else:
+            self.listing_cache = None
+
+        # 任务数据文件（同步清单等），以服务器地址、源目录和输出目录区分任务
+        job_key = md5(f"{url}|{source_dir}|{target_dir}".encode()).hexdigest()[:16]
+        self.data_file = settings.DATA_DIR / f"alist2strm_{job_key}.db"
+
+        if manifest:
+            self.manifest: Alist2StrmManifest | None = Alist2StrmManifest(
+                self.data_file
+            )
+        else:
+            self.manifest = None
+
+        self.checkpoint_enabled = checkpoint or time_budget > 0
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.time_budget = max(0, time_budget)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+
+        if dir_tiering and flatten_mode:
+            logger.warning("平铺模式下不支持目录冷热分层")
+        if dir_tiering and not flatten_mode:
+            self.tiers: Alist2StrmTiers | None = Alist2StrmTiers(
+                self.data_file, source_dir, hot_days, cold_interval
+            )
+        else:
+            self.tiers = None
+
+        if hash_check:
+            self.hash_index: LocalHashIndex | None = LocalHashIndex(self.data_file)
+        else:
+            self.hash_index = None
+
+        self.listing_mode = Alist2StrmListingMode.from_str(listing_mode)
+        if local_source_dir and self.mode == Alist2StrmMode.RawURL:
+            logger.warning("RawURL 模式需要向 Alist 获取文件直链，不支持本地挂载目录")
+            local_source_dir = ""
+        if local_source_dir:
+            self.local_source: AlistLocalSource | None = AlistLocalSource(
+                self.client, source_dir, local_source_dir
+            )
+            if self.listing_mode != Alist2StrmListingMode.List:
+                logger.warning("已设置本地挂载目录，listing_mode 不生效")
+                self.listing_mode = Alist2StrmListingMode.List
+        else:
+            self.local_source = None
+
+        if self.listing_mode == Alist2StrmListingMode.Search and (
+            self.manifest is not None
+            or self.incremental_sync
+            or self.tiers is not None
+            or self.checkpoint_enabled
+        ):
+            # 搜索模式下不遍历目录树，依赖逐目录遍历的功能均不可用
+            logger.warning(
+                "Search 模式下不支持同步清单、逐目录同步删除、目录冷热分层和遍历断点，已忽略这些选项"
+            )
+            self.manifest = None
+            self.incremental_sync = False
+            self.tiers = None
+            self.checkpoint_enabled = False
+        if (
+            self.listing_mode == Alist2StrmListingMode.WebDAV
+            or self.local_source is not None
+        ):
+            # WebDAV 响应和本地目录中没有签名和哈希信息，签名只能由永久令牌计算
+            if self.mode == Alist2StrmMode.AlistURL and not self.client.sign("/"):
+                logger.warning(
+                    "WebDAV 模式或本地挂载目录下未使用永久令牌，无法计算文件签名，Alist 启用签名时生成的链接将无法访问"
+                )
+            if self.hash_index is not None:
+                logger.warning("WebDAV 模式或本地挂载目录下没有文件哈希信息，哈希比较不生效")
+
+        # 最终失败的目录/文件同样通过遍历断点在下次运行时重试，因此任务数据文件存在时总是读取断点
+        # 未启用任何持久化功能时不创建数据文件，有失败项需要保存时再创建断点
+        if (
+            self.checkpoint_enabled
+            or self.manifest is not None
+            or self.tiers is not None
+            or self.hash_index is not None
+            or self.data_file.exists()
+        ):
+            self.checkpoint: Alist2StrmCheckpoint | None = Alist2StrmCheckpoint(
+                self.data_file
+            )
+        else:
+            self.checkpoint = None
+
+        if storage_limits and self.local_source is not None:
+            logger.warning("已设置本地挂载目录，不再请求 Alist 列出目录，存储器限流不生效")
+            storage_limits = False
+        self.storage_limits = storage_limits
+        self.storage_limit_overrides = storage_limit_overrides
+
     async def run(self) -> None:
         """
         处理主体
+        运行期间向服务器共享的限流器登记本任务的最大并发数及请求间隔
+        """
+
+        self.client.limiter.register(self, self.max_concurrency, self.wait_time)
+        try:
+            await self.__run()
+        finally:
+            self.client.limiter.unregister(self)
+
+    async def __run(self) -> None:
+        """
+        遍历、写入/下载及清理本地文件
         """
         
         # BDMV 处理相关变量初始化
-        self.bdmv_collections: dict[str, list[tuple[AlistPath, int]]] = {}  # BDMV目录 -> [(文件路径, 文件大小)]
-        self.bdmv_largest_files: dict[str, AlistPath] = {}  # BDMV目录 -> 最大文件路径
+        self.bdmv_collections: dict[str, tuple[int, AlistEntry]] = {}  # BDMV目录 -> (.m2ts 文件数, 当前最大文件)
+        self.bdmv_largest_files: dict[str, str] = {}  # BDMV目录 -> 选中的最大文件路径
 
-        def filter(path: AlistPath) -> bool:
+        def filter(path: AlistEntry) -> bool:
             """
             过滤器
             根据 Alist2Strm 配置判断是否需要处理该文件
             将云盘上上的文件对应的本地文件路径保存至 self.processed_local_paths
 
-            :param path: AlistPath 对象
+            :param path: AlistEntry 对象
             """
 
-            if path.is_dir:
-                return False
+            if self.tiers is not None:
+                self.tiers.observe(path)
 
-            # 跳过系统文件夹和不需要的文件
-            if any(folder in path.full_path for folder in ["@eaDir", "Thumbs.db", ".DS_Store"]):
+            if path.is_dir:
                 return False
 
             # 完全跳过 BDMV 文件夹内的所有文件（除了我们特殊处理的 .m2ts 文件）
@@ -121,14 +337,14 @@ class Alist2Strm:
                 logger.debug(f"跳过 BDMV 文件夹内的文件: {path.name}")
                 return False
 
-            if path.suffix.lower() not in self.process_file_exts:
+            if not self.rules.allow_file(path):
                 logger.debug(f"文件 {path.name} 不在处理列表中")
                 return False
 
             # 检查是否为 BDMV 文件
             if self._is_bdmv_file(path):
                 self._collect_bdmv_file(path)
-                # 暂时不处理，等收集完所有文件后再决定
+                # 暂时不处理，STREAM 目录遍历完成后再决定
                 return False
 
             try:
@@ -137,104 +353,564 @@ class Alist2Strm:
                 logger.warning(f"获取 {path.full_path} 本地路径失败：{e}")
                 return False
 
-            self.processed_local_paths.add(local_path)
+            if self.incremental_sync:
+                self.__expect(path.full_path[: -len(path.name) - 1], local_path.name)
+            elif self.manifest is None:
+                self.processed_local_paths.add(str(local_path))
 
-            if not self.overwrite and local_path.exists():
-                if path.suffix in self.download_exts:
-                    local_path_stat = local_path.stat()
-                    if local_path_stat.st_mtime < path.modified_timestamp:
-                        logger.debug(
-                            f"文件 {local_path.name} 已过期，需要重新处理 {path.full_path}"
-                        )
-                        return True
-                    if local_path_stat.st_size < path.size:
-                        logger.debug(
-                            f"文件 {local_path.name} 大小不一致，可能是本地文件损坏，需要重新处理 {path.full_path}"
-                        )
-                        return True
-                logger.debug(
-                    f"文件 {local_path.name} 已存在，跳过处理 {path.full_path}"
-                )
+            return self.__need_process(path, local_path)
+
+        def dir_filter(path: AlistEntry) -> bool:
+            """
+            目录过滤器
+            返回 False 的目录及其子树不会被列出
+
+            :param path: 目录的 AlistEntry 对象
+            """
+
+            if not self.rules.allow_dir(path):
+                logger.debug(f"目录 {path.full_path} 匹配排除规则，跳过遍历")
+                return False
+
+            # BDMV 文件夹内只需要遍历 STREAM 目录
+            if "/BDMV/" in path.full_path and path.name != "STREAM":
+                logger.debug(f"跳过 BDMV 文件夹内的目录: {path.full_path}")
+                return False
+
+            if self.incremental_sync:
+                parent = path.full_path[: -len(path.name) - 1]
+                self.__expect(parent, path.name)
+                if path.name == "BDMV":
+                    # BDMV 目录对应的 .strm 文件保存在电影根目录下，STREAM 目录遍历完成后才会生成
+                    movie_title = self._get_movie_title_from_bdmv_path(parent)
+                    self.__expect(parent, f"{movie_title}.strm")
+
+            # BDMV 目录不单独分层，随电影目录一起遍历
+            if (
+                self.tiers is not None
+                and "/BDMV" not in path.full_path
+                and not self.tiers.should_visit(path.full_path)
+            ):
+                logger.debug(f"冷目录 {path.full_path} 未到遍历间隔，跳过遍历")
+                self.skipped_dirs.append(path.full_path)
+                if self.manifest is not None:
+                    self.manifest.keep([path.full_path])
                 return False
 
             return True
 
+        async def dir_done(dir_path: str) -> list[AlistEntry]:
+            """
+            目录遍历完成回调
+            启用逐目录同步删除时，删除该目录对应的本地目录中多余的文件和子目录
+            BDMV/STREAM 目录遍历完成后立即选出该 BDMV 目录中最大的 .m2ts 文件，与其它文件一样进入处理队列
+
+            :param dir_path: 目录路径
+            :return: 需要处理的文件列表
+            """
+
+            if self.tiers is not None:
+                self.tiers.finish(dir_path)
+
+            if self.incremental_sync:
+                await self.__reconcile_dir(
+                    dir_path, self.expected_names.pop(dir_path, set())
+                )
+
+            if not dir_path.endswith(self.BDMV_STREAM_DIR):
+                return []
+
+            largest_file = self._finalize_bdmv_collection(
+                dir_path[: -len(self.BDMV_STREAM_DIR)]
+            )
+            if largest_file is None:
+                return []
+
+            try:
+                local_path = self.__get_local_path(largest_file)
+            except OSError as e:  # 可能是文件名过长
+                logger.warning(f"获取 {largest_file.full_path} 本地路径失败：{e}")
+                self._release_bdmv_file(largest_file)
+                return []
+
+            if self.manifest is None and not self.incremental_sync:
+                self.processed_local_paths.add(str(local_path))
+
+            if not self.__need_process(largest_file, local_path):
+                self._release_bdmv_file(largest_file)
+                return []
+            return [largest_file]
+
+        def priority(dir_path: str, modified: str | None) -> tuple[int, float]:
+            """
+            目录优先级，返回值越小越先列出
+            先按优先目录规则排序，启用 recent_first 时再按修改时间从新到旧排序
+
+            :param dir_path: 目录路径
+            :param modified: 目录修改时间
+            """
+
+            rank = self.rules.dir_priority(dir_path.rsplit("/", 1)[-1], dir_path)
+            if not self.recent_first or not modified:
+                return rank, 0.0
+            try:
+                return rank, -datetime.fromisoformat(modified).timestamp()
+            except ValueError:
+                return rank, 0.0
 
         if self.mode == Alist2StrmMode.RawURL:
             is_detail = True
         else:
             is_detail = False
 
-        self.processed_local_paths = set()  # 云盘文件对应的本地文件路径
+        self.processed_local_paths = PathHashSet()  # 云盘文件对应的本地文件路径（仅保存哈希值）
+        self.expected_names: dict[str, set[str]] = {}  # 正在遍历的目录 -> 本地应保留的文件/子目录名
+        self.skipped_dirs: list[str] = []  # 本次运行跳过遍历的冷目录
 
-        # 第一阶段：收集所有文件信息并直接处理普通文件
-        async with self.__max_workers, TaskGroup() as tg:
-            async for path in self.client.iter_path(
-                dir_path=self.source_dir,
-                wait_time=self.wait_time,
-                is_detail=is_detail,
-                filter=filter,
-            ):
-                # 直接处理普通文件，不需要额外的 list
-                tg.create_task(self.__file_processer(path))
+        if self.tiers is not None:
+            self.tiers.load()
 
-        # 完成 BDMV 文件收集，确定最大文件
-        self._finalize_bdmv_collections()
-        
-        # 第二阶段：处理 BDMV 最大文件
-        logger.info(f"开始处理 {len(self.bdmv_largest_files)} 个 BDMV 目录")
-        for bdmv_root, largest_file in self.bdmv_largest_files.items():
+        if self.storage_limits:
+            await self.client.load_storage_limits(self.storage_limit_overrides)
+
+        await self.local_index.build()
+
+        search_dirs: set[str] | None = None  # Search 模式下需要列出确认的目录
+        if self.listing_mode == Alist2StrmListingMode.Search:
             try:
-                logger.info(f"处理 BDMV 目录: {bdmv_root}")
-                logger.info(f"最大文件: {largest_file.full_path}")
-                
-                # 重新获取详细信息以确保有 raw_url
-                if self.mode == Alist2StrmMode.RawURL and not largest_file.raw_url:
-                    logger.debug(f"重新获取 BDMV 文件详细信息: {largest_file.full_path}")
-                    try:
-                        updated_path = await self.client.async_api_fs_get(largest_file.full_path)
-                        # 保持原有的 full_path，只更新其他属性
-                        original_full_path = largest_file.full_path
-                        largest_file = updated_path
-                        largest_file.full_path = original_full_path
-                    except Exception as e:
-                        logger.warning(f"重新获取 BDMV 文件详细信息失败: {e}")
-                
-                # 处理文件
-                await self.__file_processer(largest_file)
-                
-                # 添加到已处理路径列表
-                local_path = self.__get_local_path(largest_file)
-                self.processed_local_paths.add(local_path)
-                
-                logger.info(f"BDMV 文件处理完成: {largest_file.name}")
-            except Exception as e:
-                logger.error(f"处理 BDMV 文件 {largest_file.full_path} 时出错：{e}")
-                logger.error(f"详细错误信息: {traceback.format_exc()}")
-                continue
+                search_dirs = await self.__search_dirs(dir_filter)
+            except RuntimeError as e:
+                logger.warning(f"通过搜索索引获取文件失败，改为列出目录：{e}")
+                self.processed_local_paths = PathHashSet()
+        self.searched = search_dirs is not None
+
+        if search_dirs is not None:
+            # 只列出需要确认的目录中的文件，不再列出其子目录
+            self.frontier = AlistFrontier(
+                (dir_path, None, True) for dir_path in search_dirs
+            )
+        else:
+            self.frontier = AlistFrontier(
+                self.checkpoint.load() if self.checkpoint is not None else []
+            )
+            if self.frontier.resumed:
+                logger.info(f"从遍历断点继续，剩余 {len(self.frontier)} 个目录")
+        resumed = search_dirs is None and self.frontier.resumed
+        self.failures: list[tuple[str, bool]] = []  # 最终失败的 (路径, 是否为目录)
+        self.failed_strms: list[AlistEntry] = []  # 等待重试的写入失败的视频文件
+        self.failed_downloads: list[AlistEntry] = []  # 等待重试的下载失败的文件
 
-        if self.sync_server:
+        def on_error(path: str, is_dir: bool, error: Exception) -> None:
+            """
+            遍历错误回调，记录重试后仍然失败的目录/文件
+
+            :param path: 路径
+            :param is_dir: 是否为目录
+            :param error: 最后一次的异常
+            """
+
+            logger.error(f"{'目录' if is_dir else '文件'} {path} 获取失败：{error}")
+            self.failures.append((path, is_dir))
+
+        if self.manifest is not None:
+            self.manifest.begin(resume=resumed)
+            await to_thread(self.manifest.load)
+
+        if self.listing_cache is not None:
+            await self.listing_cache.purge()
+
+        # 遍历（列出 → 过滤 → 详细信息）与写入/下载通过有界队列并行执行
+        # BDMV 目录在其 STREAM 目录遍历完成后立即选出最大文件，进入同一队列
+        strm_queue: Queue[AlistEntry] = Queue(maxsize=self.queue_size)
+        download_queue: Queue[AlistEntry] = Queue(maxsize=self.queue_size)
+        completed = False
+        try:
+            async with TaskGroup() as tg:
+                workers = [
+                    tg.create_task(self.__strm_worker(strm_queue))
+                    for _ in range(self.max_writers)
+                ] + [
+                    tg.create_task(self.__file_worker(download_queue))
+                    for _ in range(self.max_downloaders)
+                ]
+                if self.checkpoint_enabled:
+                    workers.append(tg.create_task(self.__checkpoint_worker()))
+
+                try:
+                    async with timeout(self.time_budget or None):
+                        # 搜索结果中的文件均无需处理时不需要列出任何目录
+                        if search_dirs is None or search_dirs:
+                            async for path in self.client.iter_path(
+                                dir_path=self.source_dir,
+                                wait_time=self.wait_time,
+                                is_detail=is_detail,
+                                filter=filter,
+                                max_workers=self.max_workers,
+                                dir_filter=dir_filter,
+                                dir_done=dir_done,
+                                per_page=self.per_page,
+                                cache=self.listing_cache,
+                                detail_workers=self.max_detail_workers,
+                                queue_size=self.queue_size,
+                                stream=self.stream_listing,
+                                webdav=(
+                                    self.listing_mode == Alist2StrmListingMode.WebDAV
+                                ),
+                                source=self.local_source,
+                                frontier=self.frontier,
+                                refresh=(
+                                    self.tiers.is_hot if self.tiers is not None else None
+                                ),
+                                priority=(
+                                    priority
+                                    if self.recent_first or self.rules.priority_dirs
+                                    else None
+                                ),
+                                retries=self.max_retries,
+                                retry_delay=self.retry_delay,
+                                on_error=on_error,
+                            ):
+                                if path.suffix.lower() in VIDEO_EXTS:
+                                    await strm_queue.put(path)
+                                else:
+                                    await download_queue.put(path)
+                    completed = True
+                except TimeoutError:
+                    logger.info(
+                        f"已用完 {self.time_budget} 秒时间预算，停止遍历，下次运行时从断点继续"
+                    )
+
+                await strm_queue.join()
+                await download_queue.join()
+                if completed:
+                    await self.__retry_failed(strm_queue, download_queue)
+                for worker in workers:
+                    worker.cancel()
+
+            if self.failures:
+                completed = False
+                logger.warning(
+                    f"{len(self.failures)} 个目录/文件重试后仍然失败，"
+                    "已记录到遍历断点，下次运行时仅重试这些目录"
+                )
+        finally:
+            self.writer.close()
+            self.bdmv_collections.clear()
+            self.bdmv_largest_files.clear()
+            if self.tiers is not None:
+                self.tiers.flush()
+            if completed:
+                if self.checkpoint is not None:
+                    self.checkpoint.clear()
+            elif search_dirs is None and (self.checkpoint_enabled or self.failures):
+                self.__save_checkpoint()
+
+        if not completed:
+            logger.info("遍历未完成，跳过清理本地文件")
+            return
+
+        if self.manifest is not None:
+            deleted = self.manifest.deleted()
+            logger.info(f"同步清单中有 {len(deleted)} 个文件已从服务器中删除")
+            if self.sync_server:
+                await self.__delete_local_files(
+                    [local_path for _, local_path in deleted]
+                )
+                self.manifest.remove([remote_path for remote_path, _ in deleted])
+                logger.info("清理过期的 .strm 文件完成")
+        elif self.sync_server and not self.incremental_sync and resumed:
+            logger.info("本次运行从遍历断点继续，无法确定完整的文件列表，跳过清理本地文件")
+        elif self.sync_server and not self.incremental_sync:
             await self.__cleanup_local_files()
             logger.info("清理过期的 .strm 文件完成")
         logger.info("Alist2Strm 处理完成")
 
-    async def __file_processer(self, path: AlistPath) -> None:
+    def __need_process(self, path: AlistEntry, local_path: Path) -> bool:
         """
-        异步保存文件至本地
+        判断远程文件是否需要生成/下载到本地
 
-        :param path: AlistPath 对象
+        :param path: AlistEntry 对象
+        :param local_path: 本地文件路径
+        :return: 是否需要处理
+        """
+
+        if self.manifest is None:
+            return self.__need_process_local(path, local_path)
+
+        change = self.manifest.compare(path, local_path)
+        if self.overwrite or change == ManifestChange.UPDATE:
+            return True
+        if change == ManifestChange.UNCHANGED:
+            if local_path in self.local_index:
+                logger.debug(f"文件 {path.full_path} 在同步清单中未变化，跳过处理")
+                return False
+            # 本地文件已被删除，重新生成/下载后再次记录
+            logger.debug(f"文件 {local_path.name} 在本地不存在，需要重新处理 {path.full_path}")
+            return True
+
+        # 新增文件：本地已存在且未过期时直接加入同步清单（首次启用同步清单时接管已有文件）
+        if self.__need_process_local(path, local_path):
+            return True
+        self.manifest.record(path, local_path)
+        return False
+
+    def __need_process_local(self, path: AlistEntry, local_path: Path) -> bool:
+        """
+        根据输出目录快照判断远程文件是否需要生成/下载到本地
+
+        :param path: AlistEntry 对象
+        :param local_path: 本地文件路径
+        :return: 是否需要处理
+        """
+
+        local_stat = self.local_index.get(local_path)
+        if not self.overwrite and local_stat is not None:
+            if path.suffix in self.download_exts:
+                local_size, local_mtime = local_stat
+                if local_mtime < path.modified_timestamp:
+                    logger.debug(
+                        f"文件 {local_path.name} 已过期，需要重新处理 {path.full_path}"
+                    )
+                    return True
+                if local_size < path.size:
+                    logger.debug(
+                        f"文件 {local_path.name} 大小不一致，可能是本地文件损坏，需要重新处理 {path.full_path}"
+                    )
+                    return True
+            logger.debug(f"文件 {local_path.name} 已存在，跳过处理 {path.full_path}")
+            return False
+
+        return True
+
+    async def __search_dirs(self, dir_filter: Callable[[AlistEntry], bool]) -> set[str]:
+        """
+        通过 Alist 搜索索引按后缀获取源目录中需要处理的文件，计算需要列出确认的目录
+        搜索结果不包含修改时间和签名，只与输出目录快照比较：本地缺少对应文件（或下载文件小于远程文件）时列出其所在目录，
+        由目录列表提供完整信息后按正常流程处理，其余目录不发送列表请求
+        搜索结果对应的本地路径均记录到 self.processed_local_paths
+
+        :param dir_filter: 目录过滤器，所在目录或任一上级目录未通过过滤器的文件会被跳过
+        :return: 需要列出的目录路径集合
+        """
+
+        root = self.source_dir.rstrip("/")
+        allowed: dict[str, bool] = {}
+
+        def allow_dir(dir_path: str) -> bool:
+            """
+            逐级检查源目录之下的各级目录是否通过目录过滤器
+            """
+            if len(dir_path) <= len(root):
+                return dir_path == root
+            result = allowed.get(dir_path)
+            if result is None:
+                name = dir_path[dir_path.rfind("/") + 1 :]
+                result = allow_dir(dir_path[: -len(name) - 1]) and dir_filter(
+                    AlistEntry(
+                        self.client.url,
+                        self.client.base_path,
+                        dir_path,
+                        name,
+                        is_dir=True,
+                    )
+                )
+                allowed[dir_path] = result
+            return result
+
+        dirs: set[str] = set()
+        count = 0
+        for ext in sorted(self.process_file_exts):
+            async for path in self.client.iter_fs_search(
+                self.source_dir, ext, scope=2, per_page=self.per_page or 1000
+            ):
+                # 关键词匹配文件名中的任意位置，仅保留后缀一致的文件
+                if path.suffix.lower() != ext:
+                    continue
+                dir_path = path.full_path[: -len(path.name) - 1]
+                if not allow_dir(dir_path):
+                    continue
+                if "/BDMV/" in path.full_path and not self._is_bdmv_file(path):
+                    continue
+                if not self.rules.allow_file(path):
+                    continue
+
+                try:
+                    if self._is_bdmv_file(path):
+                        local_path = self.__get_bdmv_local_path(
+                            self._get_bdmv_root_dir(path)
+                        )
+                    else:
+                        local_path = self.__get_local_path(path)
+                except OSError as e:  # 可能是文件名过长
+                    logger.warning(f"获取 {path.full_path} 本地路径失败：{e}")
+                    continue
+
+                count += 1
+                self.processed_local_paths.add(str(local_path))
+                local_stat = self.local_index.get(local_path)
+                if (
+                    self.overwrite
+                    or local_stat is None
+                    or (path.suffix in self.download_exts and local_stat[0] < path.size)
+                ):
+                    dirs.add(dir_path or "/")
+
+        logger.info(f"搜索索引中共有 {count} 个需要处理的文件，需要列出 {len(dirs)} 个目录确认")
+        return dirs
+
+    async def __file_worker(self, queue: Queue[AlistEntry]) -> None:
+        """
+        从队列中取出文件并保存至本地
+
+        :param queue: 待处理文件队列
+        """
+
+        while True:
+            path = await queue.get()
+            try:
+                await self.__file_processer(path)
+            except Exception as e:
+                # 不确认处理完成，所在目录保留在遍历边界中
+                logger.warning(f"处理文件 {path.full_path} 失败：{e}")
+                self.failed_downloads.append(path)
+            else:
+                self.frontier.done(path)
+            finally:
+                queue.task_done()
+
+    async def __retry_failed(
+        self, strm_queue: Queue[AlistEntry], download_queue: Queue[AlistEntry]
+    ) -> None:
+        """
+        按指数退避重试写入/下载失败的文件，重试后仍然失败的文件记录到 self.failures
+
+        :param strm_queue: 待处理视频文件队列
+        :param download_queue: 待下载文件队列
+        """
+
+        for attempt in range(self.max_retries):
+            if not (self.failed_strms or self.failed_downloads):
+                return
+            delay = self.retry_delay * 2**attempt
+            logger.info(
+                f"{len(self.failed_strms) + len(self.failed_downloads)} 个文件处理失败，"
+                f"{delay} 秒后进行第 {attempt + 1} 次重试"
+            )
+            await sleep(delay)
+            failed_strms, self.failed_strms = self.failed_strms, []
+            failed_downloads, self.failed_downloads = self.failed_downloads, []
+            for path in failed_strms:
+                await strm_queue.put(path)
+            for path in failed_downloads:
+                await download_queue.put(path)
+            await strm_queue.join()
+            await download_queue.join()
+
+        for path in self.failed_strms + self.failed_downloads:
+            logger.error(f"文件 {path.full_path} 处理失败")
+            self.failures.append((path.full_path, False))
+            self._release_bdmv_file(path)
+
+    async def __strm_worker(self, queue: Queue[AlistEntry]) -> None:
+        """
+        从队列中批量取出视频文件，通过 StrmWriter 在线程池中写入 .strm 文件
+
+        :param queue: 待处理视频文件队列
+        """
+
+        while True:
+            paths = [await queue.get()]
+            while len(paths) < StrmWriter.BATCH_SIZE and not queue.empty():
+                paths.append(queue.get_nowait())
+
+            # 写入失败的文件不确认处理完成，所在目录保留在遍历边界中，等待重试
+            done: list[AlistEntry] = []
+            try:
+                items: list[tuple[Path, str]] = []
+                entries: dict[Path, AlistEntry] = {}
+                for path in paths:
+                    local_path = self.__get_local_path(path)
+                    content = self.__get_content(path)
+                    if not content:
+                        logger.warning(f"文件 {path.full_path} 的内容为空，跳过处理")
+                        done.append(path)
+                        continue
+                    if local_path in entries:
+                        # 多个远程文件对应同一个本地文件，只写入一次
+                        logger.debug(f"{local_path.name} 已在同一批中写入，跳过处理 {path.full_path}")
+                        done.append(path)
+                        continue
+                    items.append((local_path, content))
+                    entries[local_path] = path
+
+                for local_path, result in await self.writer.write_batch(items):
+                    path = entries[local_path]
+                    if isinstance(result, Exception):
+                        logger.warning(f"{local_path.name} 创建失败：{result}")
+                        self.failed_strms.append(path)
+                        continue
+                    if result:
+                        logger.info(f"{local_path.name} 创建成功")
+                    else:
+                        logger.debug(f"{local_path.name} 内容未变化，跳过写入")
+                    if self.manifest is not None:
+                        self.manifest.record(path, local_path)
+                    done.append(path)
+            finally:
+                for path in done:
+                    self._release_bdmv_file(path)
+                    self.frontier.done(path)
+                for _ in paths:
+                    queue.task_done()
+
+    async def __checkpoint_worker(self) -> None:
+        """
+        定期保存遍历断点
+        """
+
+        while True:
+            await sleep(self.checkpoint_interval)
+            self.__save_checkpoint()
+
+    def __save_checkpoint(self) -> None:
+        """
+        保存遍历断点
+        先提交同步清单的缓冲记录，保证断点之前已处理的文件均已记录
+        """
+
+        if self.manifest is not None:
+            self.manifest.flush()
+        if self.checkpoint is None:
+            self.checkpoint = Alist2StrmCheckpoint(self.data_file)
+        self.checkpoint.save(self.frontier.snapshot())
+
+    def __get_content(self, path: AlistEntry) -> str | None:
+        """
+        根据 Strm 模式生成 .strm 文件内容
+
+        :param path: AlistEntry 对象
+        :return: 文件内容
         """
-        local_path = self.__get_local_path(path)
-        logger.debug(f"__file_processer: 处理文件 {path.full_path} -> 本地路径 {local_path} | 模式 {self.mode}")
 
         # 统一的 URL 生成逻辑，BDMV 文件与普通文件使用相同的逻辑
         if self.mode == Alist2StrmMode.AlistURL:
-            content = path.download_url
+            return path.download_url
         elif self.mode == Alist2StrmMode.RawURL:
-            content = path.raw_url
+            return path.raw_url
         elif self.mode == Alist2StrmMode.AlistPath:
-            content = path.full_path
+            return path.full_path
+        return None
+
+    async def __file_processer(self, path: AlistEntry) -> None:
+        """
+        异步保存文件至本地（.strm 文件统一由 StrmWriter 写入）
 
+        :param path: AlistEntry 对象
+        """
+        local_path = self.__get_local_path(path)
+        logger.debug(f"__file_processer: 处理文件 {path.full_path} -> 本地路径 {local_path} | 模式 {self.mode}")
+
+        content = self.__get_content(path)
         logger.debug(f"__file_processer: 初始 content = {content}")
 
         if not content:
@@ -244,20 +920,32 @@ class Alist2Strm:
         await to_thread(local_path.parent.mkdir, parents=True, exist_ok=True)
 
         logger.debug(f"开始处理 {local_path} | 内容: {content}")
-        if local_path.suffix == ".strm":
-            async with async_open(local_path, mode="w", encoding="utf-8") as file:
-                await file.write(content)
-            logger.info(f"{local_path.name} 创建成功")
+        if (
+            self.hash_index is not None
+            and not self.overwrite
+            and await self.hash_index.is_unchanged(path, local_path)
+        ):
+            logger.debug(f"文件 {local_path.name} 哈希值未变化，跳过下载 {path.full_path}")
+        elif self.local_source is not None:
+            # 从本地挂载目录复制并保留修改时间，与远程文件的修改时间一致
+            await to_thread(
+                copy2, self.local_source.local_path(path.full_path), local_path
+            )
+            logger.info(f"{local_path.name} 复制成功")
         else:
-            async with self.__max_downloaders:
-                await RequestUtils.download(path.download_url, local_path)
-                logger.info(f"{local_path.name} 下载成功")
+            await RequestUtils.download(path.download_url, local_path)
+            logger.info(f"{local_path.name} 下载成功")
+            if self.hash_index is not None:
+                await self.hash_index.update(path, local_path)
+
+        if self.manifest is not None:
+            self.manifest.record(path, local_path)
 
-    def __get_local_path(self, path: AlistPath) -> Path:
+    def __get_local_path(self, path: AlistEntry) -> Path:
         """
-        根据给定的 AlistPath 对象和当前的配置，计算出本地文件路径。
+        根据给定的 AlistEntry 对象和当前的配置，计算出本地文件路径。
 
-        :param path: AlistPath 对象
+        :param path: AlistEntry 对象
         :return: 本地文件路径
         """
         # 检查是否为 BDMV 文件
@@ -265,20 +953,7 @@ class Alist2Strm:
             bdmv_root = self._get_bdmv_root_dir(path)
             if bdmv_root and self._should_process_bdmv_file(path):
                 # 为 BDMV 文件生成特殊路径
-                movie_title = self._get_movie_title_from_bdmv_path(bdmv_root)
-                
-                if self.flatten_mode:
-                    local_path = self.target_dir / f"{movie_title}.strm"
-                else:
-                    # 计算相对于 source_dir 的路径
-                    relative_path = bdmv_root.replace(self.source_dir, "", 1)
-                    if relative_path.startswith("/"):
-                        relative_path = relative_path[1:]
-                    
-                    # 将 .strm 文件放在电影根目录下，使用电影标题命名
-                    local_path = self.target_dir / relative_path / f"{movie_title}.strm"
-                
-                return local_path
+                return self.__get_bdmv_local_path(bdmv_root)
 
         # 原有逻辑保持不变
         if self.flatten_mode:
@@ -294,20 +969,188 @@ class Alist2Strm:
 
         return local_path
 
+    def __get_bdmv_local_path(self, bdmv_root: str) -> Path:
+        """
+        计算 BDMV 目录对应的本地 .strm 文件路径
+
+        :param bdmv_root: BDMV 根目录路径
+        :return: 本地文件路径
+        """
+        movie_title = self._get_movie_title_from_bdmv_path(bdmv_root)
+
+        if self.flatten_mode:
+            return self.target_dir / f"{movie_title}.strm"
+
+        # 计算相对于 source_dir 的路径
+        relative_path = bdmv_root.replace(self.source_dir, "", 1)
+        if relative_path.startswith("/"):
+            relative_path = relative_path[1:]
+
+        # 将 .strm 文件放在电影根目录下，使用电影标题命名
+        return self.target_dir / relative_path / f"{movie_title}.strm"
+
+    def __get_local_dir(self, dir_path: str) -> Path:
+        """
+        计算远程目录对应的本地目录（非平铺模式）
+
+        :param dir_path: 远程目录路径
+        :return: 本地目录路径
+        """
+        return self.target_dir / dir_path.replace(self.source_dir, "", 1).lstrip("/")
+
     async def __cleanup_local_files(self) -> None:
         """
         删除服务器中已删除的本地的 .strm 文件及其关联文件
+        本地文件列表来自任务开始时建立的输出目录快照，运行期间新生成的文件均已处理，不会被删除
         如果文件后缀在 sync_ignore 中，则不会被删除
         """
         logger.info("开始清理本地文件")
 
+        # 跳过遍历的冷目录中的本地文件保持不变
+        skipped = tuple(
+            str(self.__get_local_dir(dir_path)) + sep for dir_path in self.skipped_dirs
+        )
+        files_to_delete = [
+            Path(file_path)
+            for file_path in self.processed_local_paths.difference(
+                self.local_index.paths()
+            )
+            if not (skipped and file_path.startswith(skipped))
+        ]
+        if self.searched:
+            files_to_delete = await self.__confirm_deleted(files_to_delete)
+        await self.__delete_local_files(files_to_delete)
+
+    async def __confirm_deleted(self, files_to_delete: list[Path]) -> list[Path]:
+        """
+        Search 模式下列出本地多余文件对应的远程目录，确认远程文件确实已删除
+        搜索索引可能未覆盖全部存储或尚未更新，仅删除远程目录中已不存在对应文件的本地文件
+
+        :param files_to_delete: 搜索结果中没有对应远程文件的本地文件
+        :return: 确认可以删除的本地文件
+        """
+
+        if not files_to_delete:
+            return []
         if self.flatten_mode:
-            all_local_files = [f for f in self.target_dir.iterdir() if f.is_file()]
-        else:
-            all_local_files = [f for f in self.target_dir.rglob("*") if f.is_file()]
+            logger.warning("平铺模式下无法确认本地文件对应的远程目录，跳过清理")
+            return []
 
-        files_to_delete = set(all_local_files) - self.processed_local_paths
+        root = self.source_dir.rstrip("/")
+        listings: dict[str, set[str] | None] = {}
 
+        async def local_names(dir_path: str) -> set[str] | None:
+            """
+            获取远程目录对应的本地目录中应存在的文件/子目录名，远程目录已删除时返回 None
+            """
+            if dir_path in listings:
+                return listings[dir_path]
+
+            names: set[str] | None = set()
+            try:
+                async for path in self.client.iter_fs_list(
+                    dir_path or "/", per_page=self.per_page
+                ):
+                    if path.is_dir:
+                        names.add(path.name)
+                        if path.name == "BDMV":
+                            title = self._get_movie_title_from_bdmv_path(dir_path)
+                            names.add(f"{title}.strm")
+                    elif path.suffix.lower() in VIDEO_EXTS:
+                        names.add(Path(path.name).with_suffix(".strm").name)
+                    else:
+                        names.add(path.name)
+            except RuntimeError:
+                # 列出失败时检查上级目录，上级目录中已不存在该目录时视为已删除
+                if len(dir_path) <= len(root):
+                    raise
+                name = dir_path[dir_path.rfind("/") + 1 :]
+                parent_names = await local_names(dir_path[: -len(name) - 1])
+                if parent_names is not None and name in parent_names:
+                    raise
+                names = None
+            listings[dir_path] = names
+            return names
+
+        files_by_dir: dict[str, list[Path]] = {}
+        for file_path in files_to_delete:
+            relative_dir = file_path.parent.relative_to(self.target_dir).as_posix()
+            dir_path = root if relative_dir == "." else f"{root}/{relative_dir}"
+            files_by_dir.setdefault(dir_path, []).append(file_path)
+
+        confirmed: list[Path] = []
+        for dir_path, files in files_by_dir.items():
+            try:
+                names = await local_names(dir_path)
+            except Exception as e:
+                logger.warning(f"无法确认目录 {dir_path} 中的文件是否已删除，跳过清理：{e}")
+                continue
+            for file_path in files:
+                if names is not None and file_path.name in names:
+                    logger.debug(
+                        f"文件 {file_path} 不在搜索结果中，但远程目录 {dir_path} 中仍存在，跳过删除"
+                    )
+                else:
+                    confirmed.append(file_path)
+        return confirmed
+
+    def __expect(self, dir_path: str, name: str) -> None:
+        """
+        记录目录遍历完成后本地对应目录中应保留的文件/子目录名
+
+        :param dir_path: 远程目录路径（根目录可以为空字符串）
+        :param name: 本地文件/子目录名
+        """
+        dir_path = dir_path or "/"
+        names = self.expected_names.get(dir_path)
+        if names is None:
+            names = self.expected_names[dir_path] = set()
+        names.add(name)
+
+    async def __reconcile_dir(self, dir_path: str, expected: set[str]) -> None:
+        """
+        删除远程目录对应的本地目录中多余的文件和子目录（子目录整体删除）
+        本地目录本身不会被删除，避免与正在写入该目录的任务冲突；远程目录被删除时由其父目录负责清理
+
+        :param dir_path: 远程目录路径
+        :param expected: 本地目录中应保留的文件/子目录名
+        """
+
+        local_dir = self.__get_local_dir(dir_path)
+
+        def collect() -> list[Path]:
+            files, dirs = FileUtils.list_dir(str(local_dir))
+            stale = [
+                Path(file_path)
+                for file_path in files
+                if basename(file_path) not in expected
+                and not StrmWriter.is_temp_file(file_path)
+            ]
+            for sub_dir in dirs:
+                if basename(sub_dir) not in expected:
+                    stale.extend(
+                        Path(file_path)
+                        for file_path, _, _ in FileUtils.scan_tree(sub_dir)
+                    )
+            return stale
+
+        stale = await to_thread(collect)
+        if stale:
+            logger.debug(f"目录 {dir_path} 对应的本地目录中有 {len(stale)} 个多余文件")
+            await self.__delete_local_files(stale, local_dir)
+
+    async def __delete_local_files(
+        self, files_to_delete: Iterable[Path], root: Path | None = None
+    ) -> None:
+        """
+        删除本地文件及删除后产生的空目录
+        如果文件后缀在 sync_ignore 中，则不会被删除
+
+        :param files_to_delete: 需要删除的本地文件路径
+        :param root: 删除空目录时的根目录（不会被删除），默认为输出目录
+        """
+
+        paths: list[str] = []
         for file_path in files_to_delete:
             # 检查文件是否匹配忽略正则表达式
             if self.sync_ignore_pattern and self.sync_ignore_pattern.search(
@@ -315,34 +1158,38 @@ class Alist2Strm:
             ):
                 logger.debug(f"文件 {file_path.name} 在忽略列表中，跳过删除")
                 continue
+            paths.append(str(file_path))
 
-            try:
-                if file_path.exists():
-                    await to_thread(file_path.unlink)
-                    logger.info(f"删除文件：{file_path}")
-
-                    # 检查并删除空目录
-                    parent_dir = file_path.parent
-                    while parent_dir != self.target_dir:
-                        if any(parent_dir.iterdir()):
-                            break  # 目录不为空，跳出循环
-                        else:
-                            parent_dir.rmdir()
-                            logger.info(f"删除空目录：{parent_dir}")
-                        parent_dir = parent_dir.parent
-            except Exception as e:
-                logger.error(f"删除文件 {file_path} 失败：{e}")
+        if not paths:
+            return
+
+        deleted, failed = await to_thread(
+            FileUtils.delete_files, paths, self.local_workers
+        )
+        for file_path in deleted:
+            logger.info(f"删除文件：{file_path}")
+        if self.hash_index is not None:
+            self.hash_index.remove(deleted)
+        for file_path, error in failed:
+            logger.error(f"删除文件 {file_path} 失败：{error}")
+
+        # 所有文件删除完成后一次性自底向上删除空目录
+        removed = await to_thread(
+            FileUtils.prune_empty_dirs, deleted, str(root or self.target_dir)
+        )
+        for dir_path in removed:
+            logger.info(f"删除空目录：{dir_path}")
 
-    def _is_bdmv_file(self, path: AlistPath) -> bool:
+    def _is_bdmv_file(self, path: AlistEntry) -> bool:
         """
         检查文件是否为 BDMV 结构中的 .m2ts 文件
         
-        :param path: AlistPath 对象
+        :param path: AlistEntry 对象
         :return: 是否为 BDMV 文件
         """
         return "/BDMV/STREAM/" in path.full_path and path.suffix.lower() == ".m2ts"
 
-    def _get_bdmv_root_dir(self, path: AlistPath) -> str:
+    def _get_bdmv_root_dir(self, path: AlistEntry) -> str:
         """
         获取 BDMV 文件的根目录路径
         
@@ -365,49 +1212,44 @@ class Alist2Strm:
         # 获取最后一个目录名作为电影标题
         return Path(bdmv_root).name
 
-    def _collect_bdmv_file(self, path: AlistPath) -> None:
+    def _collect_bdmv_file(self, path: AlistEntry) -> None:
         """
-        收集 BDMV 文件信息
-        
+        收集 BDMV 文件信息，每个 BDMV 目录只保留当前最大的文件
+
         :param path: BDMV 中的 .m2ts 文件路径
         """
         bdmv_root = self._get_bdmv_root_dir(path)
         if not bdmv_root:
             return
 
-        if bdmv_root not in self.bdmv_collections:
-            self.bdmv_collections[bdmv_root] = []
-
-        # 添加文件信息到集合中
-        self.bdmv_collections[bdmv_root].append((path, path.size))
+        count, largest_file = self.bdmv_collections.get(bdmv_root, (0, path))
+        if path.size > largest_file.size:
+            largest_file = path
+        self.bdmv_collections[bdmv_root] = (count + 1, largest_file)
         logger.debug(f"收集 BDMV 文件: {path.full_path}, 大小: {path.size}")
 
-    def _finalize_bdmv_collections(self) -> None:
+    def _finalize_bdmv_collection(self, bdmv_root: str) -> AlistEntry | None:
         """
-        完成 BDMV 文件收集，确定每个 BDMV 目录中的最大文件
+        完成 BDMV 目录的文件收集，确定该目录中的最大文件
+
+        :param bdmv_root: BDMV 根目录路径
+        :return: 最大文件，目录中没有 .m2ts 文件时返回 None
         """
-        for bdmv_root, files in self.bdmv_collections.items():
-            if not files:
-                continue
+        if bdmv_root not in self.bdmv_collections:
+            return None
+
+        count, largest_file = self.bdmv_collections.pop(bdmv_root)
+        self.bdmv_largest_files[bdmv_root] = largest_file.full_path
+
+        movie_title = self._get_movie_title_from_bdmv_path(bdmv_root)
+        largest_size_mb = largest_file.size / (1024 * 1024)
+        logger.info(
+            f"BDMV 目录 '{movie_title}' 中发现 {count} 个 .m2ts 文件，"
+            f"选择: {largest_file.name} ({largest_size_mb:.1f} MB)"
+        )
+        return largest_file
 
-            movie_title = self._get_movie_title_from_bdmv_path(bdmv_root)
-            logger.info(f"BDMV 目录 '{movie_title}' 中发现 {len(files)} 个 .m2ts 文件:")
-            
-            # 按大小排序并显示所有文件
-            sorted_files = sorted(files, key=lambda x: x[1], reverse=True)
-            for i, (file_path, file_size) in enumerate(sorted_files):
-                size_mb = file_size / (1024 * 1024)
-                status = "✓ 选中" if i == 0 else "  跳过"
-                logger.info(f"  {status} {file_path.name}: {size_mb:.1f} MB ({file_size} 字节)")
-
-            # 找出最大的文件
-            largest_file = max(files, key=lambda x: x[1])
-            self.bdmv_largest_files[bdmv_root] = largest_file[0]
-            
-            largest_size_mb = largest_file[1] / (1024 * 1024)
-            logger.info(f"BDMV 目录 '{movie_title}' 最终选择: {largest_file[0].name} ({largest_size_mb:.1f} MB)")
-
-    def _should_process_bdmv_file(self, path: AlistPath) -> bool:
+    def _should_process_bdmv_file(self, path: AlistEntry) -> bool:
         """
         检查 BDMV 文件是否应该被处理（即是否为最大文件）
         
@@ -418,6 +1260,18 @@ class Alist2Strm:
         if not bdmv_root:
             return False
 
-        largest_file = self.bdmv_largest_files.get(bdmv_root)
-        return largest_file is not None and largest_file.full_path == path.full_path
+        return self.bdmv_largest_files.get(bdmv_root) == path.full_path
+
+    def _release_bdmv_file(self, path: AlistEntry) -> None:
+        """
+        BDMV 目录选中的最大文件处理完成后移除其记录，避免记录随 BDMV 目录数量增长
+
+        :param path: 已处理的文件路径
+        """
+        if not self._is_bdmv_file(path):
+            return
+
+        bdmv_root = self._get_bdmv_root_dir(path)
+        if self.bdmv_largest_files.get(bdmv_root) == path.full_path:
+            del self.bdmv_largest_files[bdmv_root]
 
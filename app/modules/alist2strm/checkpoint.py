@@ -0,0 +1,89 @@
+from pathlib import Path
+
+from app.core import logger
+from app.utils import SQLiteDB
+
+
+class Alist2StrmCheckpoint:
+    """
+    Alist2Strm 遍历断点
+    持久化保存遍历边界（尚未完成的目录），运行中断或超出时间预算后，下次运行从断点继续遍历
+    每次保存写入新版本后再切换当前版本，保存过程中断时仍保留上一个完整的断点
+    """
+
+    def __init__(self, db_file: Path) -> None:
+        """
+        实例化 Alist2StrmCheckpoint 对象
+
+        :param db_file: 数据库文件路径
+        """
+
+        self.__db = SQLiteDB(str(db_file))
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoint (
+                version INTEGER NOT NULL,
+                dir_path TEXT NOT NULL,
+                modified TEXT,
+                listed INTEGER NOT NULL,
+                PRIMARY KEY (version, dir_path)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """)
+
+    def __version(self) -> int:
+        """
+        获取当前断点版本，没有断点时为 0
+        """
+
+        rows = self.__db.execute(
+            "SELECT value FROM checkpoint_meta WHERE key = 'version'"
+        )
+        return int(rows[0][0]) if rows else 0
+
+    def load(self) -> list[tuple[str, str | None, bool]]:
+        """
+        读取断点
+
+        :return: [(目录路径, 修改时间, 是否已列出)]，没有断点时为空列表
+        """
+
+        rows = self.__db.execute(
+            "SELECT dir_path, modified, listed FROM checkpoint WHERE version = ?",
+            (self.__version(),),
+        )
+        return [
+            (dir_path, modified, bool(listed)) for dir_path, modified, listed in rows
+        ]
+
+    def save(self, entries: list[tuple[str, str | None, bool]]) -> None:
+        """
+        保存断点
+
+        :param entries: [(目录路径, 修改时间, 是否已列出)]
+        """
+
+        old_version = self.__version()
+        version = old_version + 1
+        self.__db.executemany(
+            "INSERT OR REPLACE INTO checkpoint (version, dir_path, modified, listed) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                (version, dir_path, modified, int(listed))
+                for dir_path, modified, listed in entries
+            ),
+        )
+        self.__db.execute(
+            "INSERT OR REPLACE INTO checkpoint_meta (key, value) VALUES ('version', ?)",
+            (str(version),),
+        )
+        self.__db.execute("DELETE FROM checkpoint WHERE version <= ?", (old_version,))
+        logger.debug(f"已保存遍历断点，剩余 {len(entries)} 个目录")
+
+    def clear(self) -> None:
+        """
+        清除断点（完整遍历完成后调用）
+        """
+        self.__db.execute("DELETE FROM checkpoint")
@@ -0,0 +1,147 @@
+from asyncio import to_thread
+from hashlib import new as hashlib_new
+from json import JSONDecodeError, loads
+from os import stat
+from pathlib import Path
+
+from app.core import logger
+from app.utils import SQLiteDB
+from app.modules.alist import AlistEntry
+
+
+class LocalHashIndex:
+    """
+    本地文件哈希索引
+    持久化保存下载文件（字幕、图片、.nfo 等）的内容哈希，与 Alist 返回的 hash_info 比较判断文件内容是否变化
+    本地文件大小和修改时间与记录一致时直接使用记录的哈希，否则重新计算
+    """
+
+    # 按优先级排列的支持的哈希算法（Alist hash_info 中的键）
+    ALGORITHMS: tuple[str, ...] = ("sha1", "md5", "sha256")
+    # 计算哈希时每次读取的字节数
+    CHUNK_SIZE: int = 1024 * 1024
+
+    def __init__(self, db_file: Path) -> None:
+        """
+        实例化 LocalHashIndex 对象
+
+        :param db_file: 数据库文件路径
+        """
+
+        self.__db = SQLiteDB(str(db_file))
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS local_hashes (
+                local_path TEXT NOT NULL,
+                algorithm TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                digest TEXT NOT NULL,
+                PRIMARY KEY (local_path, algorithm)
+            );
+            """)
+
+    @classmethod
+    def remote_hash(cls, path: AlistEntry) -> tuple[str, str] | None:
+        """
+        获取远程文件的哈希信息
+
+        :param path: AlistEntry 对象
+        :return: (哈希算法, 小写十六进制哈希值)，没有支持的哈希信息时返回 None
+        """
+
+        hash_info = path.hash_info
+        if not hash_info and path.hashinfo and path.hashinfo != "null":
+            try:
+                hash_info = loads(path.hashinfo)
+            except JSONDecodeError:
+                return None
+        if not isinstance(hash_info, dict):
+            return None
+
+        for algorithm in cls.ALGORITHMS:
+            digest = hash_info.get(algorithm)
+            if digest:
+                return algorithm, str(digest).lower()
+        return None
+
+    def __hash_file(self, local_path: str, algorithm: str) -> str:
+        """
+        计算本地文件的哈希值（阻塞调用）
+        """
+
+        hasher = hashlib_new(algorithm)
+        with open(local_path, "rb") as file:
+            while chunk := file.read(self.CHUNK_SIZE):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def __local_hash(self, local_path: str, algorithm: str) -> str | None:
+        """
+        获取本地文件的哈希值，文件未变化时使用索引中的记录（阻塞调用）
+        """
+
+        try:
+            local_stat = stat(local_path)
+        except OSError:
+            return None
+
+        rows = self.__db.execute(
+            "SELECT size, mtime, digest FROM local_hashes "
+            "WHERE local_path = ? AND algorithm = ?",
+            (local_path, algorithm),
+        )
+        if rows and rows[0][:2] == (local_stat.st_size, local_stat.st_mtime):
+            return rows[0][2]
+
+        try:
+            digest = self.__hash_file(local_path, algorithm)
+        except OSError as e:
+            logger.warning(f"计算文件 {local_path} 的哈希值失败：{e}")
+            return None
+
+        self.__db.execute(
+            "INSERT OR REPLACE INTO local_hashes "
+            "(local_path, algorithm, size, mtime, digest) VALUES (?, ?, ?, ?, ?)",
+            (local_path, algorithm, local_stat.st_size, local_stat.st_mtime, digest),
+        )
+        return digest
+
+    async def is_unchanged(self, path: AlistEntry, local_path: Path) -> bool:
+        """
+        判断本地文件内容是否与远程文件一致
+
+        :param path: AlistEntry 对象
+        :param local_path: 本地文件路径
+        :return: 远程文件有哈希信息且与本地文件哈希值一致时返回 True
+        """
+
+        remote = self.remote_hash(path)
+        if remote is None:
+            return False
+
+        algorithm, digest = remote
+        return await to_thread(self.__local_hash, str(local_path), algorithm) == digest
+
+    async def update(self, path: AlistEntry, local_path: Path) -> None:
+        """
+        下载完成后更新本地文件的哈希记录
+
+        :param path: AlistEntry 对象
+        :param local_path: 本地文件路径
+        """
+
+        remote = self.remote_hash(path)
+        if remote is not None:
+            await to_thread(self.__local_hash, str(local_path), remote[0])
+
+    def remove(self, local_paths: list[str]) -> None:
+        """
+        删除记录
+
+        :param local_paths: 本地文件路径列表
+        """
+
+        self.__db.executemany(
+            "DELETE FROM local_hashes WHERE local_path = ?",
+            ((local_path,) for local_path in local_paths),
+        )
@@ -0,0 +1,77 @@
+from asyncio import to_thread
+from pathlib import Path
+from time import perf_counter
+from typing import Iterator
+
+from app.core import logger
+from app.utils import FileUtils
+
+
+class LocalIndex:
+    """
+    输出目录的内存快照
+    任务开始时在线程中遍历一次输出目录，之后的文件存在性及过期判断均在内存中完成，避免在事件循环中逐个调用 stat
+    """
+
+    def __init__(self, root: Path, recursive: bool = True, workers: int = 1) -> None:
+        """
+        实例化 LocalIndex 对象
+
+        :param root: 输出目录
+        :param recursive: 是否包含子目录中的文件
+        :param workers: 并行扫描目录的线程数
+        """
+
+        self.root = root
+        self.recursive = recursive
+        self.workers = workers
+        self.__files: dict[str, tuple[int, float]] = {}  # 文件路径 -> (大小, 修改时间)
+
+    async def build(self) -> None:
+        """
+        遍历输出目录建立快照
+        """
+
+        start = perf_counter()
+        self.__files = await to_thread(self.__scan)
+        logger.info(
+            f"本地目录 {self.root} 快照建立完成，共 {len(self.__files)} 个文件，"
+            f"耗时 {perf_counter() - start:.2f} 秒"
+        )
+
+    def __scan(self) -> dict[str, tuple[int, float]]:
+        """
+        遍历输出目录（在线程中执行）
+        """
+
+        if not self.root.is_dir():
+            return {}
+        return {
+            path: (size, mtime)
+            for path, size, mtime in FileUtils.scan_tree(
+                str(self.root), recursive=self.recursive, workers=self.workers
+            )
+        }
+
+    def get(self, path: Path) -> tuple[int, float] | None:
+        """
+        获取快照中文件的大小和修改时间
+
+        :param path: 本地文件路径
+        :return: (大小, 修改时间)，文件不存在时返回 None
+        """
+
+        return self.__files.get(str(path))
+
+    def __contains__(self, path: Path) -> bool:
+        return str(path) in self.__files
+
+    def __len__(self) -> int:
+        return len(self.__files)
+
+    def paths(self) -> Iterator[str]:
+        """
+        快照中的所有文件路径
+        """
+
+        return iter(self.__files)
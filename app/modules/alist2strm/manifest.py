@@ -0,0 +1,251 @@
+from enum import Enum
+from json import dumps
+from pathlib import Path
+
+import numpy as np
+
+from app.core import logger
+from app.utils import SQLiteDB
+from app.modules.alist import AlistEntry
+
+
+class ManifestChange(Enum):
+    """
+    远程文件相对于上次同步记录的变化类型
+    """
+
+    CREATE = "create"  # 新增文件
+    UPDATE = "update"  # 文件已变化
+    UNCHANGED = "unchanged"  # 文件未变化
+
+
+class Alist2StrmManifest:
+    """
+    Alist2Strm 同步清单
+    持久化保存每个远程文件的大小、修改时间、签名、哈希信息及其生成的本地文件
+    每次运行为一个世代（generation），运行结束后未在本世代出现的记录即为服务器中已删除的文件
+    遍历前将所有记录读入内存（只保存远程路径及记录内容的 64 位哈希值），比较时不再逐个查询数据库
+    """
+
+    # 缓冲写入的记录数量，达到后批量提交
+    FLUSH_SIZE: int = 1000
+    # 读取记录时每批的数量
+    LOAD_SIZE: int = 10000
+
+    def __init__(self, db_file: Path) -> None:
+        """
+        实例化 Alist2StrmManifest 对象
+
+        :param db_file: 数据库文件路径
+        """
+
+        self.__db = SQLiteDB(str(db_file))
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS manifest (
+                remote_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                modified TEXT NOT NULL,
+                sign TEXT NOT NULL,
+                hash_info TEXT NOT NULL,
+                local_path TEXT NOT NULL,
+                generation INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS manifest_generation ON manifest (generation);
+            CREATE TABLE IF NOT EXISTS manifest_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            """)
+        self.generation = 0
+        self.__keys = np.empty(0, dtype=np.int64)  # 已排序的远程路径哈希值
+        self.__values = np.empty(0, dtype=np.int64)  # 对应记录内容的哈希值
+        self.__seen: list[tuple[int, str]] = []
+        self.__records: list[tuple] = []
+
+    @staticmethod
+    def __hash_info(path: AlistEntry) -> str:
+        """
+        将哈希信息转换为可比较的字符串
+        """
+        if path.hash_info:
+            return dumps(path.hash_info, sort_keys=True)
+        return path.hashinfo or ""
+
+    @staticmethod
+    def __hash_record(
+        size: int, modified: str, sign: str, hash_info: str, local_path: str
+    ) -> int:
+        """
+        计算记录内容的哈希值（仅在当前进程内有效）
+        """
+        return hash((size, modified, sign, hash_info, local_path))
+
+    def begin(self, resume: bool = False) -> int:
+        """
+        开始新的同步世代
+
+        :param resume: 是否继续上一个未完成的世代（从遍历断点继续时）
+        :return: 当前世代
+        """
+
+        rows = self.__db.execute(
+            "SELECT value FROM manifest_meta WHERE key = 'generation'"
+        )
+        if resume and rows:
+            self.generation = int(rows[0][0])
+            logger.debug(f"同步清单继续第 {self.generation} 世代")
+            return self.generation
+        self.generation = (int(rows[0][0]) if rows else 0) + 1
+        self.__db.execute(
+            "INSERT OR REPLACE INTO manifest_meta (key, value) VALUES ('generation', ?)",
+            (str(self.generation),),
+        )
+        logger.debug(f"同步清单开始第 {self.generation} 世代")
+        return self.generation
+
+    def load(self) -> None:
+        """
+        分批读取所有记录的哈希值（每次运行开始遍历前调用，可在线程池中执行）
+        哈希碰撞概率极低（百万级记录约为 1e-7），碰撞时只会导致文件被误判为未变化或已有记录
+        """
+
+        keys: list[np.ndarray] = []
+        values: list[np.ndarray] = []
+        last = ""
+        while True:
+            rows = self.__db.execute(
+                "SELECT remote_path, size, modified, sign, hash_info, local_path "
+                "FROM manifest WHERE remote_path > ? ORDER BY remote_path LIMIT ?",
+                (last, self.LOAD_SIZE),
+            )
+            if not rows:
+                break
+            keys.append(
+                np.fromiter((hash(row[0]) for row in rows), np.int64, len(rows))
+            )
+            values.append(
+                np.fromiter(
+                    (self.__hash_record(*row[1:]) for row in rows), np.int64, len(rows)
+                )
+            )
+            last = rows[-1][0]
+
+        if not keys:
+            self.__keys = self.__values = np.empty(0, dtype=np.int64)
+            return
+        all_keys = np.concatenate(keys)
+        order = np.argsort(all_keys)
+        self.__keys = all_keys[order]
+        self.__values = np.concatenate(values)[order]
+        logger.debug(f"同步清单已读取 {len(self.__keys)} 条记录")
+
+    def compare(self, path: AlistEntry, local_path: Path) -> ManifestChange:
+        """
+        比较远程文件与同步清单中的记录（读取自 load），并将已有记录标记为本世代已出现
+
+        :param path: AlistEntry 对象
+        :param local_path: 远程文件对应的本地文件路径
+        :return: 变化类型
+        """
+
+        key = hash(path.full_path)
+        index = int(np.searchsorted(self.__keys, key))
+        if index >= len(self.__keys) or int(self.__keys[index]) != key:
+            return ManifestChange.CREATE
+
+        self.__seen.append((self.generation, path.full_path))
+        if len(self.__seen) >= self.FLUSH_SIZE:
+            self.flush()
+
+        if int(self.__values[index]) != self.__hash_record(
+            path.size,
+            path.modified,
+            path.sign,
+            self.__hash_info(path),
+            str(local_path),
+        ):
+            return ManifestChange.UPDATE
+        return ManifestChange.UNCHANGED
+
+    def record(self, path: AlistEntry, local_path: Path) -> None:
+        """
+        记录已成功处理的远程文件
+
+        :param path: AlistEntry 对象
+        :param local_path: 生成的本地文件路径
+        """
+
+        self.__records.append(
+            (
+                path.full_path,
+                path.size,
+                path.modified,
+                path.sign,
+                self.__hash_info(path),
+                str(local_path),
+                self.generation,
+            )
+        )
+        if len(self.__records) >= self.FLUSH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        提交缓冲的记录
+        """
+
+        if self.__seen:
+            self.__db.executemany(
+                "UPDATE manifest SET generation = ? WHERE remote_path = ?",
+                self.__seen,
+            )
+            self.__seen = []
+        if self.__records:
+            self.__db.executemany(
+                "INSERT OR REPLACE INTO manifest "
+                "(remote_path, size, modified, sign, hash_info, local_path, generation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self.__records,
+            )
+            self.__records = []
+
+    def keep(self, dir_paths: list[str]) -> None:
+        """
+        将目录下的所有记录标记为本世代已出现（本次运行跳过遍历的目录）
+
+        :param dir_paths: 远程目录路径列表
+        """
+
+        self.flush()
+        # "0" 是 "/" 的下一个字符，范围查询可以使用主键索引
+        self.__db.executemany(
+            "UPDATE manifest SET generation = ? "
+            "WHERE remote_path >= ? AND remote_path < ?",
+            ((self.generation, f"{path}/", f"{path}0") for path in dir_paths),
+        )
+
+    def deleted(self) -> list[tuple[str, Path]]:
+        """
+        获取本世代未出现的记录（服务器中已删除的文件）
+
+        :return: [(远程路径, 本地文件路径)]
+        """
+
+        self.flush()
+        rows = self.__db.execute(
+            "SELECT remote_path, local_path FROM manifest WHERE generation < ?",
+            (self.generation,),
+        )
+        return [(remote_path, Path(local_path)) for remote_path, local_path in rows]
+
+    def remove(self, remote_paths: list[str]) -> None:
+        """
+        删除记录
+
+        :param remote_paths: 远程路径列表
+        """
+
+        self.__db.executemany(
+            "DELETE FROM manifest WHERE remote_path = ?",
+            ((remote_path,) for remote_path in remote_paths),
+        )
@@ -17,4 +17,28 @@ class Alist2StrmMode(Enum):
         :return: Alist2StrmMode 枚举值
         例如，"alisturl" 将返回 Alist2StrmMode.AlistURL
         """
-        return cls[mode_str.upper()] if mode_str.upper() in cls.__members__ else cls.AlistURL
\ No newline at end of file
+        for mode in cls:
+            if mode.name.upper() == mode_str.upper():
+                return mode
+        return cls.AlistURL
+
+class Alist2StrmListingMode(Enum):
+    """
+    模块 alist2strm 枚举远程文件的方式
+    """
+    List = "List"  # 递归列出目录
+    Search = "Search"  # 通过 Alist 搜索索引获取文件，仅列出有变化的目录
+    WebDAV = "WebDAV"  # 通过 WebDAV（PROPFIND）递归列出目录
+
+    @classmethod
+    def from_str(cls, mode_str: str) -> "Alist2StrmListingMode":
+        """
+        从字符串转换为 Alist2StrmListingMode 枚举
+        如果字符串不匹配任何枚举值，则返回 List 模式
+        :param mode_str: 模式字符串
+        :return: Alist2StrmListingMode 枚举值
+        """
+        for mode in cls:
+            if mode.name.upper() == mode_str.upper():
+                return mode
+        return cls.List
@@ -0,0 +1,189 @@
+from fnmatch import translate
+from re import compile as re_compile, Pattern
+from typing import Iterable
+
+from app.extensions import VIDEO_EXTS
+from app.modules.alist import AlistEntry
+
+
+class PathRules:
+    """
+    路径匹配规则集合
+    规则为 glob 通配符或以 "re:" 开头的正则表达式，包含 "/" 的规则匹配完整路径，否则匹配文件/目录名
+    同类规则在实例化时合并编译为一个正则表达式，每次匹配最多执行四次正则匹配
+    """
+
+    REGEX_PREFIX: str = "re:"
+
+    def __init__(self, patterns: Iterable[str] | str | None = None) -> None:
+        """
+        实例化 PathRules 对象
+
+        :param patterns: 规则列表，也可以是使用西文半角逗号分割的字符串
+        """
+
+        if patterns is None:
+            patterns = []
+        elif isinstance(patterns, str):
+            patterns = patterns.split(",")
+
+        name_globs: list[str] = []
+        name_regexes: list[str] = []
+        path_globs: list[str] = []
+        path_regexes: list[str] = []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern:
+                continue
+            if pattern.startswith(self.REGEX_PREFIX):
+                regex = pattern[len(self.REGEX_PREFIX) :]
+                (path_regexes if "/" in regex else name_regexes).append(regex)
+            else:
+                (path_globs if "/" in pattern else name_globs).append(
+                    translate(pattern)
+                )
+
+        self.__name_glob = self.__compile(name_globs)
+        self.__name_regex = self.__compile(name_regexes)
+        self.__path_glob = self.__compile(path_globs)
+        self.__path_regex = self.__compile(path_regexes)
+
+    @staticmethod
+    def __compile(patterns: list[str]) -> Pattern | None:
+        """
+        将多个正则表达式合并编译为一个
+        """
+        if not patterns:
+            return None
+        return re_compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+    def __bool__(self) -> bool:
+        return any(
+            (self.__name_glob, self.__name_regex, self.__path_glob, self.__path_regex)
+        )
+
+    def match(self, name: str, full_path: str) -> bool:
+        """
+        判断文件/目录是否匹配任意一条规则
+
+        :param name: 文件/目录名
+        :param full_path: 完整路径
+        """
+
+        return bool(
+            (self.__name_glob and self.__name_glob.match(name))
+            or (self.__name_regex and self.__name_regex.search(name))
+            or (self.__path_glob and self.__path_glob.match(full_path))
+            or (self.__path_regex and self.__path_regex.search(full_path))
+        )
+
+
+class Alist2StrmRules:
+    """
+    Alist2Strm 包含/排除规则
+    目录规则在列出目录前剪枝整个子树，文件规则使用预编译的匹配器判断
+    优先目录规则按顺序决定目录的遍历优先级
+    """
+
+    # 默认排除的目录（系统、回收站目录）
+    DEFAULT_EXCLUDE_DIRS: tuple[str, ...] = (
+        "@eaDir",
+        "#recycle",
+        ".recycle",
+        "$RECYCLE.BIN",
+    )
+    # 默认排除的文件
+    DEFAULT_EXCLUDE_FILES: tuple[str, ...] = ("Thumbs.db", ".DS_Store")
+
+    def __init__(
+        self,
+        exts: Iterable[str],
+        exclude_dirs: Iterable[str] | str | None = None,
+        include_files: Iterable[str] | str | None = None,
+        exclude_files: Iterable[str] | str | None = None,
+        min_size: float = 0,
+        max_size: float = 0,
+        priority_dirs: Iterable[str] | str | None = None,
+    ) -> None:
+        """
+        实例化 Alist2StrmRules 对象
+
+        :param exts: 需要处理的文件后缀
+        :param exclude_dirs: 排除的目录规则，匹配的目录不会被列出
+        :param include_files: 包含的文件规则，设置后仅处理匹配的文件
+        :param exclude_files: 排除的文件规则
+        :param min_size: 视频文件最小大小（单位 MB），为 0 时不限制
+        :param max_size: 视频文件最大大小（单位 MB），为 0 时不限制
+        :param priority_dirs: 优先遍历的目录规则，越靠前的规则优先级越高
+        """
+
+        self.exts = frozenset(ext.lower() for ext in exts)
+        self.exclude_dirs = PathRules(
+            [*self.DEFAULT_EXCLUDE_DIRS, *self.__to_list(exclude_dirs)]
+        )
+        self.include_files = PathRules(include_files)
+        self.exclude_files = PathRules(
+            [*self.DEFAULT_EXCLUDE_FILES, *self.__to_list(exclude_files)]
+        )
+        self.min_size = int(min_size * 1024 * 1024)
+        self.max_size = int(max_size * 1024 * 1024)
+        self.priority_dirs = [
+            PathRules([pattern])
+            for pattern in self.__to_list(priority_dirs)
+            if pattern.strip()
+        ]
+
+    @staticmethod
+    def __to_list(patterns: Iterable[str] | str | None) -> list[str]:
+        if patterns is None:
+            return []
+        if isinstance(patterns, str):
+            return patterns.split(",")
+        return list(patterns)
+
+    def allow_dir(self, path: AlistEntry) -> bool:
+        """
+        判断是否需要列出该目录
+
+        :param path: 目录的 AlistEntry 对象
+        """
+
+        return not self.exclude_dirs.match(path.name, path.full_path)
+
+    def dir_priority(self, name: str, full_path: str) -> int:
+        """
+        获取目录的优先级
+
+        :param name: 目录名
+        :param full_path: 目录完整路径
+        :return: 第一条匹配的优先目录规则的序号，不匹配任何规则时为规则数量，越小越优先
+        """
+
+        for index, rules in enumerate(self.priority_dirs):
+            if rules.match(name, full_path):
+                return index
+        return len(self.priority_dirs)
+
+    def allow_file(self, path: AlistEntry) -> bool:
+        """
+        判断是否需要处理该文件
+
+        :param path: 文件的 AlistEntry 对象
+        """
+
+        suffix = path.suffix.lower()
+        if suffix not in self.exts:
+            return False
+
+        if suffix in VIDEO_EXTS:
+            if self.min_size and path.size < self.min_size:
+                return False
+            if self.max_size and path.size > self.max_size:
+                return False
+
+        if self.include_files and not self.include_files.match(
+            path.name, path.full_path
+        ):
+            return False
+
+        return not self.exclude_files.match(path.name, path.full_path)
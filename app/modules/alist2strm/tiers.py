@@ -0,0 +1,155 @@
+from pathlib import Path
+from time import time
+
+from app.core import logger
+from app.utils import SQLiteDB
+from app.modules.alist import AlistEntry
+
+
+class Alist2StrmTiers:
+    """
+    目录冷热分层
+    记录每个目录的内容最近一次变化的时间（子项的最新修改时间，或子项数量变化时的当前时间），并传递给所有上级目录
+    最近变化在 hot_days 天内的目录为热目录，每次运行都会列出并要求 Alist 刷新缓存
+    其余为冷目录，距上次列出超过 cold_interval 秒才会再次列出，且不刷新缓存
+    """
+
+    def __init__(
+        self,
+        db_file: Path,
+        root: str,
+        hot_days: float = 7,
+        cold_interval: int = 86400,
+    ) -> None:
+        """
+        实例化 Alist2StrmTiers 对象
+
+        :param db_file: 数据库文件路径
+        :param root: 遍历的根目录，变化时间向上传递到该目录为止
+        :param hot_days: 内容在该天数内有变化的目录为热目录
+        :param cold_interval: 冷目录的最小遍历间隔，单位为秒
+        """
+
+        self.__db = SQLiteDB(str(db_file))
+        self.__db.executescript("""
+            CREATE TABLE IF NOT EXISTS dir_tiers (
+                dir_path TEXT PRIMARY KEY,
+                last_change REAL NOT NULL,
+                last_visit REAL NOT NULL,
+                count INTEGER NOT NULL
+            );
+            """)
+        self.root = root
+        self.hot_seconds = hot_days * 86400
+        self.cold_interval = cold_interval
+        self.__now = time()
+        # 目录路径 -> [最近变化时间, 最近列出时间, 子项数量]
+        self.__dirs: dict[str, list] = {}
+        # 正在列出的目录 -> [子项最新修改时间, 子项数量]
+        self.__listing: dict[str, list] = {}
+        self.__dirty: set[str] = set()
+
+    def load(self) -> None:
+        """
+        读取所有目录的分层信息（每次运行开始时调用）
+        """
+
+        self.__now = time()
+        self.__dirs = {
+            dir_path: [last_change, last_visit, count]
+            for dir_path, last_change, last_visit, count in self.__db.execute(
+                "SELECT dir_path, last_change, last_visit, count FROM dir_tiers"
+            )
+        }
+        self.__listing = {}
+        self.__dirty = set()
+        hot = sum(1 for dir_path in self.__dirs if self.is_hot(dir_path))
+        logger.info(f"目录分层：{hot} 个热目录，{len(self.__dirs) - hot} 个冷目录")
+
+    def is_hot(self, dir_path: str) -> bool:
+        """
+        判断目录是否为热目录，未记录的目录不是热目录
+
+        :param dir_path: 目录路径
+        :return: 是否为热目录
+        """
+
+        state = self.__dirs.get(dir_path)
+        return state is not None and self.__now - state[0] < self.hot_seconds
+
+    def should_visit(self, dir_path: str) -> bool:
+        """
+        判断本次运行是否需要列出目录：未记录的目录和热目录总是列出，冷目录距上次列出超过间隔时列出
+
+        :param dir_path: 目录路径
+        :return: 是否需要列出
+        """
+
+        state = self.__dirs.get(dir_path)
+        if state is None or self.is_hot(dir_path):
+            return True
+        return self.__now - state[1] >= self.cold_interval
+
+    def observe(self, path: AlistEntry) -> None:
+        """
+        记录正在列出的目录中的子项
+        缺少或无法解析修改时间的子项（如 WebDAV 未返回 getlastmodified）只计入子项数量
+
+        :param path: 子项的 AlistEntry 对象
+        """
+
+        dir_path = path.full_path[: -len(path.name) - 1] or "/"
+        stats = self.__listing.get(dir_path)
+        if stats is None:
+            stats = self.__listing[dir_path] = [0.0, 0]
+        stats[1] += 1
+        if not path.modified:
+            return
+        try:
+            stats[0] = max(stats[0], path.modified_timestamp)
+        except ValueError:
+            pass
+
+    def finish(self, dir_path: str) -> None:
+        """
+        目录列出完成，更新该目录及其上级目录的最近变化时间
+
+        :param dir_path: 目录路径
+        """
+
+        newest, count = self.__listing.pop(dir_path, (0.0, 0))
+        state = self.__dirs.get(dir_path)
+        last_change = newest
+        if state is not None:
+            last_change = max(state[0], newest)
+            if count != state[2]:
+                last_change = self.__now
+        self.__dirs[dir_path] = [last_change, self.__now, count]
+        self.__dirty.add(dir_path)
+
+        parent = dir_path
+        while len(parent) > len(self.root):
+            parent = parent[: parent.rfind("/")] or "/"
+            state = self.__dirs.get(parent)
+            if state is None or state[0] >= last_change:
+                break
+            state[0] = last_change
+            self.__dirty.add(parent)
+
+    def flush(self) -> None:
+        """
+        保存本次运行中更新的分层信息
+        """
+
+        if not self.__dirty:
+            return
+        self.__db.executemany(
+            "INSERT OR REPLACE INTO dir_tiers (dir_path, last_change, last_visit, count) "
+            "VALUES (?, ?, ?, ?)",
+            (
+                (dir_path, *self.__dirs[dir_path])
+                for dir_path in self.__dirty
+                if dir_path in self.__dirs
+            ),
+        )
+        self.__dirty = set()
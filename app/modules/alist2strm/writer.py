@@ -0,0 +1,150 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from os import getpid, makedirs, replace, unlink
+from os.path import dirname, isdir
+from pathlib import Path
+from re import compile as re_compile
+from threading import Lock, get_ident
+from typing import Iterable
+
+
+class StrmWriter:
+    """
+    .strm 文件批量写入器
+    一批文件在线程池中一次写完：按目录分组并缓存已存在的目录，先写入临时文件再原子重命名，内容未变化的文件跳过写入
+    """
+
+    # 每批最多写入的文件数
+    BATCH_SIZE: int = 256
+    # 临时文件名后缀：.{进程号}.{线程号}.tmp
+    TMP_PATTERN = re_compile(r"\.\d+\.\d+\.tmp$")
+
+    def __init__(self, workers: int = 4) -> None:
+        """
+        实例化 StrmWriter 对象
+
+        :param workers: 写入线程数
+        """
+
+        self.workers = max(1, workers)
+        self.__executor: ThreadPoolExecutor | None = None
+        self.__dirs: set[str] = set()  # 已确认存在的目录
+        # 本次运行中新建的目录，其中的文件无需比较内容
+        self.__created_dirs: set[str] = set()
+        self.__lock = Lock()
+
+    async def write_batch(
+        self, items: Iterable[tuple[Path, str]]
+    ) -> list[tuple[Path, bool | Exception]]:
+        """
+        在线程池中写入一批 .strm 文件
+
+        :param items: [(本地文件路径, 文件内容)]
+        :return: [(本地文件路径, 结果)]，结果为 True 表示已写入，False 表示内容未变化，异常表示写入失败
+        """
+
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="strm-writer"
+            )
+        return await get_running_loop().run_in_executor(
+            self.__executor, self.__write_batch, list(items)
+        )
+
+    @classmethod
+    def is_temp_file(cls, name: str) -> bool:
+        """
+        判断文件是否为写入过程中的临时文件
+
+        :param name: 文件名
+        :return: 是否为临时文件
+        """
+        return cls.TMP_PATTERN.search(name) is not None
+
+    def close(self) -> None:
+        """
+        关闭线程池并清除目录缓存（每次运行结束时调用），运行之间被删除的目录下次写入时重新创建
+        """
+
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        with self.__lock:
+            self.__dirs.clear()
+            self.__created_dirs.clear()
+
+    def __ensure_dir(self, dir_path: str) -> bool:
+        """
+        确保目录存在（在线程中执行）
+
+        :return: 目录是否为本次运行中新建
+        """
+
+        if dir_path in self.__dirs:
+            return dir_path in self.__created_dirs
+        created = not isdir(dir_path)
+        if created:
+            makedirs(dir_path, exist_ok=True)
+        with self.__lock:
+            self.__dirs.add(dir_path)
+            if created:
+                self.__created_dirs.add(dir_path)
+        return created
+
+    @staticmethod
+    def __write_file(path: str, data: bytes) -> None:
+        """
+        写入文件，所在目录在缓存后被删除时重新创建目录并重试一次
+        """
+
+        try:
+            with open(path, "wb") as file:
+                file.write(data)
+        except FileNotFoundError:
+            makedirs(dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(data)
+
+    @staticmethod
+    def __is_identical(path: str, data: bytes) -> bool:
+        """
+        判断已有文件内容是否与待写入内容相同
+        """
+
+        try:
+            with open(path, "rb") as file:
+                return file.read(len(data) + 1) == data
+        except OSError:
+            return False
+
+    def __write_batch(
+        self, items: list[tuple[Path, str]]
+    ) -> list[tuple[Path, bool | Exception]]:
+        """
+        写入一批 .strm 文件（在线程中执行）
+        """
+
+        results: list[tuple[Path, bool | Exception]] = []
+        suffix = f".{getpid()}.{get_ident()}.tmp"
+        for local_path, content in sorted(items, key=lambda item: str(item[0])):
+            path = str(local_path)
+            tmp_path = ""
+            try:
+                new_dir = self.__ensure_dir(dirname(path))
+                data = content.encode("utf-8")
+                if not new_dir and self.__is_identical(path, data):
+                    results.append((local_path, False))
+                    continue
+
+                tmp_path = path + suffix
+                self.__write_file(tmp_path, data)
+                replace(tmp_path, path)
+                results.append((local_path, True))
+            except Exception as e:
+                if tmp_path:
+                    try:
+                        unlink(tmp_path)
+                    except OSError:
+                        pass
+                results.append((local_path, e))
+        return results
@@ -6,6 +6,11 @@ from app.utils.singleton import Singleton
 from app.utils.multiton import Multiton
 from app.utils.strings import StringsUtils
 from app.utils.photo import PhotoUtils
+from app.utils.sqlite import SQLiteDB
+from app.utils.files import FileUtils
+from app.utils.ratelimit import AdaptiveLimiter
+from app.utils.jsonstream import JSONUtils, JSONArrayStream
+from app.utils.pathset import PathHashSet
 
 __all__ = [
     RequestUtils,
@@ -17,4 +22,10 @@ __all__ = [
     Multiton,
     StringsUtils,
     PhotoUtils,
+    SQLiteDB,
+    FileUtils,
+    AdaptiveLimiter,
+    JSONUtils,
+    JSONArrayStream,
+    PathHashSet,
 ]
@@ -0,0 +1,190 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from os import rmdir, scandir, sep, unlink
+from os.path import dirname
+from typing import Iterable, Iterator
+
+
+class FileUtils:
+    """
+    本地文件相关工具
+    """
+
+    # 并行文件操作的默认线程数
+    WORKERS: int = 8
+    # 批量删除时每批文件数
+    BATCH_SIZE: int = 256
+
+    @staticmethod
+    def __scan_dir(path: str) -> tuple[list[tuple[str, int, float]], list[str]]:
+        """
+        列出单个目录中的文件及子目录，无法访问的目录返回空结果
+        """
+
+        files: list[tuple[str, int, float]] = []
+        dirs: list[str] = []
+        try:
+            with scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files.append((entry.path, stat.st_size, stat.st_mtime))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return files, dirs
+
+    @staticmethod
+    def scan_dir(path: str) -> list[tuple[str, bool, int, float]]:
+        """
+        列出单个目录中的文件及子目录的名称、大小和修改时间（阻塞调用，应在线程中执行）
+        不跟随符号链接目录，无法读取信息的子项会被跳过
+
+        :param path: 目录路径
+        :return: [(名称, 是否为目录, 大小, 修改时间)]
+        :raises OSError: 目录不存在或无法访问
+        """
+
+        items: list[tuple[str, bool, int, float]] = []
+        with scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        items.append((entry.name, True, 0, stat.st_mtime))
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        items.append((entry.name, False, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+        return items
+
+    @classmethod
+    def list_dir(cls, path: str) -> tuple[list[str], list[str]]:
+        """
+        列出单个目录中的文件及子目录（阻塞调用，应在线程中执行）
+        不跟随符号链接目录，目录不存在或无法访问时返回空结果
+
+        :param path: 目录路径
+        :return: (文件路径列表, 子目录路径列表)
+        """
+
+        files, dirs = cls.__scan_dir(path)
+        return [file[0] for file in files], dirs
+
+    @classmethod
+    def scan_tree(
+        cls, root: str, recursive: bool = True, workers: int = 1
+    ) -> Iterator[tuple[str, int, float]]:
+        """
+        使用 os.scandir 遍历目录下的所有文件（阻塞调用，应在线程中执行）
+        不跟随符号链接目录，无法访问的目录会被跳过
+
+        :param root: 根目录
+        :param recursive: 是否遍历子目录
+        :param workers: 并行扫描目录的线程数，网络存储等高延迟文件系统上可显著加快遍历
+        :return: (文件路径, 文件大小, 修改时间) 生成器
+        """
+
+        if workers <= 1 or not recursive:
+            stack = [root]
+            while stack:
+                files, dirs = cls.__scan_dir(stack.pop())
+                yield from files
+                if recursive:
+                    stack.extend(dirs)
+            return
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="scandir"
+        ) as executor:
+            pending: set[Future] = {executor.submit(cls.__scan_dir, root)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, dirs = future.result()
+                    pending.update(executor.submit(cls.__scan_dir, d) for d in dirs)
+                    yield from files
+
+    @staticmethod
+    def __unlink_batch(paths: list[str]) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        删除一批文件，已不存在的文件会被跳过
+        """
+
+        deleted: list[str] = []
+        failed: list[tuple[str, str]] = []
+        for path in paths:
+            try:
+                unlink(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                failed.append((path, str(e)))
+                continue
+            deleted.append(path)
+        return deleted, failed
+
+    @classmethod
+    def delete_files(
+        cls, paths: Iterable[str], workers: int = WORKERS
+    ) -> tuple[list[str], list[tuple[str, str]]]:
+        """
+        使用线程池分批删除文件（阻塞调用，应在线程中执行）
+
+        :param paths: 文件路径
+        :param workers: 线程数
+        :return: (已删除的文件路径列表, [(删除失败的文件路径, 错误信息)])
+        """
+
+        paths = list(paths)
+        batches = [
+            paths[i : i + cls.BATCH_SIZE] for i in range(0, len(paths), cls.BATCH_SIZE)
+        ]
+        deleted: list[str] = []
+        failed: list[tuple[str, str]] = []
+        if not batches:
+            return deleted, failed
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(workers, len(batches))),
+            thread_name_prefix="unlink",
+        ) as executor:
+            for batch_deleted, batch_failed in executor.map(
+                cls.__unlink_batch, batches
+            ):
+                deleted.extend(batch_deleted)
+                failed.extend(batch_failed)
+        return deleted, failed
+
+    @staticmethod
+    def prune_empty_dirs(files: Iterable[str], root: str) -> list[str]:
+        """
+        自底向上删除给定文件所在的空目录（阻塞调用，应在线程中执行）
+        收集所有祖先目录后按深度从深到浅各尝试删除一次，不会删除 root 本身
+
+        :param files: 已删除的文件路径
+        :param root: 根目录
+        :return: 已删除的目录列表
+        """
+
+        root = root.rstrip(sep)
+        prefix = root + sep
+        candidates: set[str] = set()
+        for path in files:
+            parent = dirname(path)
+            while parent.startswith(prefix) and parent not in candidates:
+                candidates.add(parent)
+                parent = dirname(parent)
+
+        removed: list[str] = []
+        for path in sorted(candidates, key=lambda p: p.count(sep), reverse=True):
+            try:
+                rmdir(path)  # 目录不为空时抛出 OSError
+            except OSError:
+                continue
+            removed.append(path)
+        return removed
@@ -1,4 +1,4 @@
-from typing import Any, Literal, overload
+from typing import Any, AsyncContextManager, Literal, overload
 from pathlib import Path
 from os import makedirs
 from asyncio import TaskGroup, to_thread
@@ -120,6 +120,18 @@ class HTTPClient:
         else:
             return self._async_request(method, url, **kwargs)
 
+    def stream(self, method: str, url: str, **kwargs) -> AsyncContextManager[Response]:
+        """
+        发起流式异步 HTTP 请求，响应体需要在上下文中通过 aiter_bytes 等方法逐块读取
+
+        :param method: HTTP 方法，如 get, post, put 等
+        :param url: 请求的 URL
+        :param kwargs: 其他请求参数，如 headers, cookies 等
+        :return: HTTP 响应对象的异步上下文管理器
+        """
+        kwargs["headers"] = kwargs.get("headers", self.HEADERS)
+        return self.__async_client.stream(method, url, **kwargs)
+
     @overload
     def head(self, url: str, *, sync: Literal[True], **kwargs) -> Response | None: ...
 
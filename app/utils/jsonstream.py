@@ -0,0 +1,137 @@
+from codecs import getincrementaldecoder
+from json import JSONDecoder, JSONDecodeError, loads as json_loads
+from re import compile as re_compile
+from typing import Any
+
+try:
+    from orjson import loads as orjson_loads
+except ImportError:
+    orjson_loads = None
+
+
+class JSONUtils:
+    """
+    JSON 相关工具
+    """
+
+    @staticmethod
+    def loads(data: bytes | str) -> Any:
+        """
+        解析 JSON，已安装 orjson 时使用 orjson
+
+        :param data: JSON 字节串或字符串
+        :return: 解析结果
+        """
+        if orjson_loads is not None:
+            return orjson_loads(data)
+        return json_loads(data)
+
+
+class JSONArrayStream:
+    """
+    JSON 数组增量解码器
+    逐块输入响应体，在数据到达时逐个解析指定键下数组的元素，解析完成的元素立即返回并从缓冲区中丢弃
+    内存占用取决于单个元素大小而非数组长度，数组之外的字段在输入结束后解析为 result
+    """
+
+    SEARCHING: int = 0  # 查找数组键
+    IN_ARRAY: int = 1  # 解析数组元素
+    AFTER_ARRAY: int = 2  # 数组已结束
+    NO_ARRAY: int = 3  # 键对应的值不是数组（如 null）
+
+    __SEPARATOR = re_compile(r"[\s,]*")
+
+    def __init__(self, key: str) -> None:
+        """
+        实例化 JSONArrayStream 对象
+
+        :param key: 数组对应的键，使用响应体中第一次出现的该键
+        """
+
+        self.__key = re_compile(rf'"{key}"\s*:\s*')
+        self.__decoder = JSONDecoder()
+        self.__text_decoder = getincrementaldecoder("utf-8")()
+        self.__buffer = ""
+        self.__prefix = ""
+        self.__state = self.SEARCHING
+        self.count = 0  # 已解析的元素数量
+        self.result: Any = None  # 数组之外的字段（数组替换为空列表）
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """
+        输入响应体的一块数据
+
+        :param chunk: 字节数据
+        :return: 本次解析完成的数组元素列表
+        """
+
+        self.__buffer += self.__text_decoder.decode(chunk)
+        return self.__parse(final=False)
+
+    def close(self) -> list[Any]:
+        """
+        结束输入，解析剩余数据及数组之外的字段
+
+        :return: 剩余的数组元素列表
+        """
+
+        self.__buffer += self.__text_decoder.decode(b"", final=True)
+        items = self.__parse(final=True)
+
+        if self.__state == self.SEARCHING:
+            self.result = json_loads(self.__buffer)
+        elif self.__state == self.NO_ARRAY:
+            self.result = json_loads(self.__prefix + self.__buffer)
+        elif self.__state == self.AFTER_ARRAY:
+            self.result = json_loads(self.__prefix + "[]" + self.__buffer)
+        else:
+            raise JSONDecodeError("数组未结束", self.__buffer, len(self.__buffer))
+
+        self.__buffer = self.__prefix = ""
+        return items
+
+    def __parse(self, final: bool) -> list[Any]:
+        """
+        解析缓冲区中完整的数组元素
+        """
+
+        items: list[Any] = []
+
+        if self.__state == self.SEARCHING:
+            match = self.__key.search(self.__buffer)
+            if match is None:
+                return items
+            if match.end() >= len(self.__buffer) and not final:
+                return items  # 还不能确定值的类型
+            self.__prefix = self.__buffer[: match.end()]
+            if self.__buffer.startswith("[", match.end()):
+                self.__state = self.IN_ARRAY
+                self.__buffer = self.__buffer[match.end() + 1 :]
+            else:
+                self.__state = self.NO_ARRAY
+                self.__buffer = self.__buffer[match.end() :]
+
+        if self.__state != self.IN_ARRAY:
+            return items
+
+        buffer = self.__buffer
+        pos = 0
+        while True:
+            pos = self.__SEPARATOR.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.__state = self.AFTER_ARRAY
+                pos += 1
+                break
+            try:
+                item, pos = self.__decoder.raw_decode(buffer, pos)
+            except JSONDecodeError:
+                if final:
+                    raise
+                break  # 元素不完整，等待更多数据
+            items.append(item)
+
+        self.count += len(items)
+        self.__buffer = buffer[pos:]
+        return items
@@ -0,0 +1,86 @@
+from array import array
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+class PathHashSet:
+    """
+    紧凑的路径集合
+    只保存路径字符串的 64 位哈希值（每个路径 8 字节），添加时追加到数组，查询前排序去重后使用二分查找
+    哈希值来自 hash(str)，仅在当前进程内有效，不能持久化；哈希碰撞概率极低（百万级路径约为 1e-7），
+    碰撞时只会导致本应删除的文件被保留
+    """
+
+    def __init__(self, paths: Iterable[str] = ()) -> None:
+        """
+        实例化 PathHashSet 对象
+
+        :param paths: 初始路径
+        """
+
+        self.__pending = array("q")  # 尚未合并的哈希值
+        self.__sorted = np.empty(0, dtype=np.int64)  # 已排序去重的哈希值
+        for path in paths:
+            self.add(path)
+
+    def add(self, path: str) -> None:
+        """
+        添加路径
+
+        :param path: 路径字符串
+        """
+        self.__pending.append(hash(path))
+
+    def __merge(self) -> np.ndarray:
+        """
+        将新添加的哈希值合并到已排序数组中
+        """
+
+        if self.__pending:
+            merged = np.concatenate(
+                (self.__sorted, np.frombuffer(self.__pending, dtype=np.int64))
+            )
+            self.__sorted = np.unique(merged)  # np.unique 返回排序后的结果
+            self.__pending = array("q")
+        return self.__sorted
+
+    def __contains__(self, path: str) -> bool:
+        hashes = self.__merge()
+        key = hash(path)
+        index = int(np.searchsorted(hashes, key))
+        return index < len(hashes) and int(hashes[index]) == key
+
+    def __len__(self) -> int:
+        return len(self.__merge())
+
+    def difference(self, paths: Iterable[str]) -> Iterator[str]:
+        """
+        返回不在集合中的路径（批量计算哈希并向量化查找）
+
+        :param paths: 路径字符串
+        :return: 不在集合中的路径生成器
+        """
+
+        hashes = self.__merge()
+        paths = list(paths)
+        if not paths:
+            return iter(())
+        keys = np.fromiter(
+            (hash(path) for path in paths), dtype=np.int64, count=len(paths)
+        )
+        # 先对待查哈希排序，二分查找时按顺序访问已排序数组，缓存命中率更高
+        order = np.argsort(keys)
+        sorted_keys = keys[order]
+        indexes = np.searchsorted(hashes, sorted_keys)
+        found = np.zeros(len(keys), dtype=bool)
+        in_range = indexes < len(hashes)
+        found[order[in_range]] = hashes[indexes[in_range]] == sorted_keys[in_range]
+        return (paths[index] for index in np.flatnonzero(~found).tolist())
+
+    @property
+    def nbytes(self) -> int:
+        """
+        哈希值占用的字节数
+        """
+        return self.__sorted.nbytes + self.__pending.itemsize * len(self.__pending)
@@ -0,0 +1,281 @@
+from asyncio import Future, get_running_loop, sleep
+from time import monotonic
+from typing import Hashable
+
+from app.core.log import logger
+from app.utils.url import URLUtils
+
+
+class AdaptiveLimiter:
+    """
+    自适应限流器
+    令牌桶限制请求速率，AIMD 控制并发数：延迟正常时逐步提高并发，遇到 429/5xx/超时时并发减半并暂停请求
+    同一服务器（域名 + 端口）的所有任务及 AlistClient 共享同一个限流器
+    任务运行期间登记自身的限流参数，限流器使用限流器自身设置与所有正在运行的任务中最严格的限制，任务结束后不再生效
+    所有任务结束后清除错误暂停状态，下次运行不会延续上次运行的暂停
+    设置上级限流器时请求需要同时获取两者的许可，例如存储器限流器嵌套在服务器限流器中，服务器的总并发数仍受限制
+    """
+
+    __limiters: dict[str, "AdaptiveLimiter"] = {}
+
+    # 初始并发数
+    INITIAL_CONCURRENCY: int = 4
+    # 默认最大并发数
+    MAX_CONCURRENCY: int = 32
+    # 延迟超过基准延迟的倍数时视为服务器繁忙
+    LATENCY_TOLERANCE: float = 3.0
+    # 出错后的初始暂停时间及最大暂停时间（单位秒）
+    BACKOFF: float = 1.0
+    MAX_BACKOFF: float = 60.0
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int | None = None,
+        parent: "AdaptiveLimiter | None" = None,
+    ) -> None:
+        """
+        实例化 AdaptiveLimiter 对象
+
+        :param name: 限流器名称（用于日志）
+        :param max_concurrency: 最大并发数上限，为 None 时使用 MAX_CONCURRENCY
+        :param parent: 上级限流器，请求同时占用上级限流器的许可
+        """
+
+        self.name = name
+        self.parent = parent
+        self.max_concurrency = max_concurrency or self.MAX_CONCURRENCY
+        self.min_interval = 0.0  # 请求最小间隔（单位秒），为 0 时不限制速率
+
+        # 限流器自身的限制，与已登记任务的限制共同决定 max_concurrency 及 min_interval
+        self.__base: tuple[int, float] = (self.max_concurrency, 0.0)
+        # 正在运行的任务 -> (最大并发数, 请求最小间隔)
+        self.__jobs: dict[Hashable, tuple[int | None, float | None]] = {}
+        self.__waiters: list[Future] = []
+        self.__limit = float(min(self.INITIAL_CONCURRENCY, self.max_concurrency))
+        self.__inflight = 0
+        self.__next_time = 0.0  # 下一个请求最早的发送时间（令牌桶）
+        self.__paused_until = 0.0
+        self.__errors = 0  # 连续出错次数
+        self.__baseline: float | None = None  # 基准延迟（近期最小延迟）
+
+    @classmethod
+    def get(
+        cls,
+        key: str,
+        max_concurrency: int | None = None,
+        parent: "AdaptiveLimiter | None" = None,
+    ) -> "AdaptiveLimiter":
+        """
+        获取共享的限流器
+
+        :param key: 限流器键
+        :param max_concurrency: 创建限流器时的最大并发数上限，之后通过 configure 修改
+        :param parent: 创建限流器时的上级限流器
+        :return: AdaptiveLimiter 对象
+        """
+
+        if key not in cls.__limiters:
+            cls.__limiters[key] = cls(key, max_concurrency, parent)
+        return cls.__limiters[key]
+
+    @classmethod
+    def for_url(cls, url: str) -> "AdaptiveLimiter":
+        """
+        获取服务器共享的限流器
+
+        :param url: 服务器地址
+        :return: AdaptiveLimiter 对象
+        """
+
+        _, domain, port = URLUtils.get_resolve_url(url)
+        return cls.get(f"{domain}:{port}")
+
+    def configure(
+        self, max_concurrency: int | None = None, min_interval: float | None = None
+    ) -> None:
+        """
+        设置限流器自身的限制，覆盖之前的设置
+
+        :param max_concurrency: 最大并发数，为 None 或 0 时使用 MAX_CONCURRENCY
+        :param min_interval: 请求最小间隔（单位秒），为 None 或 0 时不限制速率
+        """
+
+        if not max_concurrency or max_concurrency < 0:
+            max_concurrency = self.MAX_CONCURRENCY
+        self.__base = (max_concurrency, max(0.0, float(min_interval or 0)))
+        self.__update()
+
+    def register(
+        self,
+        key: Hashable,
+        max_concurrency: int | None = None,
+        min_interval: float | None = None,
+    ) -> None:
+        """
+        登记正在运行的任务的限流参数，运行结束后需调用 unregister
+
+        :param key: 任务标识，重复登记时覆盖之前的参数
+        :param max_concurrency: 任务的最大并发数，为 None 或 0 时不限制
+        :param min_interval: 任务的请求最小间隔（单位秒），为 None 或 0 时不限制
+        """
+
+        self.__jobs[key] = (max_concurrency, min_interval)
+        self.__update()
+
+    def unregister(self, key: Hashable) -> None:
+        """
+        取消登记任务，限流参数恢复为其余正在运行的任务中最严格的限制
+        没有正在运行的任务时清除本限流器及下级限流器的错误暂停状态
+
+        :param key: 任务标识
+        """
+
+        self.__jobs.pop(key, None)
+        self.__update()
+        if self.__jobs:
+            return
+        self.__reset_backoff()
+        for limiter in self.__limiters.values():
+            if limiter.parent is self:
+                limiter.__reset_backoff()
+
+    def __update(self) -> None:
+        """
+        根据自身设置及已登记任务的参数重新计算限制
+        """
+
+        max_concurrency, min_interval = self.__base
+        for job_concurrency, job_interval in self.__jobs.values():
+            if job_concurrency and job_concurrency > 0:
+                max_concurrency = min(max_concurrency, job_concurrency)
+            if job_interval and job_interval > 0:
+                min_interval = max(min_interval, float(job_interval))
+        self.max_concurrency = max_concurrency
+        self.min_interval = min_interval
+        self.__limit = min(self.__limit, float(max_concurrency))
+        self.__next_time = min(self.__next_time, monotonic() + min_interval)
+        self.__wake()
+
+    def __reset_backoff(self) -> None:
+        """
+        清除错误暂停状态，并发数恢复到不低于初始并发数
+        """
+
+        self.__paused_until = 0.0
+        self.__errors = 0
+        self.__limit = max(
+            self.__limit, float(min(self.INITIAL_CONCURRENCY, self.max_concurrency))
+        )
+
+    @property
+    def limit(self) -> int:
+        """
+        当前允许的并发数
+        """
+        return max(1, int(self.__limit))
+
+    async def acquire(self) -> None:
+        """
+        获取请求许可，有上级限流器时再获取上级限流器的许可
+        """
+
+        await self.__acquire()
+        if self.parent is None:
+            return
+        try:
+            await self.parent.acquire()
+        except BaseException:
+            self.__inflight -= 1
+            self.__wake()
+            raise
+
+    async def __acquire(self) -> None:
+        """
+        获取本限流器的许可
+        """
+
+        while True:
+            now = monotonic()
+            if now < self.__paused_until:
+                await sleep(self.__paused_until - now)
+            elif self.__inflight >= self.limit:
+                waiter = get_running_loop().create_future()
+                self.__waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    if waiter in self.__waiters:
+                        self.__waiters.remove(waiter)
+            elif now < self.__next_time:
+                await sleep(self.__next_time - now)
+            else:
+                self.__inflight += 1
+                self.__next_time = now + self.min_interval
+                return
+
+    def release(self, latency: float, status_code: int | None) -> None:
+        """
+        释放请求许可并根据请求结果调整并发数
+        上级限流器同样根据请求结果调整，但 429 只说明本限流器（如单个存储器）被限速，上级限流器不降低并发数
+
+        :param latency: 请求耗时（单位秒）
+        :param status_code: HTTP 状态码，请求失败（超时等）时为 None
+        """
+
+        if self.parent is not None:
+            if status_code == 429:
+                self.parent.cancel()
+            else:
+                self.parent.release(latency, status_code)
+
+        self.__inflight -= 1
+
+        if status_code is None or status_code == 429 or status_code >= 500:
+            self.__errors += 1
+            self.__limit = max(1.0, self.__limit / 2)
+            backoff = min(self.MAX_BACKOFF, self.BACKOFF * 2 ** (self.__errors - 1))
+            self.__paused_until = max(self.__paused_until, monotonic() + backoff)
+            logger.warning(
+                f"{self.name} 请求失败（状态码：{status_code}），"
+                f"并发数降至 {self.limit}，暂停 {backoff:.0f} 秒"
+            )
+        else:
+            self.__errors = 0
+            if self.__baseline is None or latency < self.__baseline:
+                self.__baseline = latency
+            else:  # 基准延迟缓慢上浮，适应服务器整体延迟的变化
+                self.__baseline = self.__baseline * 0.99 + latency * 0.01
+
+            if latency <= self.__baseline * self.LATENCY_TOLERANCE:
+                # 每个并发窗口内全部成功时并发数增加 1
+                self.__limit = min(
+                    float(self.max_concurrency), self.__limit + 1 / self.__limit
+                )
+            else:
+                self.__limit = max(1.0, self.__limit * 0.9)
+
+        self.__wake()
+
+    def cancel(self) -> None:
+        """
+        释放被取消的请求的许可，不调整并发数（请求被取消不代表服务器繁忙）
+        """
+
+        if self.parent is not None:
+            self.parent.cancel()
+        self.__inflight -= 1
+        self.__wake()
+
+    def __wake(self) -> None:
+        """
+        唤醒等待中的请求重新检查并发数
+        """
+
+        for waiter in self.__waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self.__waiters.clear()
+
+    def __str__(self) -> str:
+        return f"{self.name}（并发数 {self.limit}/{self.max_concurrency}）"
@@ -0,0 +1,60 @@
+from pathlib import Path
+from sqlite3 import connect
+from threading import Lock
+from typing import Any, Iterable
+
+from app.utils.multiton import Multiton
+
+
+class SQLiteDB(metaclass=Multiton):
+    """
+    SQLite 数据库
+    同一路径共享同一连接，所有操作通过线程锁串行执行，可在线程池中调用
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        实例化 SQLiteDB 对象
+
+        :param path: 数据库文件路径
+        """
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.__lock = Lock()
+        self.__conn = connect(path, check_same_thread=False, timeout=30)
+        self.__conn.execute("PRAGMA journal_mode=WAL")
+        self.__conn.execute("PRAGMA synchronous=NORMAL")
+
+    def execute(self, sql: str, parameters: Iterable[Any] = ()) -> list[tuple]:
+        """
+        执行单条 SQL 语句并提交
+
+        :param sql: SQL 语句
+        :param parameters: SQL 参数
+        :return: 查询结果
+        """
+
+        with self.__lock, self.__conn:
+            return self.__conn.execute(sql, tuple(parameters)).fetchall()
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Iterable[Any]]) -> None:
+        """
+        批量执行 SQL 语句，在同一事务中提交
+
+        :param sql: SQL 语句
+        :param seq_of_parameters: SQL 参数序列
+        """
+
+        with self.__lock, self.__conn:
+            self.__conn.executemany(sql, seq_of_parameters)
+
+    def executescript(self, script: str) -> None:
+        """
+        执行 SQL 脚本（用于建表）
+
+        :param script: SQL 脚本
+        """
+
+        with self.__lock, self.__conn:
+            self.__conn.executescript(script)
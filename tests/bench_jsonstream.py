@@ -0,0 +1,79 @@
+"""
+性能测试：比较完整解析与增量解析 /api/fs/list 响应的耗时及峰值内存
+运行方式：python tests/bench_jsonstream.py
+"""
+
+from sys import path
+from os.path import dirname
+
+path.append(dirname(dirname(__file__)))
+
+from json import dumps
+from time import perf_counter
+from tracemalloc import start, stop, get_traced_memory, reset_peak
+from app.utils.jsonstream import JSONArrayStream, JSONUtils, orjson_loads
+
+
+def make_payload(count: int) -> bytes:
+    content = [
+        {
+            "id": "",
+            "path": f"/media/dir/[Group] Show - {i:06d} [1080P].mkv",
+            "name": f"[Group] Show - {i:06d} [1080P].mkv",
+            "size": 1024 * 1024 * 1024 + i,
+            "is_dir": False,
+            "modified": "2025-04-04T18:25:43+02:00",
+            "created": "2025-04-04T18:25:43+02:00",
+            "sign": "4zZglYvgsJp2fE_L-w5HFwtbosHzYBlTgLiWXc8n4Q0=:0",
+            "thumb": "",
+            "type": 2,
+            "hashinfo": "null",
+            "hash_info": None,
+        }
+        for i in range(count)
+    ]
+    return dumps(
+        {
+            "code": 200,
+            "message": "success",
+            "data": {"content": content, "total": count, "provider": "Local"},
+        },
+        ensure_ascii=False,
+    ).encode()
+
+
+def full(payload: bytes, chunk_size: int) -> int:
+    body = b"".join(
+        payload[i : i + chunk_size] for i in range(0, len(payload), chunk_size)
+    )
+    return sum(1 for _ in JSONUtils.loads(body)["data"]["content"])
+
+
+def stream(payload: bytes, chunk_size: int) -> int:
+    decoder = JSONArrayStream("content")
+    count = 0
+    for i in range(0, len(payload), chunk_size):
+        count += len(decoder.feed(payload[i : i + chunk_size]))
+    count += len(decoder.close())
+    assert decoder.result["code"] == 200
+    return count
+
+
+if __name__ == "__main__":
+    backend = "orjson" if orjson_loads is not None else "json"
+    for count in (10_000, 100_000):
+        payload = make_payload(count)
+        for name, func in ((f"完整解析（{backend}）", full), ("增量解析", stream)):
+            begin = perf_counter()
+            assert func(payload, 64 * 1024) == count
+            elapsed = perf_counter() - begin
+            # tracemalloc 会显著拖慢逐对象分配，峰值内存单独测量
+            start()
+            reset_peak()
+            func(payload, 64 * 1024)
+            peak = get_traced_memory()[1]
+            stop()
+            print(
+                f"{count} 条 {name}：耗时 {elapsed:.3f} 秒，"
+                f"峰值内存 {peak / 1024 / 1024:.1f} MB"
+            )
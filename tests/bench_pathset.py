@@ -0,0 +1,48 @@
+"""
+性能测试：比较 set[str] 与 PathHashSet 的内存占用及查找耗时
+运行方式：python tests/bench_pathset.py
+"""
+
+from sys import path
+from os.path import dirname
+
+path.append(dirname(dirname(__file__)))
+
+from time import perf_counter
+from tracemalloc import start, stop, get_traced_memory, reset_peak
+from app.utils.pathset import PathHashSet
+
+COUNT = 1_000_000
+
+
+def make(i: int) -> str:
+    return (
+        f"/media/strm/动漫/Show {i // 1000:04d}/Season 1/Show - S01E{i % 1000:03d}.strm"
+    )
+
+
+if __name__ == "__main__":
+    # 本地文件：一半仍存在于服务器，另有 10% 已从服务器删除
+    local_paths = [make(i) for i in range(0, COUNT, 2)]
+    local_paths += [make(i) + ".old" for i in range(COUNT // 10)]
+
+    for name, factory in (("set[str]", set), ("PathHashSet", PathHashSet)):
+        start()
+        reset_peak()
+        seen = factory(make(i) for i in range(COUNT))
+        len(seen)
+        current, peak = get_traced_memory()
+        stop()
+
+        begin = perf_counter()
+        if isinstance(seen, set):
+            deleted = [local for local in local_paths if local not in seen]
+        else:
+            deleted = list(seen.difference(local_paths))
+        elapsed = perf_counter() - begin
+        assert len(deleted) == COUNT // 10
+
+        print(
+            f"{name}：{current / COUNT:.1f} 字节/条（峰值 {peak / COUNT:.1f} 字节/条），"
+            f"差集 {len(local_paths)} 条耗时 {elapsed:.3f} 秒"
+        )
@@ -0,0 +1,113 @@
+"""
+性能测试：使用本地模拟服务器比较 /api/fs/list 与 WebDAV PROPFIND 遍历同一目录树的耗时
+运行方式：python tests/bench_webdav.py
+"""
+
+from sys import path
+from os.path import dirname
+
+path.append(dirname(dirname(__file__)))
+
+from asyncio import new_event_loop
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps, loads
+from threading import Thread
+from time import perf_counter, sleep
+from urllib.parse import quote, unquote
+from app.modules.alist.v3.client import AlistClient
+
+DIRS, FILES, LATENCY = 200, 200, 0.005  # 目录数、每个目录的文件数、模拟的请求延迟
+
+
+def children(dir_path: str) -> list[tuple[str, bool, int]]:
+    if dir_path == "/":
+        return [(f"Show {i:03d}", True, 0) for i in range(DIRS)]
+    return [
+        (f"[Group] Show - {i:04d} [1080P].mkv", False, 1024**3 + i)
+        for i in range(FILES)
+    ]
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def reply(self, status: int, body: bytes) -> None:
+        sleep(LATENCY)
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        data = {"base_path": "/", "id": 1}
+        self.reply(200, dumps({"code": 200, "data": data}).encode())
+
+    def do_POST(self) -> None:
+        req = loads(self.rfile.read(int(self.headers["Content-Length"])))
+        content = [
+            {
+                "name": name,
+                "size": size,
+                "is_dir": is_dir,
+                "modified": "2024-09-27T04:01:20.652Z",
+                "created": "2024-09-27T04:01:20.652Z",
+                "sign": "4zZglYvgsJp2fE_L-w5HFwtbosHzYBlTgLiWXc8n4Q0=:0",
+                "thumb": "",
+                "type": 1 if is_dir else 2,
+                "hashinfo": "null",
+                "hash_info": None,
+            }
+            for name, is_dir, size in children(req["path"])
+        ]
+        data = {"content": content, "total": len(content)}
+        self.reply(200, dumps({"code": 200, "data": data}).encode())
+
+    def do_PROPFIND(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        dir_path = unquote(self.path)[len("/dav") :].rstrip("/") or "/"
+        base = "/dav" + dir_path.rstrip("/") + "/"
+        items = [(base, True, 0)] + [
+            (base + name + ("/" if is_dir else ""), is_dir, size)
+            for name, is_dir, size in children(dir_path)
+        ]
+        body = "".join(
+            f"<D:response><D:href>{quote(href)}</D:href><D:propstat><D:prop>"
+            f"<D:resourcetype>{'<D:collection/>' if is_dir else ''}</D:resourcetype>"
+            f"<D:getcontentlength>{size}</D:getcontentlength>"
+            "<D:getlastmodified>Fri, 27 Sep 2024 04:01:20 GMT</D:getlastmodified>"
+            "</D:prop><D:status>HTTP/1.1 200 OK</D:status></D:propstat></D:response>"
+            for href, is_dir, size in items
+        )
+        self.reply(
+            207,
+            (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<D:multistatus xmlns:D="DAV:">{body}</D:multistatus>'
+            ).encode(),
+        )
+
+
+async def walk(client: AlistClient, webdav: bool) -> int:
+    count = 0
+    async for _ in client.iter_path(
+        "/", 0, is_detail=False, max_workers=16, webdav=webdav
+    ):
+        count += 1
+    return count
+
+
+if __name__ == "__main__":
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    client = AlistClient(f"http://127.0.0.1:{server.server_port}", token="token")
+
+    loop = new_event_loop()
+    for name, webdav in (("/api/fs/list", False), ("WebDAV PROPFIND", True)):
+        begin = perf_counter()
+        count = loop.run_until_complete(walk(client, webdav))
+        print(f"{name}：{count} 项，耗时 {perf_counter() - begin:.3f} 秒")
+    loop.close()
+    server.shutdown()
@@ -0,0 +1,279 @@
+"""
+测试共用的辅助函数及模拟对象
+"""
+
+from sys import path
+from os.path import dirname
+
+path.append(dirname(dirname(__file__)))
+
+import json
+from asyncio import new_event_loop, sleep
+from functools import cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Thread
+from typing import Any, AsyncIterable, Coroutine
+
+from app.modules.alist import AlistPath, AlistEntry
+from app.modules.alist.v3.walker import AlistWalker
+from app.modules.alist2strm import Alist2Strm
+from app.utils import AdaptiveLimiter
+
+SERVER_URL = "https://alist.nn.ci"
+MODIFIED = "2024-09-27T04:01:20.652Z"
+
+# 所有异步测试共用一个事件循环（客户端的 HTTP 连接池绑定事件循环）
+LOOP = new_event_loop()
+
+
+def run(coro: Coroutine) -> Any:
+    """
+    在共用的事件循环中运行协程
+    """
+    return LOOP.run_until_complete(coro)
+
+
+async def collect(paths: AsyncIterable) -> list:
+    """
+    将异步生成器的结果收集为列表
+    """
+    return [path async for path in paths]
+
+
+def make_path(full_path: str, is_dir: bool = False, size: int = 0) -> AlistPath:
+    """
+    构造测试用 AlistPath 对象
+    """
+
+    return AlistPath(
+        server_url=SERVER_URL,
+        base_path="/",
+        full_path=full_path,
+        name=full_path.rsplit("/", 1)[-1],
+        size=size,
+        is_dir=is_dir,
+        modified=MODIFIED,
+        created=MODIFIED,
+        sign="",
+        thumb="",
+        type=1 if is_dir else 2,
+        hashinfo="null",
+    )
+
+
+def make_entry(
+    full_path: str, is_dir: bool = False, size: int = 0, modified: str = MODIFIED
+) -> AlistEntry:
+    """
+    构造测试用 AlistEntry 对象
+    """
+
+    return AlistEntry(
+        SERVER_URL,
+        "/",
+        full_path,
+        full_path.rsplit("/", 1)[-1],
+        size=size,
+        is_dir=is_dir,
+        modified=modified,
+        created=modified,
+        type=1 if is_dir else 2,
+    )
+
+
+class FakeAlistClient:
+    """
+    模拟 AlistClient，目录树保存在内存中，供 AlistWalker 列出目录及获取详细信息
+    可设置列出目录/获取详细信息的延迟及失败次数，并记录列出顺序和最大并发数
+    """
+
+    url = SERVER_URL
+    base_path = "/"
+
+    def __init__(self, files: dict[str, int] | list[str], delay: float = 0) -> None:
+        """
+        :param files: 文件路径列表或 {文件路径: 大小}，上级目录自动创建
+        :param delay: 列出每个目录的延迟（单位秒）
+        """
+
+        self.delay = delay
+        self.limiter = AdaptiveLimiter(SERVER_URL)
+        self.tree: dict[str, dict[str, AlistEntry]] = {"/": {}}
+        self.listed: list[str] = []  # 列出目录的顺序
+        self.failures: dict[str, int] = {}  # 目录/文件 -> 剩余失败次数
+        self.fail_after: dict[str, int] = {}  # 目录 -> 输出该数量的子项后失败
+        self.inflight = self.peak = 0
+        self.details: list[str] = []  # 获取详细信息的顺序
+        self.detail_inflight = self.detail_peak = 0
+        if isinstance(files, list):
+            files = dict.fromkeys(files, 0)
+        for full_path, size in files.items():
+            self.add(full_path, size)
+
+    def add(self, full_path: str, size: int = 0, modified: str = MODIFIED) -> None:
+        """
+        添加文件，不存在的上级目录自动创建
+        """
+
+        parent = full_path[: full_path.rfind("/")] or "/"
+        if parent not in self.tree:
+            self.add_dir(parent)
+        self.tree[parent][full_path] = make_entry(
+            full_path, size=size, modified=modified
+        )
+
+    def add_dir(self, dir_path: str, modified: str = MODIFIED) -> None:
+        """
+        添加目录或更新目录的修改时间
+        """
+
+        parent = dir_path[: dir_path.rfind("/")] or "/"
+        if parent not in self.tree:
+            self.add_dir(parent)
+        self.tree.setdefault(dir_path, {})
+        self.tree[parent][dir_path] = make_entry(dir_path, True, modified=modified)
+
+    async def iter_path(
+        self, dir_path: str, wait_time: float | int = 0, **kwargs
+    ) -> AsyncIterable[AlistEntry]:
+        async for path in AlistWalker(client=self, **kwargs).walk(dir_path):
+            yield path
+
+    async def iter_fs_list(self, dir_path: str, **_) -> AsyncIterable[AlistEntry]:
+        self.listed.append(dir_path)
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await sleep(self.delay)
+            if self.failures.get(dir_path, 0) > 0:
+                self.failures[dir_path] -= 1
+                raise RuntimeError(f"列出目录 {dir_path} 失败")
+            for index, path in enumerate(list(self.tree[dir_path].values())):
+                if index == self.fail_after.get(dir_path):
+                    del self.fail_after[dir_path]
+                    raise RuntimeError(f"列出目录 {dir_path} 中断")
+                yield path
+        finally:
+            self.inflight -= 1
+
+    async def async_api_fs_get(self, full_path: str) -> AlistPath:
+        self.details.append(full_path)
+        self.detail_inflight += 1
+        self.detail_peak = max(self.detail_peak, self.detail_inflight)
+        try:
+            await sleep(self.delay)
+            if self.failures.get(full_path, 0) > 0:
+                self.failures[full_path] -= 1
+                raise RuntimeError(f"获取 {full_path} 详细信息失败")
+            path = make_path(full_path, full_path in self.tree)
+            path.raw_url = SERVER_URL + "/raw" + full_path
+            return path
+        finally:
+            self.detail_inflight -= 1
+
+
+class MeHandler(BaseHTTPRequestHandler):
+    """
+    响应 /api/me 及 /api/fs/list 的模拟 Alist 服务器，供 Alist2Strm 初始化客户端
+    目录列表来自 tree，未设置的目录返回错误
+    """
+
+    protocol_version = "HTTP/1.1"
+    tree: dict[str, list[dict]] = {}  # 目录路径 -> 子项字典列表
+    listed: list[str] = []  # 列出目录的顺序
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.reply({"base_path": "/", "id": 1})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        dir_path = json.loads(self.rfile.read(length) or b"{}").get("path") or ""
+        # 与 Alist 一致，合并重复的 "/" 并去除结尾的 "/"
+        dir_path = "/" + "/".join(name for name in dir_path.split("/") if name)
+        self.listed.append(dir_path)
+        if self.path != "/api/fs/list" or dir_path not in self.tree:
+            self.reply(None, code=500, message="object not found")
+            return
+        content = self.tree[dir_path]
+        self.reply({"content": content, "total": len(content)})
+
+    def reply(self, data: Any, code: int = 200, message: str = "success") -> None:
+        body = json.dumps({"code": code, "message": message, "data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@cache
+def me_server_url() -> str:
+    """
+    启动模拟服务器（整个测试进程只启动一次），返回服务器地址
+    """
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MeHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def serve_files(files: list[str]) -> None:
+    """
+    设置模拟服务器 /api/fs/list 返回的目录树并清空列出记录，上级目录自动创建，传入空列表时清空
+    """
+
+    tree: dict[str, dict[str, bool]] = {}
+    for full_path in files:
+        path, is_dir = full_path, False
+        while path != "/":
+            parent, name = path.rsplit("/", 1)
+            parent = parent or "/"
+            tree.setdefault(parent, {})[name] = is_dir
+            path, is_dir = parent, True
+    MeHandler.listed = []
+    MeHandler.tree = {
+        dir_path: [
+            {"name": name, "is_dir": is_dir, "modified": MODIFIED}
+            for name, is_dir in items.items()
+        ]
+        for dir_path, items in tree.items()
+    }
+
+
+def make_job(
+    files: dict[str, int] | list[str], target_dir: str | Path, **kwargs
+) -> tuple[Alist2Strm, FakeAlistClient]:
+    """
+    构造使用模拟客户端的 Alist2Strm 任务（AlistPath 模式，不需要签名）
+    """
+
+    kwargs.setdefault("mode", "AlistPath")
+    kwargs.setdefault("token", "token")
+    kwargs.setdefault("retry_delay", 0)
+    job = Alist2Strm(url=me_server_url(), target_dir=target_dir, **kwargs)
+    job.client = FakeAlistClient(files)
+    return job, job.client
+
+
+def remove_data_file(job: Alist2Strm) -> None:
+    """
+    删除任务数据文件（包括 SQLite 的 -wal/-shm 文件）
+    """
+
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{job.data_file}{suffix}").unlink(missing_ok=True)
+
+
+def list_files(dir_path: str | Path) -> list[str]:
+    """
+    列出目录下所有文件的相对路径
+    """
+
+    root = Path(dir_path)
+    return sorted(
+        path.relative_to(root).as_posix() for path in root.rglob("*") if path.is_file()
+    )
@@ -5,7 +5,17 @@ path.append(dirname(dirname(__file__)))
 
 import unittest
 import json
-from app.modules.alist import AlistPath
+from asyncio import CancelledError, create_task, new_event_loop, sleep, wait_for
+from time import sleep as time_sleep
+from os import makedirs, utime
+from os.path import join
+from tempfile import TemporaryDirectory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import quote
+from app.modules.alist import AlistClient, AlistPath, AlistEntry, AlistLocalSource
+from app.modules.alist import AlistStorage, AlistStorageLimits
+from app.utils import AlistUtils, AdaptiveLimiter
 
 
 class TestAlistPath(unittest.TestCase):
@@ -314,6 +324,347 @@ class TestAlistPath(unittest.TestCase):
             self.assertEqual(path.type, item["type"])
             self.assertEqual(path.hashinfo, item["hashinfo"])
 
+    def test_alist_entry_consistency(self) -> None:
+        """
+        测试 AlistEntry 的字段及派生属性与 AlistPath 一致
+        """
+
+        items = [
+            {
+                "id": "",
+                "path": "/2024-10/[ANi] 測試 - 01 [1080P].mp4",
+                "name": "[ANi] 測試 - 01 [1080P].mp4",
+                "size": 293496422,
+                "is_dir": False,
+                "modified": "2025-04-04T18:25:43+02:00",
+                "created": "2025-04-04T18:25:43+02:00",
+                "sign": "4zZglYvgsJp2fE_L-w5HFwtbosHzYBlTgLiWXc8n4Q0=:0",
+                "thumb": "",
+                "type": 2,
+                "hashinfo": "null",
+                "hash_info": None,
+            },
+            {
+                "name": "Season 1",
+                "size": 0,
+                "is_dir": True,
+                "modified": "2024-09-27T04:01:20.652Z",
+                "created": "2024-09-27T04:01:20.652Z",
+                "sign": "",
+                "thumb": "",
+                "type": 1,
+                "hashinfo": "null",
+                "hash_info": None,
+            },
+        ]
+        for item in items:
+            path = AlistPath(
+                server_url="https://alist.nn.ci",
+                base_path="/base/",
+                full_path="/ani/" + item["name"],
+                **item,
+            )
+            entry = AlistEntry.from_dict(
+                "https://alist.nn.ci", "/base/", "/ani", item
+            )
+
+            for field in AlistPath.model_fields:
+                self.assertEqual(getattr(entry, field), getattr(path, field))
+            self.assertEqual(entry.abs_path, path.abs_path)
+            self.assertEqual(entry.download_url, path.download_url)
+            self.assertEqual(entry.proxy_download_url, path.proxy_download_url)
+            self.assertEqual(entry.suffix, path.suffix)
+            self.assertEqual(entry.modified_timestamp, path.modified_timestamp)
+            self.assertEqual(entry.to_path(), path)
+
+
+class AlistStandInHandler(BaseHTTPRequestHandler):
+    """
+    模拟 Alist 服务器的请求处理类，用户基础路径为 /user
+    /api/fs/list 仅支持列出 /ani/S3 目录（5 个文件），按 page/per_page 分页并记录请求的页码，
+    列出 /slow 目录时延迟 0.5 秒响应
+    /api/fs/search 按关键词匹配文件名，且第一页模拟按权限过滤掉一项
+    /dav 仅支持对 /ani/S1 目录的 Depth: 1 PROPFIND 请求
+    """
+
+    protocol_version = "HTTP/1.1"
+    FILES = [
+        ("/user/ani/S1", "EP01.mkv"),
+        ("/user/ani/S1", "EP01.ass"),
+        ("/user/ani/S1", "EP02.mkv"),
+        ("/user/ani/S2", "EP01.mkv"),
+        ("/user", "root.mkv"),
+    ]
+    PAGES: list[int] = []
+
+    def list_dir(self, req: dict) -> None:
+        items = [
+            {"name": f"EP{i:02d}.mkv", "size": i, "is_dir": False, "type": 2}
+            for i in range(1, 6)
+        ]
+        if req["path"] == "/slow":
+            time_sleep(0.5)
+            return self.send({"content": [], "total": 0})
+        page, per_page = req["page"], req["per_page"]
+        self.PAGES.append(page)
+        if per_page > 0:
+            items = items[(page - 1) * per_page : page * per_page]
+        self.send({"content": items, "total": 5})
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def send(self, data: dict) -> None:
+        body = json.dumps({"code": 200, "message": "success", "data": data}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self.send({"base_path": "/user", "id": 1})
+
+    def do_POST(self) -> None:
+        req = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/api/fs/list":
+            return self.list_dir(req)
+        results = [
+            {"parent": parent, "name": name, "is_dir": False, "size": 1, "type": 2}
+            for parent, name in self.FILES
+            if req["keywords"] in name and req["scope"] != 1
+        ]
+        page, per_page = req["page"], req["per_page"]
+        content = results[(page - 1) * per_page : page * per_page]
+        if page == 1:
+            content = content[1:]
+        self.send({"content": content, "total": len(results)})
+
+    def do_PROPFIND(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if (
+            self.path != "/dav/ani/S1/"
+            or self.headers["Depth"] != "1"
+            or self.headers["Authorization"] != "Bearer token"
+        ):
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        responses = "".join(
+            f"<D:response><D:href>{quote(href)}</D:href><D:propstat><D:prop>"
+            f"<D:resourcetype>{'<D:collection/>' if is_dir else ''}</D:resourcetype>"
+            f"<D:getcontentlength>{size}</D:getcontentlength>"
+            "<D:getlastmodified>Fri, 27 Sep 2024 04:01:20 GMT</D:getlastmodified>"
+            "</D:prop><D:status>HTTP/1.1 200 OK</D:status></D:propstat></D:response>"
+            for href, is_dir, size in (
+                ("/dav/ani/S1/", True, 0),
+                ("/dav/ani/S1/第 01 话.mkv", False, 1024),
+                ("/dav/ani/S1/SP/", True, 0),
+            )
+        )
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><D:multistatus xmlns:D="DAV:">'
+            + responses
+            + "</D:multistatus>"
+        ).encode()
+        self.send_response(207)
+        self.send_header("Content-Type", "text/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestAlistClient(unittest.TestCase):
+    """
+    AlistClient 测试类（使用本地模拟服务器）
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 AlistClient 测试")
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), AlistStandInHandler)
+        Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.client = AlistClient(
+            f"http://127.0.0.1:{cls.server.server_port}", token="token"
+        )
+        # 客户端共享的 HTTP 连接池绑定事件循环，所有测试使用同一个事件循环
+        cls.loop = new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        cls.loop.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        print("\nAlistClient 测试通过")
+
+    def test_iter_fs_list(self) -> None:
+        """
+        测试分页列出目录（预取、不预取及流式解析）与一次性列出的结果一致
+        """
+
+        async def listing(**kwargs) -> list[str]:
+            return [
+                path.full_path
+                async for path in self.client.iter_fs_list("/ani/S3", **kwargs)
+            ]
+
+        expected = [f"/ani/S3/EP{i:02d}.mkv" for i in range(1, 6)]
+        for kwargs, pages in (
+            ({}, [1]),
+            ({"per_page": 2}, [1, 2, 3]),
+            ({"per_page": 2, "prefetch": False}, [1, 2, 3]),
+            ({"per_page": 2, "stream": True}, [1, 2, 3]),
+            ({"per_page": 5, "stream": True}, [1, 2]),
+        ):
+            AlistStandInHandler.PAGES.clear()
+            self.assertEqual(
+                self.loop.run_until_complete(listing(**kwargs)), expected, kwargs
+            )
+            self.assertEqual(AlistStandInHandler.PAGES, pages, kwargs)
+
+    def test_iter_fs_search(self) -> None:
+        """
+        测试搜索结果去除用户基础路径，并根据结果总数翻页
+        """
+
+        async def search(*keywords: str) -> list[list[AlistEntry]]:
+            return [
+                [
+                    path
+                    async for path in self.client.iter_fs_search(
+                        "/", keyword, scope=2, per_page=2
+                    )
+                ]
+                for keyword in keywords
+            ]
+
+        paths, empty = self.loop.run_until_complete(search(".mkv", ".nfo"))
+        self.assertEqual(
+            [path.full_path for path in paths],
+            ["/ani/S1/EP02.mkv", "/ani/S2/EP01.mkv", "/root.mkv"],
+        )
+        self.assertEqual(paths[0].abs_path, "/user/ani/S1/EP02.mkv")
+        self.assertEqual(
+            paths[0].download_url,
+            self.client.url + "/d/user/ani/S1/EP02.mkv",
+        )
+        self.assertEqual(empty, [])
+
+    def test_async_api_dav_iter(self) -> None:
+        """
+        测试通过 WebDAV 列出目录，跳过目录本身并由永久令牌计算签名
+        """
+
+        async def listing() -> list[AlistEntry]:
+            return [path async for path in self.client.async_api_dav_iter("/ani/S1")]
+
+        video, sp = self.loop.run_until_complete(listing())
+        self.assertEqual(video.full_path, "/ani/S1/第 01 话.mkv")
+        self.assertEqual((video.is_dir, video.size), (False, 1024))
+        self.assertEqual(video.modified_timestamp, 1727409680)
+        self.assertEqual(
+            "?sign=" + video.sign,
+            AlistUtils.sign("token", "/user/ani/S1/第 01 话.mkv"),
+        )
+        self.assertEqual((sp.full_path, sp.is_dir, sp.sign), ("/ani/S1/SP", True, ""))
+
+    def test_local_source_iter_dir(self) -> None:
+        """
+        测试本地挂载目录列出的结果与 Alist 路径、签名一致
+        """
+
+        with TemporaryDirectory() as local_root:
+            makedirs(join(local_root, "S1", "SP"))
+            with open(join(local_root, "S1", "第 01 话.mkv"), "wb") as file:
+                file.write(b"0" * 1024)
+            utime(join(local_root, "S1", "第 01 话.mkv"), (1727409680, 1727409680))
+            source = AlistLocalSource(self.client, "/ani", local_root)
+
+            async def listing() -> list[AlistEntry]:
+                return [path async for path in source.iter_dir("/ani/S1")]
+
+            video, sp = sorted(
+                self.loop.run_until_complete(listing()), key=lambda path: path.is_dir
+            )
+            self.assertEqual(
+                source.local_path(video.full_path),
+                join(local_root, "S1", "第 01 话.mkv"),
+            )
+
+        self.assertEqual(video.full_path, "/ani/S1/第 01 话.mkv")
+        self.assertEqual((video.is_dir, video.size), (False, 1024))
+        self.assertEqual(video.modified_timestamp, 1727409680)
+        self.assertEqual(
+            "?sign=" + video.sign,
+            AlistUtils.sign("token", "/user/ani/S1/第 01 话.mkv"),
+        )
+        self.assertEqual((sp.full_path, sp.is_dir, sp.sign), ("/ani/S1/SP", True, ""))
+
+    def test_cancel_request(self) -> None:
+        """
+        测试请求被取消时归还限流许可且不降低并发数、不暂停请求
+        """
+
+        limiter = self.client.limiter
+
+        async def cancel(**kwargs) -> None:
+            async def listing() -> list[AlistEntry]:
+                return [
+                    path async for path in self.client.iter_fs_list("/slow", **kwargs)
+                ]
+
+            task = create_task(listing())
+            await sleep(0.1)
+            task.cancel()
+            with self.assertRaises(CancelledError):
+                await task
+            # 所有许可均已归还且限流器没有暂停
+            for _ in range(limiter.limit):
+                await wait_for(limiter.acquire(), 0.1)
+            for _ in range(limiter.limit):
+                limiter.cancel()
+
+        for kwargs in ({}, {"stream": True}):
+            limit = limiter.limit
+            self.loop.run_until_complete(cancel(**kwargs))
+            self.assertEqual(limiter.limit, limit, kwargs)
+
+    def test_storage_limits(self) -> None:
+        """
+        测试目录按最长挂载路径匹配存储器限流器，限制按驱动器默认值及覆盖设置
+        """
+
+        server = AdaptiveLimiter("test-storage-limits")
+        limits = AlistStorageLimits(
+            server,
+            "/user",
+            [
+                AlistStorage(mount_path="/user/115", driver="115 Cloud"),
+                AlistStorage(mount_path="/user/115/local", driver="Local"),
+                AlistStorage(mount_path="/user/off", driver="Local", disabled=True),
+            ],
+            overrides={"/user/115/local/": {"max_concurrency": 8}},
+        )
+
+        self.assertEqual(len(limits), 2)
+        self.assertIs(limits.get("/115/a").parent, server)
+        self.assertIs(limits.get("/"), server)
+        self.assertIs(limits.get("/off/a"), server)
+        self.assertIs(limits.get("/1150"), server)
+        self.assertIs(limits.get("/115/local"), limits.get("/115/local/a/b"))
+        self.assertIsNot(limits.get("/115/local"), limits.get("/115/a"))
+        self.assertEqual(limits.get("/115/a").max_concurrency, 2)
+        self.assertEqual(limits.get("/115/a").min_interval, 1)
+        self.assertEqual(limits.get("/115/local/a").max_concurrency, 8)
+
 
 if __name__ == "__main__":
     unittest.main()
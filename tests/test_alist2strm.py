@@ -0,0 +1,829 @@
+from helpers import (
+    MODIFIED,
+    MeHandler,
+    list_files,
+    make_entry,
+    make_job,
+    make_path,
+    me_server_url,
+    remove_data_file,
+    run,
+    serve_files,
+)
+
+import unittest
+from datetime import datetime, timezone
+from hashlib import md5, sha1
+from os import stat, utime
+from os.path import join
+from pathlib import Path
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from app.extensions import VIDEO_EXTS, SUBTITLE_EXTS
+from app.modules.alist2strm import Alist2Strm
+from app.modules.alist2strm.mode import Alist2StrmMode, Alist2StrmListingMode
+from app.modules.alist2strm.checkpoint import Alist2StrmCheckpoint
+from app.modules.alist2strm.hashindex import LocalHashIndex
+from app.modules.alist2strm.index import LocalIndex
+from app.modules.alist2strm.manifest import Alist2StrmManifest, ManifestChange
+from app.modules.alist2strm.rules import PathRules, Alist2StrmRules
+from app.modules.alist2strm.tiers import Alist2StrmTiers
+from app.modules.alist2strm.writer import StrmWriter
+
+
+class TestAlist2StrmRules(unittest.TestCase):
+    """
+    Alist2Strm 包含/排除规则测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 Alist2StrmRules 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlist2StrmRules 测试通过")
+
+    def test_path_rules(self) -> None:
+        """
+        测试 glob 与正则规则分别匹配名称和完整路径
+        """
+
+        rules = PathRules(["Extras", "re:^SPs?$", "/ani/*/old/*", "re:/tmp\\d+/"])
+        self.assertTrue(rules.match("Extras", "/movie/A/Extras"))
+        self.assertTrue(rules.match("SP", "/ani/B/SP"))
+        self.assertTrue(rules.match("x", "/ani/2024/old/x"))
+        self.assertTrue(rules.match("x", "/a/tmp12/x"))
+        self.assertFalse(rules.match("SPECIAL", "/ani/B/SPECIAL"))
+        self.assertFalse(rules.match("Extras2", "/movie/A/Extras2"))
+        self.assertFalse(PathRules(""))
+        self.assertTrue(PathRules("a,b").match("b", "/b"))
+
+    def test_dir_rules(self) -> None:
+        """
+        测试目录排除规则（包含默认规则）
+        """
+
+        rules = Alist2StrmRules(exts=VIDEO_EXTS, exclude_dirs=["Extras"])
+        self.assertFalse(rules.allow_dir(make_path("/ani/@eaDir", True)))
+        self.assertFalse(rules.allow_dir(make_path("/ani/#recycle", True)))
+        self.assertFalse(rules.allow_dir(make_path("/movie/A/Extras", True)))
+        self.assertTrue(rules.allow_dir(make_path("/movie/A", True)))
+
+    def test_file_rules(self) -> None:
+        """
+        测试文件后缀、包含/排除及大小规则
+        """
+
+        rules = Alist2StrmRules(
+            exts=VIDEO_EXTS | SUBTITLE_EXTS,
+            exclude_files=["*sample*"],
+            min_size=100,
+        )
+        mb = 1024 * 1024
+        self.assertTrue(rules.allow_file(make_path("/a/EP01.mkv", size=500 * mb)))
+        self.assertTrue(rules.allow_file(make_path("/a/EP01.MKV", size=500 * mb)))
+        self.assertFalse(rules.allow_file(make_path("/a/EP01.mkv", size=50 * mb)))
+        self.assertTrue(rules.allow_file(make_path("/a/EP01.ass", size=10)))
+        self.assertFalse(rules.allow_file(make_path("/a/a-sample.mkv", size=500 * mb)))
+        self.assertFalse(rules.allow_file(make_path("/a/EP01.zip", size=500 * mb)))
+        self.assertFalse(rules.allow_file(make_path("/a/Thumbs.db")))
+
+        rules = Alist2StrmRules(exts=VIDEO_EXTS, include_files=["re:S\\d+E\\d+"])
+        self.assertTrue(rules.allow_file(make_path("/a/Show.S01E02.mkv")))
+        self.assertFalse(rules.allow_file(make_path("/a/Show.OVA.mkv")))
+
+    def test_root_rules(self) -> None:
+        """
+        测试由接口返回的子项构造完整路径时，源目录为根目录或以 "/" 结尾仍能匹配包含 "/" 的规则
+        """
+
+        serve_files(
+            [
+                "/ani/S1/EP01.mkv",
+                "/ani/old/EP01.mkv",
+                "/ani/S1/EP01.sample.mkv",
+                "/movie/A/A.mkv",
+            ]
+        )
+        cases = {
+            "/": ["ani/S1/EP01.strm", "movie/A/A.strm"],
+            "/ani/": ["S1/EP01.strm"],
+        }
+        try:
+            for source_dir, expected in cases.items():
+                with TemporaryDirectory() as target_dir:
+                    job = Alist2Strm(
+                        url=me_server_url(),
+                        token="token",
+                        mode="AlistPath",
+                        source_dir=source_dir,
+                        target_dir=target_dir,
+                        exclude_dirs=["/ani/old"],
+                        exclude_files=["/ani/*/*.sample.mkv"],
+                        retry_delay=0,
+                    )
+                    try:
+                        run(job.run())
+                    finally:
+                        remove_data_file(job)
+                    self.assertEqual(list_files(target_dir), expected)
+                    self.assertEqual(job.failures, [])
+        finally:
+            serve_files([])
+
+    def test_root_priority(self) -> None:
+        """
+        测试源目录为根目录时，优先目录规则按完整路径匹配由接口返回的子目录
+        """
+
+        serve_files(["/movie/A/A.mkv", "/ani/S1/EP01.mkv", "/ani/S2/EP01.mkv"])
+        with TemporaryDirectory() as target_dir:
+            job = Alist2Strm(
+                url=me_server_url(),
+                token="token",
+                mode="AlistPath",
+                source_dir="/",
+                target_dir=target_dir,
+                max_workers=1,
+                priority_dirs=["/ani/*"],
+                retry_delay=0,
+            )
+            try:
+                run(job.run())
+                self.assertEqual(
+                    MeHandler.listed,
+                    ["/", "/movie", "/ani", "/ani/S1", "/ani/S2", "/movie/A"],
+                )
+            finally:
+                remove_data_file(job)
+                serve_files([])
+
+    def test_mode(self) -> None:
+        """
+        测试模式字符串不区分大小写，无法匹配时使用默认模式
+        """
+
+        self.assertEqual(Alist2StrmMode.from_str("RawURL"), Alist2StrmMode.RawURL)
+        self.assertEqual(Alist2StrmMode.from_str("alistpath"), Alist2StrmMode.AlistPath)
+        self.assertEqual(Alist2StrmMode.from_str("unknown"), Alist2StrmMode.AlistURL)
+        self.assertEqual(
+            Alist2StrmListingMode.from_str("webdav"), Alist2StrmListingMode.WebDAV
+        )
+        self.assertEqual(Alist2StrmListingMode.from_str(""), Alist2StrmListingMode.List)
+
+    def test_dir_priority(self) -> None:
+        """
+        测试优先目录规则的顺序
+        """
+
+        rules = Alist2StrmRules(exts=VIDEO_EXTS, priority_dirs=["/ani/2026*", "ani"])
+        self.assertEqual(rules.dir_priority("2026-10", "/ani/2026-10"), 0)
+        self.assertEqual(rules.dir_priority("ani", "/ani"), 1)
+        self.assertEqual(rules.dir_priority("2020-01", "/ani/2020-01"), 2)
+        self.assertEqual(Alist2StrmRules(exts=VIDEO_EXTS).dir_priority("a", "/a"), 0)
+
+
+class TestLocalIndex(unittest.TestCase):
+    """
+    LocalIndex 输出目录快照测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 LocalIndex 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nLocalIndex 测试通过")
+
+    def test_build(self) -> None:
+        """
+        测试快照记录文件大小及修改时间，非递归时只包含根目录中的文件，目录不存在时为空
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            root = Path(temp_dir)
+            (root / "S1").mkdir()
+            (root / "root.strm").write_text("/root.mkv")
+            (root / "S1" / "EP01.ass").write_bytes(b"0" * 10)
+            utime(root / "S1" / "EP01.ass", (1727409680, 1727409680))
+
+            for workers in (1, 4):
+                index = LocalIndex(root, workers=workers)
+                run(index.build())
+                self.assertEqual(len(index), 2)
+                self.assertEqual(index.get(root / "S1" / "EP01.ass"), (10, 1727409680))
+                self.assertIn(root / "root.strm", index)
+                self.assertNotIn(root / "S1" / "EP02.ass", index)
+                self.assertIsNone(index.get(root / "S1" / "EP02.ass"))
+
+            index = LocalIndex(root, recursive=False)
+            run(index.build())
+            self.assertEqual(list(index.paths()), [str(root / "root.strm")])
+
+            index = LocalIndex(root / "missing")
+            run(index.build())
+            self.assertEqual(len(index), 0)
+
+
+class TestAlist2StrmManifest(unittest.TestCase):
+    """
+    Alist2Strm 同步清单测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 Alist2StrmManifest 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlist2StrmManifest 测试通过")
+
+    def test_compare(self) -> None:
+        """
+        测试按上次记录计算新增、变化、未变化及删除的文件（记录分多批读取）
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            manifest = Alist2StrmManifest(Path(join(temp_dir, "manifest.db")))
+            manifest.LOAD_SIZE = 2
+            local = Path("/media/a.strm")
+
+            manifest.begin()
+            for name in ("a", "b", "c", "d", "e"):
+                manifest.record(make_entry(f"/{name}.mkv"), local)
+            manifest.flush()
+
+            manifest.begin()
+            manifest.load()
+            self.assertEqual(
+                manifest.compare(make_entry("/a.mkv"), local), ManifestChange.UNCHANGED
+            )
+            self.assertEqual(
+                manifest.compare(make_entry("/b.mkv", size=1), local),
+                ManifestChange.UPDATE,
+            )
+            self.assertEqual(
+                manifest.compare(make_entry("/c.mkv"), Path("/media/c.strm")),
+                ManifestChange.UPDATE,
+            )
+            self.assertEqual(
+                manifest.compare(
+                    make_entry("/e.mkv", modified="2025-01-01T00:00:00Z"), local
+                ),
+                ManifestChange.UPDATE,
+            )
+            self.assertEqual(
+                manifest.compare(make_entry("/f.mkv"), local), ManifestChange.CREATE
+            )
+            self.assertEqual(
+                [remote_path for remote_path, _ in manifest.deleted()], ["/d.mkv"]
+            )
+
+
+class TestAlist2StrmTiers(unittest.TestCase):
+    """
+    Alist2StrmTiers 目录冷热分层测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 Alist2StrmTiers 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlist2StrmTiers 测试通过")
+
+    def visit(self, tiers: Alist2StrmTiers, dir_path: str, children: list) -> None:
+        """
+        模拟列出目录
+        """
+
+        for path in children:
+            tiers.observe(path)
+        tiers.finish(dir_path)
+
+    def test_tiers(self) -> None:
+        """
+        测试子项最近有修改的目录及其上级目录为热目录，冷目录在遍历间隔内跳过，子项数量变化时变为热目录
+        """
+
+        recent = datetime.now(timezone.utc).isoformat()
+        with TemporaryDirectory() as temp_dir:
+            db_file = Path(temp_dir, "data.db")
+            tiers = Alist2StrmTiers(db_file, "/", hot_days=7, cold_interval=3600)
+            tiers.load()
+            self.assertTrue(tiers.should_visit("/ani"))
+            self.assertFalse(tiers.is_hot("/ani"))
+
+            self.visit(tiers, "/", [make_entry("/ani", True), make_entry("/a.mkv")])
+            self.visit(tiers, "/ani", [make_entry("/ani/S1", True, modified=recent)])
+            self.visit(tiers, "/movie", [make_entry("/movie/A.mkv")])
+            self.assertTrue(tiers.is_hot("/ani"))
+            self.assertTrue(tiers.is_hot("/"))
+            self.assertFalse(tiers.is_hot("/movie"))
+            tiers.flush()
+
+            tiers = Alist2StrmTiers(db_file, "/", hot_days=7, cold_interval=3600)
+            tiers.load()
+            self.assertTrue(tiers.should_visit("/ani"))
+            self.assertFalse(tiers.should_visit("/movie"))
+            self.assertTrue(tiers.should_visit("/ani/S1"))
+
+            # 子项数量变化时为热目录，根目录中的子项同样计数
+            self.visit(tiers, "/movie", [make_entry("/movie/A.mkv")] * 2)
+            self.assertTrue(tiers.is_hot("/movie"))
+            tiers.cold_interval = 0
+            self.assertTrue(tiers.should_visit("/movie"))
+
+            tiers = Alist2StrmTiers(db_file, "/tv", hot_days=7, cold_interval=3600)
+            tiers.load()
+            self.visit(tiers, "/", [make_entry("/a.mkv")])
+            self.visit(tiers, "/", [make_entry("/a.mkv"), make_entry("/b.mkv")])
+            self.assertTrue(tiers.is_hot("/"))
+
+            # 缺少修改时间的子项（WebDAV 未返回 getlastmodified）只计数
+            self.visit(tiers, "/dav", [make_entry("/dav/a.mkv", modified="")])
+            self.assertFalse(tiers.is_hot("/dav"))
+            self.visit(tiers, "/dav", [make_entry("/dav/a.mkv", modified="x")] * 2)
+            self.assertTrue(tiers.is_hot("/dav"))
+
+
+class TestAlist2StrmCheckpoint(unittest.TestCase):
+    """
+    Alist2StrmCheckpoint 遍历断点测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 Alist2StrmCheckpoint 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlist2StrmCheckpoint 测试通过")
+
+    def test_save(self) -> None:
+        """
+        测试保存新断点后只保留最新版本，清除后为空
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            checkpoint = Alist2StrmCheckpoint(Path(temp_dir, "data.db"))
+            self.assertEqual(checkpoint.load(), [])
+
+            checkpoint.save([("/", None, True), ("/ani", MODIFIED, False)])
+            checkpoint.save([("/ani", MODIFIED, True)])
+            self.assertEqual(checkpoint.load(), [("/ani", MODIFIED, True)])
+            self.assertEqual(
+                Alist2StrmCheckpoint(Path(temp_dir, "data.db")).load(),
+                [("/ani", MODIFIED, True)],
+            )
+
+            checkpoint.clear()
+            self.assertEqual(checkpoint.load(), [])
+
+
+class TestLocalHashIndex(unittest.TestCase):
+    """
+    LocalHashIndex 本地文件哈希索引测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 LocalHashIndex 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nLocalHashIndex 测试通过")
+
+    def test_remote_hash(self) -> None:
+        """
+        测试按优先级读取 hash_info 及 hashinfo 字符串，没有支持的哈希信息时返回 None
+        """
+
+        path = make_entry("/a.ass")
+        self.assertIsNone(LocalHashIndex.remote_hash(path))
+        path.hash_info = {"md5": "AB", "sha1": "CD"}
+        self.assertEqual(LocalHashIndex.remote_hash(path), ("sha1", "cd"))
+        path.hash_info = None
+        path.hashinfo = '{"md5": "ab"}'
+        self.assertEqual(LocalHashIndex.remote_hash(path), ("md5", "ab"))
+        path.hashinfo = "{invalid"
+        self.assertIsNone(LocalHashIndex.remote_hash(path))
+        path.hash_info = {"crc32": "ab"}
+        self.assertIsNone(LocalHashIndex.remote_hash(path))
+
+    def test_is_unchanged(self) -> None:
+        """
+        测试本地文件哈希与远程一致时返回 True，大小和修改时间未变化时使用记录的哈希，删除记录后重新计算
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            index = LocalHashIndex(Path(temp_dir, "data.db"))
+            local_path = Path(temp_dir, "a.ass")
+            local_path.write_bytes(b"subtitle")
+            path = make_entry("/a.ass")
+            path.hash_info = {"sha1": sha1(b"subtitle").hexdigest().upper()}
+
+            self.assertTrue(run(index.is_unchanged(path, local_path)))
+            self.assertFalse(run(index.is_unchanged(path, Path(temp_dir, "b.ass"))))
+
+            # 内容变化但大小和修改时间不变时使用索引中的记录
+            local_stat = stat(local_path)
+            local_path.write_bytes(b"SUBTITLE")
+            utime(local_path, ns=(local_stat.st_atime_ns, local_stat.st_mtime_ns))
+            self.assertTrue(run(index.is_unchanged(path, local_path)))
+
+            index.remove([str(local_path)])
+            self.assertFalse(run(index.is_unchanged(path, local_path)))
+
+            # 下载完成后更新记录，其他算法分别记录
+            path.hash_info = {"md5": md5(b"SUBTITLE").hexdigest()}
+            run(index.update(path, local_path))
+            self.assertTrue(run(index.is_unchanged(path, local_path)))
+
+
+class TestStrmWriter(unittest.TestCase):
+    """
+    StrmWriter 批量写入测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 StrmWriter 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nStrmWriter 测试通过")
+
+    def test_write_batch(self) -> None:
+        """
+        测试批量写入，下次运行时内容未变化的文件跳过写入，且不残留临时文件
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            writer = StrmWriter(2)
+            items = [
+                (
+                    Path(temp_dir, f"S{i % 2}", f"EP{i:02d}.strm"),
+                    f"/S{i % 2}/EP{i:02d}.mkv",
+                )
+                for i in range(6)
+            ]
+            results = run(writer.write_batch(items))
+            self.assertEqual(sorted(results), sorted((path, True) for path, _ in items))
+            self.assertEqual(items[0][0].read_text(), "/S0/EP00.mkv")
+            writer.close()
+
+            items[1] = (items[1][0], "/changed.mkv")
+            results = dict(run(writer.write_batch(items)))
+            self.assertTrue(results.pop(items[1][0]))
+            self.assertEqual(set(results.values()), {False})
+            self.assertEqual(items[1][0].read_text(), "/changed.mkv")
+            writer.close()
+
+            self.assertEqual(len(list_files(temp_dir)), 6)
+            self.assertFalse(
+                any(StrmWriter.is_temp_file(name) for name in list_files(temp_dir))
+            )
+
+    def test_removed_dir(self) -> None:
+        """
+        测试目录缓存：运行中目录被删除时重新创建，关闭后新建目录的缓存不再跳过内容比较
+        """
+
+        with TemporaryDirectory() as temp_dir:
+            writer = StrmWriter(1)
+            path = Path(temp_dir, "S1", "EP01.strm")
+            self.assertEqual(run(writer.write_batch([(path, "a")])), [(path, True)])
+
+            rmtree(path.parent)
+            self.assertEqual(run(writer.write_batch([(path, "a")])), [(path, True)])
+            self.assertEqual(path.read_text(), "a")
+            writer.close()
+
+            # 下一次运行中目录已存在，内容未变化时跳过写入
+            self.assertEqual(run(writer.write_batch([(path, "a")])), [(path, False)])
+            writer.close()
+
+            rmtree(path.parent)
+            self.assertEqual(run(writer.write_batch([(path, "b")])), [(path, True)])
+            writer.close()
+
+
+class TestAlist2Strm(unittest.TestCase):
+    """
+    Alist2Strm 处理流程测试类（使用内存中的模拟客户端）
+    """
+
+    FILES = {
+        "/ani/S1/EP01.mkv": 100,
+        "/ani/S1/EP01.ass": 10,
+        "/movie/A/A.mkv": 100,
+    }
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 Alist2Strm 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlist2Strm 测试通过")
+
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.target_dir = self.temp_dir.name
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_pipeline(self) -> None:
+        """
+        测试各处理阶段之间的队列长度为 1 时，遍历与写入并行执行仍能处理全部文件
+        """
+
+        files = [f"/ani/S{i // 10}/EP{i % 10:02d}.mkv" for i in range(60)]
+        job, client = make_job(
+            files, self.target_dir, queue_size=1, max_workers=3, max_writers=2
+        )
+        client.delay = 0.001
+        run(job.run())
+
+        expected = [path[1:].replace(".mkv", ".strm") for path in files]
+        self.assertEqual(list_files(self.target_dir), sorted(expected))
+        self.assertEqual(
+            Path(self.target_dir, "ani/S3/EP04.strm").read_text(), "/ani/S3/EP04.mkv"
+        )
+        self.assertEqual(job.failures, [])
+
+    def test_sync_server(self) -> None:
+        """
+        测试同步服务器时删除服务器中已不存在的本地文件及产生的空目录，忽略的文件保留
+        """
+
+        for name in ("old/S1/EP01.strm", "old/S1/EP01.nfo", "movie/A/B.strm"):
+            Path(self.target_dir, name).parent.mkdir(parents=True, exist_ok=True)
+            Path(self.target_dir, name).write_text("")
+
+        job, _ = make_job(
+            self.FILES, self.target_dir, sync_server=True, sync_ignore=r"\.nfo$"
+        )
+        run(job.run())
+        self.assertEqual(
+            list_files(self.target_dir),
+            ["ani/S1/EP01.strm", "movie/A/A.strm", "old/S1/EP01.nfo"],
+        )
+
+        Path(self.target_dir, "old/S1/EP01.nfo").unlink()
+        Path(self.target_dir, "old/S1/EP02.strm").write_text("")
+        run(job.run())
+        self.assertFalse(Path(self.target_dir, "old").exists())
+
+    def test_incremental_sync(self) -> None:
+        """
+        测试逐目录同步删除：每个目录列出后立即删除本地对应目录中多余的文件和子目录（保留临时文件），
+        其它目录遍历失败时已列出的目录仍完成清理
+        """
+
+        for name in (
+            "ani/S1/EP09.strm",
+            "ani/S1/EP01.strm.1.2.tmp",
+            "ani/S2/EP01.strm",
+            "ani/S2/SP/SP01.strm",
+            "movie/A/B.strm",
+        ):
+            Path(self.target_dir, name).parent.mkdir(parents=True, exist_ok=True)
+            Path(self.target_dir, name).write_text("")
+
+        job, client = make_job(
+            self.FILES,
+            self.target_dir,
+            sync_server=True,
+            incremental_sync=True,
+            max_retries=0,
+        )
+        self.addCleanup(remove_data_file, job)
+        client.failures["/movie"] = 1
+        run(job.run())
+
+        self.assertEqual(job.failures, [("/movie", True)])
+        self.assertEqual(
+            list_files(self.target_dir),
+            ["ani/S1/EP01.strm", "ani/S1/EP01.strm.1.2.tmp", "movie/A/B.strm"],
+        )
+
+        job, _ = make_job(
+            self.FILES, self.target_dir, sync_server=True, incremental_sync=True
+        )
+        run(job.run())
+        self.assertEqual(
+            list_files(self.target_dir),
+            ["ani/S1/EP01.strm", "ani/S1/EP01.strm.1.2.tmp", "movie/A/A.strm"],
+        )
+
+    def test_data_file(self) -> None:
+        """
+        测试未启用持久化功能时不创建任务数据文件，启用同步清单时创建
+        """
+
+        job, _ = make_job(self.FILES, self.target_dir)
+        run(job.run())
+        self.assertEqual(
+            list_files(self.target_dir), ["ani/S1/EP01.strm", "movie/A/A.strm"]
+        )
+        self.assertFalse(job.data_file.exists())
+
+        job, _ = make_job(self.FILES, self.target_dir, manifest=True)
+        self.addCleanup(remove_data_file, job)
+        run(job.run())
+        self.assertTrue(job.data_file.exists())
+
+    def test_bdmv(self) -> None:
+        """
+        测试每个 BDMV 目录只为最大的 .m2ts 文件生成 .strm 文件，处理完成后不保留选择记录
+        """
+
+        files = {
+            "/movie/M1/BDMV/STREAM/00001.m2ts": 100,
+            "/movie/M1/BDMV/STREAM/00002.m2ts": 500,
+            "/movie/M1/BDMV/index.bdmv": 1,
+            "/movie/M2/BDMV/STREAM/00001.m2ts": 300,
+        }
+        job, _ = make_job(files, self.target_dir)
+        run(job.run())
+
+        self.assertEqual(
+            list_files(self.target_dir), ["movie/M1/M1.strm", "movie/M2/M2.strm"]
+        )
+        self.assertEqual(
+            Path(self.target_dir, "movie/M1/M1.strm").read_text(),
+            "/movie/M1/BDMV/STREAM/00002.m2ts",
+        )
+        self.assertEqual(job.bdmv_collections, {})
+        self.assertEqual(job.bdmv_largest_files, {})
+
+    def test_strm_retry(self) -> None:
+        """
+        测试写入失败的 .strm 文件在其余文件处理完成后重试，重试后仍然失败时记录到遍历断点
+        """
+
+        class FlakyWriter(StrmWriter):
+            """
+            前 failures 次写入 A.strm 时失败
+            """
+
+            failures = 0
+
+            async def write_batch(self, items):
+                results, rest = [], []
+                for local_path, content in items:
+                    if local_path.name == "A.strm" and self.failures > 0:
+                        self.failures -= 1
+                        results.append((local_path, OSError("写入失败")))
+                    else:
+                        rest.append((local_path, content))
+                return results + await super().write_batch(rest)
+
+        for failures, expected in ((1, []), (3, [("/movie/A/A.mkv", False)])):
+            job, _ = make_job(self.FILES, self.target_dir, max_retries=2)
+            self.addCleanup(remove_data_file, job)
+            job.writer = FlakyWriter()
+            job.writer.failures = failures
+            Path(self.target_dir, "movie/A/A.strm").unlink(missing_ok=True)
+            run(job.run())
+            self.assertEqual(job.failures, expected)
+            self.assertEqual(
+                Path(self.target_dir, "movie/A/A.strm").exists(), not expected
+            )
+
+        # 下次运行只重新列出失败文件所在的目录
+        self.assertEqual(
+            [dir_path for dir_path, _, _ in job.checkpoint.load()], ["/movie/A"]
+        )
+
+    def test_resume(self) -> None:
+        """
+        测试遍历失败或超出时间预算后保存断点，下次运行只遍历未完成的目录，完整遍历后清除断点
+        """
+
+        job, client = make_job(self.FILES, self.target_dir, max_retries=0)
+        self.addCleanup(remove_data_file, job)
+        client.failures["/movie"] = 1
+        run(job.run())
+        self.assertEqual(job.failures, [("/movie", True)])
+        self.assertEqual(list_files(self.target_dir), ["ani/S1/EP01.strm"])
+
+        job, client = make_job(self.FILES, self.target_dir)
+        run(job.run())
+        self.assertEqual(client.listed, ["/movie", "/movie/A"])
+        self.assertEqual(
+            list_files(self.target_dir), ["ani/S1/EP01.strm", "movie/A/A.strm"]
+        )
+        self.assertEqual(job.checkpoint.load(), [])
+
+        files = [f"/ani/S{i:02d}/EP01.mkv" for i in range(40)]
+        job, client = make_job(files, self.target_dir, time_budget=1, max_workers=1)
+        client.delay = 0.05
+        run(job.run())
+        remaining = job.checkpoint.load()
+        self.assertTrue(remaining)
+        self.assertLess(len(list_files(self.target_dir)), 42)
+
+        job, client = make_job(files, self.target_dir, checkpoint=True)
+        run(job.run())
+        self.assertNotIn("/", client.listed)
+        self.assertEqual(len(client.listed), len(remaining))
+        self.assertEqual(len(list_files(self.target_dir)), 42)
+        self.assertEqual(job.checkpoint.load(), [])
+
+    def test_dir_tiering(self) -> None:
+        """
+        测试启用目录冷热分层后，冷目录在遍历间隔内跳过遍历，同步服务器时不删除其中的本地文件
+        """
+
+        job, client = make_job(
+            self.FILES, self.target_dir, dir_tiering=True, sync_server=True
+        )
+        self.addCleanup(remove_data_file, job)
+        run(job.run())
+        self.assertEqual(
+            list_files(self.target_dir), ["ani/S1/EP01.strm", "movie/A/A.strm"]
+        )
+
+        job, client = make_job(
+            self.FILES, self.target_dir, dir_tiering=True, sync_server=True
+        )
+        run(job.run())
+        self.assertEqual(client.listed, ["/"])
+        self.assertEqual(
+            list_files(self.target_dir), ["ani/S1/EP01.strm", "movie/A/A.strm"]
+        )
+
+    def test_manifest_local_deleted(self) -> None:
+        """
+        测试同步清单中未变化的文件在本地被删除后重新生成
+        """
+
+        job, _ = make_job(self.FILES, self.target_dir, manifest=True)
+        self.addCleanup(remove_data_file, job)
+        run(job.run())
+        files = ["ani/S1/EP01.strm", "movie/A/A.strm"]
+        self.assertEqual(list_files(self.target_dir), files)
+
+        Path(self.target_dir, "movie/A/A.strm").unlink()
+        job, _ = make_job(self.FILES, self.target_dir, manifest=True)
+        run(job.run())
+        self.assertEqual(list_files(self.target_dir), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,375 @@
+from helpers import run
+
+import json
+import unittest
+from asyncio import gather, sleep, wait_for
+from os import makedirs, symlink
+from os.path import dirname, join
+from tempfile import TemporaryDirectory
+from app.utils import AdaptiveLimiter, FileUtils, JSONArrayStream, PathHashSet
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    """
+    AdaptiveLimiter 自适应限流器测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 AdaptiveLimiter 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAdaptiveLimiter 测试通过")
+
+    def make_limiter(self, max_concurrency: int = 8) -> AdaptiveLimiter:
+        """
+        构造暂停时间较短的限流器
+        """
+
+        limiter = AdaptiveLimiter("test", max_concurrency)
+        limiter.BACKOFF = 0.2
+        return limiter
+
+    def test_increase(self) -> None:
+        """
+        测试请求成功且延迟正常时并发数逐步增加，不超过最大并发数
+        """
+
+        limiter = self.make_limiter()
+        self.assertEqual(limiter.limit, AdaptiveLimiter.INITIAL_CONCURRENCY)
+
+        async def requests(count: int) -> None:
+            for _ in range(count):
+                await limiter.acquire()
+                limiter.release(0.1, 200)
+
+        # 每个并发窗口（4 个请求）全部成功后并发数增加约 1
+        run(requests(5))
+        self.assertEqual(limiter.limit, 5)
+        run(requests(100))
+        self.assertEqual(limiter.limit, 8)
+
+        # 延迟远高于基准延迟时并发数下降
+        run(limiter.acquire())
+        limiter.release(10, 200)
+        self.assertEqual(limiter.limit, 7)
+
+    def test_error(self) -> None:
+        """
+        测试请求失败时并发数减半并暂停请求，取消的请求不影响并发数
+        """
+
+        limiter = self.make_limiter()
+        run(limiter.acquire())
+        limiter.release(0.1, 503)
+        self.assertEqual(limiter.limit, 2)
+        with self.assertRaises(TimeoutError):
+            run(wait_for(limiter.acquire(), 0.1))
+
+        run(wait_for(limiter.acquire(), 0.5))
+        limiter.release(0.1, None)
+        self.assertEqual(limiter.limit, 1)
+
+        limiter = self.make_limiter()
+        for _ in range(4):
+            run(limiter.acquire())
+        for _ in range(4):
+            limiter.cancel()
+        self.assertEqual(limiter.limit, 4)
+        # 许可全部归还且没有暂停
+        for _ in range(4):
+            run(wait_for(limiter.acquire(), 0.1))
+
+    def test_parent(self) -> None:
+        """
+        测试嵌套的限流器：总并发数不超过上级限流器的最大并发数，429 只降低本限流器的并发数
+        """
+
+        server = AdaptiveLimiter("test-parent", 3)
+        storages = [AdaptiveLimiter(f"test-parent/{i}", 8, server) for i in range(2)]
+        inflight = peak = 0
+
+        async def request(limiter: AdaptiveLimiter) -> None:
+            nonlocal inflight, peak
+            await limiter.acquire()
+            inflight += 1
+            peak = max(peak, inflight)
+            await sleep(0.01)
+            inflight -= 1
+            limiter.release(0.01, 200)
+
+        async def requests() -> None:
+            await gather(*(request(storages[i % 2]) for i in range(40)))
+
+        run(requests())
+        self.assertEqual(peak, 3)
+        self.assertGreater(storages[0].limit, 4)
+
+        limit = storages[0].limit
+        run(storages[0].acquire())
+        storages[0].release(0.01, 429)
+        self.assertEqual(storages[0].limit, limit // 2)
+        self.assertEqual(server.limit, 3)
+
+        run(storages[1].acquire())
+        storages[1].release(0.01, 503)
+        self.assertEqual(server.limit, 1)
+
+    def test_register(self) -> None:
+        """
+        测试任务登记的限制只在任务运行期间生效，configure 覆盖自身设置，所有任务结束后清除错误暂停状态
+        """
+
+        server = AdaptiveLimiter.get("test-register", 16)
+        storage = AdaptiveLimiter.get("test-register/115", 8, server)
+        server.register("a", 8, 0.5)
+        server.register("b", 4)
+        self.assertEqual((server.max_concurrency, server.min_interval), (4, 0.5))
+        server.unregister("b")
+        self.assertEqual((server.max_concurrency, server.min_interval), (8, 0.5))
+        server.configure(max_concurrency=6)
+        self.assertEqual(server.max_concurrency, 6)
+
+        run(storage.acquire())
+        storage.release(0.1, 503)
+        self.assertEqual((storage.limit, server.limit), (2, 2))
+        with self.assertRaises(TimeoutError):
+            run(wait_for(storage.acquire(), 0.1))
+
+        # 最后一个任务结束后限制恢复为自身设置，暂停及请求间隔不再延续
+        server.unregister("a")
+        self.assertEqual((server.max_concurrency, server.min_interval), (6, 0))
+        self.assertEqual((storage.limit, server.limit), (4, 4))
+        run(wait_for(storage.acquire(), 0.1))
+        storage.release(0.1, 200)
+
+
+class TestJSONArrayStream(unittest.TestCase):
+    """
+    JSONArrayStream 增量解码测试类
+    """
+
+    PAYLOAD = json.dumps(
+        {
+            "code": 200,
+            "data": {
+                "content": [
+                    {"name": f"第 {i:02d} 话 [1080P].mkv", "size": i, "tags": ["a,]"]}
+                    for i in range(20)
+                ],
+                "total": 20,
+                "provider": "Local",
+            },
+        },
+        ensure_ascii=False,
+        indent=1,
+    ).encode()
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 JSONArrayStream 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nJSONArrayStream 测试通过")
+
+    def parse(self, payload: bytes, size: int) -> tuple[list, JSONArrayStream]:
+        """
+        按指定大小分块输入
+        """
+
+        stream = JSONArrayStream("content")
+        items = []
+        for i in range(0, len(payload), size):
+            items.extend(stream.feed(payload[i : i + size]))
+        items.extend(stream.close())
+        return items, stream
+
+    def test_chunks(self) -> None:
+        """
+        测试任意分块位置（包括多字节字符中间）的解析结果与完整解析一致
+        """
+
+        expected = json.loads(self.PAYLOAD)
+        content = expected["data"]["content"]
+        expected["data"]["content"] = []
+        for size in (1, 2, 3, 7, 64, len(self.PAYLOAD)):
+            items, stream = self.parse(self.PAYLOAD, size)
+            self.assertEqual(items, content, size)
+            self.assertEqual(stream.count, 20)
+            self.assertEqual(stream.result, expected, size)
+
+    def test_items_before_end(self) -> None:
+        """
+        测试元素在数组结束前即可返回
+        """
+
+        stream = JSONArrayStream("content")
+        self.assertEqual(
+            stream.feed(b'{"data": {"content": [{"a": 1}, {"b"'), [{"a": 1}]
+        )
+        self.assertEqual(stream.feed(b": 2}]}}"), [{"b": 2}])
+        self.assertEqual(stream.close(), [])
+
+    def test_not_array(self) -> None:
+        """
+        测试键对应的值不是数组、键不存在及数组未结束的情况
+        """
+
+        for payload in (
+            b'{"code": 500, "data": {"content": null}}',
+            b'{"code": 500, "message": "error", "data": null}',
+        ):
+            items, stream = self.parse(payload, 1)
+            self.assertEqual(items, [])
+            self.assertEqual(stream.result, json.loads(payload))
+
+        with self.assertRaises(json.JSONDecodeError):
+            self.parse(b'{"data": {"content": [{"a": 1}, {"b": 2', 4)
+
+
+class TestPathHashSet(unittest.TestCase):
+    """
+    PathHashSet 路径集合测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 PathHashSet 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nPathHashSet 测试通过")
+
+    def test_contains(self) -> None:
+        """
+        测试添加（包括重复路径）后的查找与数量，查询后继续添加仍然有效
+        """
+
+        paths = PathHashSet(["/a/1.strm", "/a/2.strm", "/a/1.strm"])
+        self.assertEqual(len(paths), 2)
+        self.assertIn("/a/1.strm", paths)
+        self.assertNotIn("/a/3.strm", paths)
+
+        paths.add("/a/3.strm")
+        self.assertIn("/a/3.strm", paths)
+        self.assertEqual(len(paths), 3)
+        self.assertEqual(paths.nbytes, 3 * 8)
+        self.assertNotIn("/", PathHashSet())
+
+    def test_difference(self) -> None:
+        """
+        测试差集与 set 的结果一致，并保持输入顺序
+        """
+
+        seen = [f"/media/S{i // 100}/EP{i % 100:02d}.strm" for i in range(0, 1000, 2)]
+        local = [f"/media/S{i // 100}/EP{i % 100:02d}.strm" for i in range(1000)]
+        paths = PathHashSet(seen)
+        expected = [path for path in local if path not in set(seen)]
+        self.assertEqual(list(paths.difference(local)), expected)
+        self.assertEqual(list(paths.difference([])), [])
+        self.assertEqual(list(PathHashSet().difference(["/a"])), ["/a"])
+
+
+class TestFileUtils(unittest.TestCase):
+    """
+    FileUtils 本地文件工具测试类
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 FileUtils 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nFileUtils 测试通过")
+
+    def setUp(self) -> None:
+        self.temp_dir = TemporaryDirectory()
+        self.root = self.temp_dir.name
+        self.files = [
+            join(self.root, "a.strm"),
+            join(self.root, "S1", "EP01.strm"),
+            join(self.root, "S1", "EP01.ass"),
+            join(self.root, "S1", "SP", "SP01.strm"),
+            join(self.root, "S2", "EP01.strm"),
+        ]
+        for path in self.files:
+            makedirs(dirname(path), exist_ok=True)
+            with open(path, "w") as file:
+                file.write(path)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_scan_tree(self) -> None:
+        """
+        测试串行与并行遍历结果一致，不跟随符号链接目录
+        """
+
+        symlink(join(self.root, "S1"), join(self.root, "link"))
+        for workers in (1, 4):
+            files = FileUtils.scan_tree(self.root, workers=workers)
+            self.assertEqual(sorted(path for path, _, _ in files), sorted(self.files))
+        self.assertEqual(
+            [path for path, _, _ in FileUtils.scan_tree(self.root, recursive=False)],
+            [join(self.root, "a.strm")],
+        )
+        self.assertEqual(list(FileUtils.scan_tree(join(self.root, "missing"))), [])
+
+    def test_delete_and_prune(self) -> None:
+        """
+        测试分批删除文件（已不存在的文件跳过），自底向上删除空目录且不删除根目录及非空目录
+        """
+
+        FileUtils.BATCH_SIZE = 2
+        self.addCleanup(setattr, FileUtils, "BATCH_SIZE", 256)
+        paths = self.files[1:] + [join(self.root, "S1", "missing.strm")]
+        paths.remove(join(self.root, "S1", "EP01.ass"))
+        deleted, failed = FileUtils.delete_files(paths, workers=2)
+        self.assertEqual(sorted(deleted), sorted(paths[:-1]))
+        self.assertEqual(failed, [])
+
+        removed = FileUtils.prune_empty_dirs(deleted, self.root + "/")
+        self.assertEqual(
+            sorted(removed), [join(self.root, "S1", "SP"), join(self.root, "S2")]
+        )
+        remaining = [path for path, _, _ in FileUtils.scan_tree(self.root)]
+        self.assertEqual(
+            sorted(remaining),
+            [join(self.root, "S1", "EP01.ass"), join(self.root, "a.strm")],
+        )
+
+        deleted, _ = FileUtils.delete_files(remaining)
+        self.assertEqual(
+            FileUtils.prune_empty_dirs(deleted, self.root), [join(self.root, "S1")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
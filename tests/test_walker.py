@@ -0,0 +1,249 @@
+from helpers import MODIFIED, FakeAlistClient, collect, make_entry, run
+
+import unittest
+from os.path import join
+from tempfile import TemporaryDirectory
+from app.modules.alist import AlistFrontier, AlistListingCache
+from app.modules.alist.v3.walker import AlistWalker
+
+
+class TestAlistWalker(unittest.TestCase):
+    """
+    AlistWalker 并发遍历测试类（使用内存中的模拟客户端）
+    """
+
+    FILES = [
+        "/ani/S1/EP01.mkv",
+        "/ani/S1/EP02.mkv",
+        "/ani/S2/EP01.mkv",
+        "/ani/S2/SP/SP01.mkv",
+        "/movie/A/A.mkv",
+        "/root.mkv",
+    ]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        测试类初始化
+        """
+        print("开始进行 AlistWalker 测试")
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        测试类清理
+        """
+        print("\nAlistWalker 测试通过")
+
+    def test_walk(self) -> None:
+        """
+        测试广度优先遍历输出所有文件和目录，单个工作协程时按层级顺序列出
+        """
+
+        client = FakeAlistClient(self.FILES)
+        paths = run(collect(AlistWalker(client, is_detail=False).walk("/")))
+
+        self.assertEqual(
+            sorted(path.full_path for path in paths if not path.is_dir),
+            sorted(self.FILES),
+        )
+        self.assertEqual(
+            client.listed,
+            ["/", "/ani", "/movie", "/ani/S1", "/ani/S2", "/movie/A", "/ani/S2/SP"],
+        )
+
+    def test_max_workers(self) -> None:
+        """
+        测试同时列出的目录数不超过 max_workers
+        """
+
+        files = [f"/d{i:02d}/EP01.mkv" for i in range(20)]
+        for max_workers in (1, 4):
+            client = FakeAlistClient(files, delay=0.01)
+            walker = AlistWalker(client, max_workers=max_workers, is_detail=False)
+            paths = run(collect(walker.walk("/")))
+            self.assertEqual(len(paths), 40)
+            self.assertEqual(client.peak, max_workers)
+
+    def test_detail_workers(self) -> None:
+        """
+        测试同时获取详细信息的数量不超过 detail_workers，输出的路径均包含详细信息
+        """
+
+        files = [f"/ani/EP{i:02d}.mkv" for i in range(20)]
+        for detail_workers in (1, 4):
+            client = FakeAlistClient(files, delay=0.01)
+            walker = AlistWalker(client, detail_workers=detail_workers)
+            paths = run(collect(walker.walk("/")))
+            self.assertEqual(len(paths), 21)
+            self.assertEqual(client.detail_peak, detail_workers)
+            self.assertTrue(all(path.raw_url for path in paths))
+
+    def test_detail_retry(self) -> None:
+        """
+        测试获取详细信息失败的文件按重试次数重试，仍然失败时通过错误回调报告，未设置错误回调时中断遍历
+        """
+
+        client = FakeAlistClient(self.FILES)
+        client.failures["/ani/S1/EP01.mkv"] = 1
+        client.failures["/movie/A/A.mkv"] = 3
+        errors: list[tuple[str, bool]] = []
+        walker = AlistWalker(
+            client,
+            retries=2,
+            retry_delay=0,
+            on_error=lambda path, is_dir, _: errors.append((path, is_dir)),
+        )
+        paths = [path.full_path for path in run(collect(walker.walk("/")))]
+
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertIn("/ani/S1/EP01.mkv", paths)
+        self.assertNotIn("/movie/A/A.mkv", paths)
+        self.assertEqual(errors, [("/movie/A/A.mkv", False)])
+        self.assertEqual(client.details.count("/ani/S1/EP01.mkv"), 2)
+        self.assertEqual(client.details.count("/movie/A/A.mkv"), 3)
+
+        client = FakeAlistClient(self.FILES)
+        client.failures["/movie/A/A.mkv"] = 1
+        with self.assertRaises(RuntimeError):
+            run(collect(AlistWalker(client).walk("/")))
+
+    def test_filters(self) -> None:
+        """
+        测试目录过滤器剪枝子树，文件过滤器只影响输出，目录完成回调的结果一并输出
+        """
+
+        client = FakeAlistClient(self.FILES)
+        done: list[str] = []
+
+        async def dir_done(dir_path: str) -> list:
+            done.append(dir_path)
+            if dir_path == "/movie/A":
+                return [make_entry("/movie/A/extra.mkv")]
+            return []
+
+        walker = AlistWalker(
+            client,
+            is_detail=False,
+            filter=lambda path: not path.is_dir,
+            dir_filter=lambda path: path.name != "S2",
+            dir_done=dir_done,
+        )
+        paths = run(collect(walker.walk("/")))
+
+        self.assertNotIn("/ani/S2", client.listed)
+        self.assertEqual(
+            sorted(path.full_path for path in paths),
+            [
+                "/ani/S1/EP01.mkv",
+                "/ani/S1/EP02.mkv",
+                "/movie/A/A.mkv",
+                "/movie/A/extra.mkv",
+                "/root.mkv",
+            ],
+        )
+        self.assertEqual(sorted(done), sorted(client.listed))
+
+    def test_cache_subtree(self) -> None:
+        """
+        测试缓存列表中子目录的修改时间不用于校验子目录的缓存：
+        父目录的修改时间未变化时使用缓存，子目录仍重新列出，其中新增的文件可以被发现
+        """
+
+        client = FakeAlistClient(["/ani/S1/EP01.mkv"])
+        with TemporaryDirectory() as temp_dir:
+
+            class ListingCache(AlistListingCache):
+                DB_FILE = join(temp_dir, "listing_cache.db")
+
+            cache = ListingCache(client)
+
+            def walk() -> list[str]:
+                client.listed.clear()
+                walker = AlistWalker(client, is_detail=False, cache=cache)
+                return [path.full_path for path in run(collect(walker.walk("/")))]
+
+            walk()
+            # 子目录中新增文件后只有子目录的修改时间变化
+            client.add("/ani/S1/EP02.mkv")
+            client.add_dir("/ani/S1", "2024-10-01T00:00:00Z")
+            paths = walk()
+
+        self.assertIn("/ani/S1/EP02.mkv", paths)
+        self.assertEqual(client.listed, ["/", "/ani/S1"])
+
+    def test_retry(self) -> None:
+        """
+        测试列出中途失败的目录重试后不重复输出已输出的路径，失败次数超过重试次数时通过错误回调报告
+        消费者确认所有路径后遍历边界为空
+        """
+
+        client = FakeAlistClient(self.FILES)
+        client.fail_after["/ani/S1"] = 1
+        client.failures["/movie"] = 1
+        client.failures["/ani/S2"] = 3
+        frontier = AlistFrontier()
+        errors: list[tuple[str, bool]] = []
+
+        async def walk() -> list[str]:
+            walker = AlistWalker(
+                client,
+                is_detail=False,
+                frontier=frontier,
+                retries=2,
+                retry_delay=0,
+                on_error=lambda path, is_dir, _: errors.append((path, is_dir)),
+            )
+            paths = []
+            async for path in walker.walk("/"):
+                paths.append(path.full_path)
+                frontier.done(path)
+            return paths
+
+        paths = run(walk())
+        self.assertEqual(len(paths), len(set(paths)))
+        self.assertEqual(
+            sorted(path for path in paths if path.endswith(".mkv")),
+            ["/ani/S1/EP01.mkv", "/ani/S1/EP02.mkv", "/movie/A/A.mkv", "/root.mkv"],
+        )
+        self.assertEqual(errors, [("/ani/S2", True)])
+        self.assertEqual(client.listed.count("/ani/S1"), 2)
+        self.assertEqual(frontier.snapshot(), [("/ani/S2", MODIFIED, False)])
+
+    def test_resume(self) -> None:
+        """
+        测试从保存的边界继续遍历：未列出的目录完整遍历，已列出的目录只重新输出其文件
+        根目录中的文件未确认处理时根目录保留在边界中
+        """
+
+        client = FakeAlistClient(self.FILES)
+        frontier = AlistFrontier()
+
+        async def walk() -> list[str]:
+            paths = []
+            async for path in AlistWalker(
+                client, is_detail=False, frontier=frontier
+            ).walk("/"):
+                paths.append(path.full_path)
+                if path.full_path != "/root.mkv":
+                    frontier.done(path)
+            return paths
+
+        run(walk())
+        self.assertEqual(frontier.snapshot(), [("/", None, True)])
+
+        frontier = AlistFrontier([("/ani/S2", MODIFIED, True), ("/movie", None, False)])
+        self.assertTrue(frontier.resumed)
+        client.listed.clear()
+        paths = run(walk())
+
+        self.assertEqual(
+            sorted(path for path in paths if path.endswith(".mkv")),
+            ["/ani/S2/EP01.mkv", "/movie/A/A.mkv"],
+        )
+        self.assertEqual(sorted(client.listed), ["/ani/S2", "/movie", "/movie/A"])
+        self.assertEqual(len(frontier), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()